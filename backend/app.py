@@ -144,6 +144,9 @@ def create_app():
                 'resume_detail': '/api/resumes/<id>',
                 'export_pdf': '/api/resumes/<id>/pdf',
                 'export_pdf_html': '/api/resumes/<id>/pdf-html',
+                'export_jobs': '/api/resumes/<id>/exports',
+                'export_job_status': '/api/exports/<job_id>',
+                'export_bulk': '/api/resumes/export-bulk',
                 'resume_html': '/api/resumes/<id>/html',
                 'preview': '/api/resumes/<id>/preview',
                 'chatflow_start': '/api/chatflow/start',
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 import json
 import uuid
 from email_validator import validate_email, EmailNotValidError
+from services.structured_data import compact_structured_data, expand_structured_data
+from services.markdown_parser import strip_parser_version
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -122,7 +124,7 @@ class Resume(db.Model):
         if include_content:
             data.update({
                 'raw_markdown': self.raw_markdown,
-                'structured_data': json.loads(self.structured_data) if self.structured_data else None
+                'structured_data': self.get_structured_data()
             })
         
         # 包含用户信息（如果有）
@@ -136,12 +138,20 @@ class Resume(db.Model):
         return data
     
     def set_structured_data(self, data):
-        """设置结构化数据"""
-        self.structured_data = json.dumps(data, ensure_ascii=False)
+        """设置结构化数据（能对应上raw_markdown时以紧凑的偏移格式保存）
+        
+        按 v1 格式保存时去掉解析器版本标记，之后的增量解析不复用其中的部分。
+        """
+        compact = compact_structured_data(data, self.raw_markdown)
+        if compact is None:
+            compact = strip_parser_version(data)
+        self.structured_data = json.dumps(compact, ensure_ascii=False)
     
     def get_structured_data(self):
-        """获取结构化数据"""
-        return json.loads(self.structured_data) if self.structured_data else None
+        """获取结构化数据（兼容旧格式，紧凑格式在读取时展开）"""
+        if not self.structured_data:
+            return None
+        return expand_structured_data(json.loads(self.structured_data), self.raw_markdown)
     
     def can_access(self, user):
         """检查用户是否可以访问此简历"""
@@ -1,7 +1,7 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.dify_chatflow_service import DifyChatflowService
-from services.markdown_parser import ResumeMarkdownParser
+from services.dify_chatflow_service import DifyChatflowService, RESUME_COMPLETION_KEYWORDS, RESUME_SECTION_MARKERS
+from services.markdown_parser import ResumeMarkdownParser, StreamingResumeParser, parse_cache
 from services.auth_service import AuthService
 from models import db, Resume, User
 from datetime import datetime
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 chatflow_bp = Blueprint('chatflow', __name__)
 dify_service = DifyChatflowService()
-parser = ResumeMarkdownParser()
+parser = ResumeMarkdownParser(cache=parse_cache)
 
 @chatflow_bp.route('/api/chatflow/start', methods=['POST'])
 @jwt_required()
@@ -199,8 +199,8 @@ def create_resume_from_chatflow_manual():
             'error': f'创建简历失败: {str(e)}'
         }), 500
 
-def create_resume_from_chatflow(markdown_content, title, conversation_id=None, user_id=None):
-    """从Chatflow结果创建简历记录"""
+def create_resume_from_chatflow(markdown_content, title, conversation_id=None, user_id=None, structured_data=None):
+    """从Chatflow结果创建简历记录，已在流式接收时解析过的可直接传入 structured_data"""
     try:
         # 获取用户信息
         user = None
@@ -216,7 +216,8 @@ def create_resume_from_chatflow(markdown_content, title, conversation_id=None, u
             logger.warning("创建简历时未找到关联用户，创建为公开简历")
         
         # 解析Markdown为结构化数据
-        structured_data = parser.parse(markdown_content)
+        if structured_data is None:
+            structured_data = parser.parse(markdown_content)
         
         # 创建简历记录
         resume = Resume(
@@ -372,7 +373,10 @@ def stream_message():
                     'timestamp': datetime.utcnow()
                 })
                 
-                full_answer = ""
+                # 边接收边切分部分，流结束时结构化数据已基本就绪
+                stream_parser = StreamingResumeParser(
+                    parser, completion_keywords=RESUME_COMPLETION_KEYWORDS + RESUME_SECTION_MARKERS
+                )
                 message_id = None
                 
                 # 转发流式响应
@@ -388,16 +392,28 @@ def stream_message():
                             if event == 'message':
                                 # 消息块事件
                                 chunk = data.get('answer', '')
-                                full_answer += chunk
+                                was_detected = stream_parser.completion_detected
+                                finished_sections = stream_parser.feed(chunk)
                                 if not message_id:
                                     message_id = data.get('message_id')
                                 
                                 # 转发给前端
                                 yield f"data: {json.dumps({'type': 'chunk', 'content': chunk, 'success': True})}\n\n"
                                 
+                                # 有部分完成或首次识别出简历内容时通知进度
+                                if finished_sections or stream_parser.completion_detected != was_detected:
+                                    progress = {
+                                        'type': 'progress',
+                                        'success': True,
+                                        'sections': [section['title'] for section in stream_parser.finished_sections],
+                                        'resume_detected': stream_parser.completion_detected
+                                    }
+                                    yield f"data: {json.dumps(progress)}\n\n"
+                                
                             elif event == 'message_end':
                                 # 消息结束
                                 metadata = data.get('metadata', {})
+                                full_answer = stream_parser.text
                                 
                                 # 记录AI回复
                                 session['messages'].append({
@@ -409,7 +425,7 @@ def stream_message():
                                 })
                                 
                                 # 检查是否完成简历创建
-                                is_complete = dify_service._is_resume_complete({'answer': full_answer, 'metadata': metadata})
+                                is_complete = stream_parser.completion_detected or dify_service._is_metadata_complete(metadata)
                                 resume_content = None
                                 resume_id = None
                                 edit_url = None
@@ -425,7 +441,8 @@ def stream_message():
                                                 markdown_content=resume_content['markdown'],
                                                 title=resume_content.get('title', '浩流简历生成'),
                                                 conversation_id=conversation_id,
-                                                user_id=session.get('user_id')  # 从会话中获取用户ID
+                                                user_id=session.get('user_id'),  # 从会话中获取用户ID
+                                                structured_data=stream_parser.finish(resume_content['markdown'])
                                             )
                                             resume_id = created_resume.id
                                             edit_url = f'/edit/{created_resume.id}'
@@ -452,7 +469,8 @@ def stream_message():
                 logger.error(f"流式处理错误: {str(e)}")
                 yield f"data: {json.dumps({'type': 'error', 'success': False, 'error': str(e)})}\n\n"
         
-        return Response(generate(), mimetype='text/event-stream', headers={
+        # 生成器在视图返回后才执行，需要保留请求上下文才能写数据库
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
             'Cache-Control': 'no-cache',
             'Connection': 'keep-alive',
             'Access-Control-Allow-Origin': '*',
@@ -1,9 +1,35 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt
+from services.auth_service import AuthService, is_token_blacklisted
+from services.markdown_parser import parse_cache, html_cache
+from services.section_classifier import section_classifier
+from services.pdf_cache import pdf_artifact_cache
+from services.render_pool import render_pool
+from services.export_jobs import export_jobs
+from services.prerender import prerender_scheduler
+from services.render_timing import render_histogram
 import json
 from datetime import datetime
 
 debug_bp = Blueprint('debug', __name__)
 
+def check_admin():
+    """运行统计只对管理员开放，令牌失效或不是管理员时返回错误响应，否则返回 None"""
+    # 检查token是否在黑名单中
+    if is_token_blacklisted(get_jwt()['jti']):
+        return jsonify({
+            'success': False,
+            'errors': ['令牌已失效，请重新登录']
+        }), 401
+    
+    user = AuthService.get_current_user()
+    if not user or not user.is_admin:
+        return jsonify({
+            'success': False,
+            'errors': ['权限不足']
+        }), 403
+    return None
+
 @debug_bp.route('/api/debug/dify-test', methods=['POST', 'GET', 'PUT', 'DELETE'])
 def dify_debug():
     """Dify连接调试端点"""
@@ -98,4 +124,54 @@ def echo():
             'success': False,
             'error': str(e),
             'timestamp': datetime.utcnow().isoformat()
-        }), 400
\ No newline at end of file
+        }), 400
+
+@debug_bp.route('/api/debug/cache-stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    """查看各缓存的命中统计（管理员），用于调整缓存容量"""
+    admin_error = check_admin()
+    if admin_error:
+        return admin_error
+    
+    return jsonify({
+        'success': True,
+        'caches': [parse_cache.stats(), html_cache.stats(), section_classifier.cache.stats(),
+                   pdf_artifact_cache.stats()],
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@debug_bp.route('/api/debug/render-pool', methods=['GET'])
+@jwt_required()
+def render_pool_stats():
+    """查看PDF渲染进程池、异步导出任务和预渲染的负载（管理员），用于调整进程数和排队上限"""
+    admin_error = check_admin()
+    if admin_error:
+        return admin_error
+    
+    return jsonify({
+        'success': True,
+        'render_pool': render_pool.stats(),
+        'export_jobs': export_jobs.stats(),
+        'prerender': prerender_scheduler.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@debug_bp.route('/api/debug/render-timings', methods=['GET'])
+@jwt_required()
+def render_timing_stats():
+    """查看PDF渲染各阶段的耗时直方图（管理员），format=prometheus 时返回 Prometheus 文本格式供采集
+
+    采集端需在 Authorization 头中携带管理员的访问令牌。
+    """
+    admin_error = check_admin()
+    if admin_error:
+        return admin_error
+    
+    if request.args.get('format') == 'prometheus':
+        return Response(render_histogram.prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify({
+        'success': True,
+        'render_timings': render_histogram.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
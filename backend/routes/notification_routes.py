@@ -1,6 +1,9 @@
 from flask import Blueprint, Response, request
+from flask_jwt_extended import decode_token
+from services.auth_service import is_token_blacklisted
 import json
 import time
+import uuid
 from datetime import datetime
 import threading
 import queue
@@ -13,18 +16,25 @@ notification_bp = Blueprint('notification', __name__)
 
 # 全局事件队列，存储需要推送给前端的事件
 event_queues = {}  # client_id -> queue
+client_owners = {}  # client_id -> 连接所属用户的 public_id，匿名连接为 None
 event_queues_lock = threading.Lock()
 
 class NotificationService:
     """通知服务 - 负责向前端推送实时事件"""
     
     @staticmethod
-    def add_client(client_id):
-        """添加新的客户端连接"""
+    def add_client(client_id, user_id=None):
+        """添加新的客户端连接，返回实际使用的客户端ID
+        
+        客户端ID已被其他连接占用时改用随机生成的ID，不与已有连接共用事件队列。
+        """
         with event_queues_lock:
-            if client_id not in event_queues:
-                event_queues[client_id] = queue.Queue()
-                logger.info(f"添加SSE客户端: {client_id}")
+            if client_id in event_queues:
+                client_id = f'client_{uuid.uuid4().hex}'
+            event_queues[client_id] = queue.Queue()
+            client_owners[client_id] = user_id
+            logger.info(f"添加SSE客户端: {client_id}")
+        return client_id
     
     @staticmethod
     def remove_client(client_id):
@@ -32,6 +42,7 @@ class NotificationService:
         with event_queues_lock:
             if client_id in event_queues:
                 del event_queues[client_id]
+                client_owners.pop(client_id, None)
                 logger.info(f"移除SSE客户端: {client_id}")
     
     @staticmethod
@@ -51,6 +62,33 @@ class NotificationService:
                 except queue.Full:
                     logger.warning(f"客户端队列已满: {client_id}")
     
+    @staticmethod
+    def send_user_event(user_id, event_type, data, client_id=None):
+        """推送事件到指定用户的连接，指定 client_id 时只推送给该连接（须属于该用户）
+        
+        连接只在当前进程内登记，连在其他 worker 进程上的客户端收不到。返回推送的连接数。
+        """
+        if not user_id:
+            return 0
+        event_data = {
+            'type': event_type,
+            'data': data,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        
+        sent = 0
+        with event_queues_lock:
+            for owned_id, owner in client_owners.items():
+                if owner != user_id or (client_id and owned_id != client_id):
+                    continue
+                try:
+                    event_queues[owned_id].put_nowait(event_data)
+                    logger.info(f"事件推送给客户端 {owned_id}: {event_type}")
+                    sent += 1
+                except queue.Full:
+                    logger.warning(f"客户端队列已满: {owned_id}")
+        return sent
+    
     @staticmethod
     def broadcast_resume_created(resume_id, title, redirect_url):
         """广播简历创建事件"""
@@ -61,16 +99,30 @@ class NotificationService:
             'auto_redirect': True
         })
 
+def sse_user_id():
+    """SSE连接所属的用户；EventSource 不能设置请求头，登录用户通过 token 查询参数携带访问令牌"""
+    token = request.args.get('token')
+    if not token:
+        return None
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return None
+    if claims.get('type') != 'access' or is_token_blacklisted(claims['jti']):
+        return None
+    return claims.get('sub')
+
 @notification_bp.route('/api/notifications/events')
 def events():
     """SSE端点 - 向前端推送实时事件"""
     
     # 生成客户端ID
-    client_id = request.headers.get('X-Client-ID', f'client_{int(time.time() * 1000)}')
+    requested_id = request.headers.get('X-Client-ID', f'client_{int(time.time() * 1000)}')
+    user_id = sse_user_id()
     
     def event_stream():
         # 添加客户端
-        NotificationService.add_client(client_id)
+        client_id = NotificationService.add_client(requested_id, user_id)
         
         try:
             # 发送连接确认
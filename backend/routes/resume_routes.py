@@ -1,18 +1,36 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models import db, Resume, User
-from services.markdown_parser import ResumeMarkdownParser
+from services.markdown_parser import ResumeMarkdownParser, parse_cache, html_cache, strip_parser_version
 from services.pdf_generator import ResumePDFGenerator
 from services.html_pdf_generator import HTMLPDFGenerator
+from services.pdf_cache import pdf_artifact_cache, spool_pdf
+from services.render_pool import render_pool, RenderPoolBusy, RenderTimeout
+from services.export_jobs import export_jobs, ExportJob, ExportQueueFull, JOB_DONE
+from services.prerender import prerender_scheduler
+from services.zip_stream import stream_zip
+from services.render_timing import collect_timings, phase, render_histogram
+from routes.notification_routes import NotificationService
 from services.auth_service import AuthService, is_token_blacklisted
 import io
 import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from sqlalchemy.orm import defer
+
+logger = logging.getLogger(__name__)
 
 resume_bp = Blueprint('resume', __name__)
-parser = ResumeMarkdownParser()
+parser = ResumeMarkdownParser(cache=parse_cache)
 pdf_generator = ResumePDFGenerator()
+draft_pdf_generator = ResumePDFGenerator(draft=True)
 html_pdf_generator = HTMLPDFGenerator()
+pdf_generators = {'reportlab': pdf_generator, 'draft': draft_pdf_generator, 'html': html_pdf_generator}
+
+# 批量导出：单次最多的简历数，以及同时渲染的简历数
+BULK_EXPORT_MAX_RESUMES = int(os.getenv('BULK_EXPORT_MAX_RESUMES', '200'))
+BULK_EXPORT_PARALLELISM = int(os.getenv('BULK_EXPORT_PARALLELISM', str(max(2, render_pool.workers))))
 
 def get_current_user_or_none():
     """获取当前用户，无token时返回None"""
@@ -37,6 +55,125 @@ def check_token_blacklist():
         pass
     return None
 
+def load_structured_data(resume):
+    """读取结构化数据，没有时重新解析并保存"""
+    structured_data = resume.get_structured_data()
+    if not structured_data:
+        structured_data = parser.parse(resume.raw_markdown)
+        resume.set_structured_data(structured_data)
+        db.session.commit()
+    return structured_data
+
+def parse_bool_param(value):
+    """解析请求体中的布尔参数，与查询参数一致，字符串只有 'true' 视为真"""
+    if isinstance(value, str):
+        return value.lower() == 'true'
+    return value is True
+
+def send_pdf_export(resume, generator_name, smart_onepage, filename):
+    """发送导出的PDF：ETag 匹配时返回304，磁盘缓存命中时直接发送文件，否则渲染后写入缓存
+    
+    渲染时各阶段的耗时通过 Server-Timing 响应头返回。
+    """
+    # 结构化数据缺失或与原文不符时会重新解析并保存，updated_at 随之更新，必须在计算缓存键之前完成
+    structured_data = load_structured_data(resume)
+    
+    etag = pdf_export_key(resume, generator_name, smart_onepage)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Server-Timing'] = 'cache;desc="not-modified"'
+        return response
+    
+    path = pdf_artifact_cache.get(etag)
+    if path is not None:
+        try:
+            response = pdf_file_response(path, filename, etag)
+            response.headers['Server-Timing'] = 'cache;desc="hit"'
+            return response
+        except FileNotFoundError:
+            pass  # 刚被其他进程淘汰，重新渲染
+    
+    try:
+        with collect_timings() as timings:
+            pdf_file = render_pdf_artifact(etag, generator_name, structured_data, smart_onepage)
+    except RenderPoolBusy as e:
+        response = jsonify({'success': False, 'errors': [str(e)]})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except RenderTimeout as e:
+        return jsonify({'success': False, 'errors': [str(e)]}), 504
+    
+    response = pdf_file_response(pdf_file, filename, etag)
+    response.headers['Server-Timing'] = timings.server_timing()
+    return response
+
+def parse_smart_onepage(generator_name, value):
+    """解析智能一页参数；草稿质量不做一页适配，始终按普通排版导出，缓存键和文件名也不区分"""
+    return parse_bool_param(value) and generator_name != 'draft'
+
+def pdf_export_key(resume, generator_name, smart_onepage):
+    """导出结果的缓存键，同时用作 ETag"""
+    return pdf_artifact_cache.artifact_key(resume.id, resume.updated_at, generator_name,
+                                           smart_onepage, pdf_generators[generator_name].VERSION)
+
+def schedule_prerender(resume):
+    """简历内容变化后安排后台预渲染默认导出版本（PRERENDER_ENABLED=1 时生效）"""
+    if not prerender_scheduler.enabled or not pdf_artifact_cache.enabled:
+        return
+    structured_data = resume.get_structured_data()
+    if not structured_data:
+        return
+    variants = [(pdf_export_key(resume, name, smart_onepage), name, smart_onepage)
+                for name, smart_onepage in prerender_scheduler.variants if name in pdf_generators]
+    prerender_scheduler.schedule(
+        resume.id, structured_data, variants,
+        render_pdf_file
+    )
+
+def pdf_export_filename(resume, generator_name, smart_onepage):
+    """下载文件名，HTML渲染、草稿质量和智能一页分别添加标识"""
+    method_suffix = {'html': "_HTML渲染", 'draft': "_草稿"}.get(generator_name, "")
+    onepage_suffix = "_智能一页" if smart_onepage else ""
+    return f"{resume.title.replace(' ', '_')}{method_suffix}{onepage_suffix}.pdf"
+
+def render_pdf_file(generator_name, structured_data, smart_onepage, output_path):
+    """生成PDF写入 output_path：启用渲染进程池时由渲染进程直接写文件，否则在当前进程内生成
+    
+    成功的渲染按阶段计入耗时直方图（同步导出、导出任务、预渲染和批量导出都经过这里）。
+    """
+    with collect_timings() as timings:
+        if render_pool.enabled:
+            render_pool.render(generator_name, structured_data, smart_onepage=smart_onepage, output_path=output_path)
+        else:
+            pdf_generators[generator_name].write_pdf(structured_data, output_path, smart_onepage=smart_onepage)
+    render_histogram.observe(generator_name, timings)
+
+def render_pdf_artifact(key, generator_name, structured_data, smart_onepage):
+    """渲染PDF到文件：写入磁盘缓存并返回路径，缓存关闭时返回临时文件句柄，PDF内容不在内存中复制"""
+    def write(output_path):
+        render_pdf_file(generator_name, structured_data, smart_onepage, output_path)
+    
+    # cache 只计写入缓存本身的开销，渲染各阶段另行计时
+    with phase('cache'):
+        if pdf_artifact_cache.enabled:
+            return pdf_artifact_cache.store(key, write)
+        return spool_pdf(write)
+
+def pdf_file_response(path_or_file, filename, etag):
+    """PDF下载响应，浏览器每次使用前用 ETag 重新验证"""
+    response = send_file(
+        path_or_file,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename,
+        etag=etag,
+        conditional=True
+    )
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @resume_bp.route('/api/resumes', methods=['POST'])
 @jwt_required()
 def create_resume():
@@ -80,6 +217,7 @@ def create_resume():
         
         db.session.add(resume)
         db.session.commit()
+        schedule_prerender(resume)
         
         return jsonify({
             'success': True,
@@ -212,6 +350,7 @@ def receive_from_dify():
         
         db.session.add(resume)
         db.session.commit()
+        schedule_prerender(resume)
         
         # 构建前端编辑页面URL  
         frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
@@ -386,16 +525,19 @@ def update_resume(resume_id):
             resume.is_public = data['is_public']
         
         if 'raw_markdown' in data:
+            previous_data = resume.get_structured_data()
             resume.raw_markdown = data['raw_markdown']
-            # 重新解析Markdown
-            structured_data = parser.parse(data['raw_markdown'])
+            # 增量解析Markdown，只重新解析有变化的部分
+            structured_data = parser.parse_incremental(data['raw_markdown'], previous_data)
             resume.set_structured_data(structured_data)
         
         if 'structured_data' in data:
-            resume.set_structured_data(data['structured_data'])
+            # 客户端提供的数据不是解析器生成的，去掉版本标记，之后的增量解析不复用
+            resume.set_structured_data(strip_parser_version(data['structured_data']))
         
         resume.updated_at = datetime.utcnow()
         db.session.commit()
+        schedule_prerender(resume)
         
         return jsonify({
             'success': True,
@@ -454,7 +596,7 @@ def delete_resume(resume_id):
 @resume_bp.route('/api/resumes/<int:resume_id>/pdf', methods=['GET'])
 @jwt_required(optional=True)
 def export_pdf(resume_id):
-    """导出简历为PDF"""
+    """导出简历为PDF，quality=draft 时生成供编辑器预览的草稿质量PDF（默认 full）"""
     try:
         # 检查token黑名单
         blacklist_result = check_token_blacklist()
@@ -471,34 +613,23 @@ def export_pdf(resume_id):
                 'errors': ['没有权限访问此简历']
             }), 403
         
-        structured_data = resume.get_structured_data()
-        
-        if not structured_data:
-            # 如果没有结构化数据，重新解析
-            structured_data = parser.parse(resume.raw_markdown)
-            resume.set_structured_data(structured_data)
-            db.session.commit()
-        
-        # 检查智能一页参数
-        smart_onepage = request.args.get('smart_onepage', 'false').lower() == 'true'
-        
-        # 生成PDF（支持智能一页模式）
-        pdf_bytes = pdf_generator.generate_pdf(structured_data, smart_onepage=smart_onepage)
+        # 草稿质量使用不嵌入的CID字体，用于实时预览
+        quality = request.args.get('quality', 'full').lower()
+        if quality not in ('full', 'draft'):
+            return jsonify({
+                'success': False,
+                'errors': [f'不支持的导出质量: {quality}']
+            }), 400
+        generator_name = 'draft' if quality == 'draft' else 'reportlab'
         
-        # 创建文件流
-        pdf_io = io.BytesIO(pdf_bytes)
-        pdf_io.seek(0)
+        # 检查智能一页参数（草稿质量忽略）
+        smart_onepage = parse_smart_onepage(generator_name, request.args.get('smart_onepage', 'false'))
         
-        # 文件名添加智能一页标识
-        filename_suffix = "_智能一页" if smart_onepage else ""
-        filename = f"{resume.title.replace(' ', '_')}{filename_suffix}.pdf"
+        # 文件名添加智能一页和草稿标识
+        filename = pdf_export_filename(resume, generator_name, smart_onepage)
         
-        return send_file(
-            pdf_io,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        # 生成PDF（支持智能一页模式），内容未变化时复用缓存
+        return send_pdf_export(resume, generator_name, smart_onepage, filename)
         
     except Exception as e:
         return jsonify({'error': f'PDF生成失败: {str(e)}'}), 500
@@ -523,38 +654,279 @@ def export_pdf_html(resume_id):
                 'errors': ['没有权限访问此简历']
             }), 403
         
-        structured_data = resume.get_structured_data()
-        
-        if not structured_data:
-            # 如果没有结构化数据，重新解析
-            structured_data = parser.parse(resume.raw_markdown)
-            resume.set_structured_data(structured_data)
-            db.session.commit()
-        
         # 检查智能一页参数
         smart_onepage = request.args.get('smart_onepage', 'false').lower() == 'true'
         
-        # 生成PDF（使用HTML渲染方式）
-        pdf_bytes = html_pdf_generator.generate_pdf(structured_data, smart_onepage=smart_onepage)
+        # 文件名添加HTML标识
+        filename = pdf_export_filename(resume, 'html', smart_onepage)
         
-        # 创建文件流
-        pdf_io = io.BytesIO(pdf_bytes)
-        pdf_io.seek(0)
+        # 生成PDF（使用HTML渲染方式），内容未变化时复用缓存
+        return send_pdf_export(resume, 'html', smart_onepage, filename)
         
-        # 文件名添加HTML标识
-        method_suffix = "_HTML渲染" 
-        onepage_suffix = "_智能一页" if smart_onepage else ""
-        filename = f"{resume.title.replace(' ', '_')}{method_suffix}{onepage_suffix}.pdf"
-        
-        return send_file(
-            pdf_io,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
+    except Exception as e:
+        return jsonify({'error': f'HTML转PDF生成失败: {str(e)}'}), 500
+
+def export_job_info(job):
+    """导出任务状态，完成后附带下载地址"""
+    info = job.to_dict()
+    info['status_url'] = f"/api/exports/{job.id}"
+    info['download_url'] = f"/api/exports/{job.id}?download=true" if job.status == JOB_DONE else None
+    return info
+
+def notify_export_finished(job):
+    """导出任务结束后向提交任务的用户推送 export_finished 事件
+    
+    只推送给该用户登录后建立的SSE连接（带 client_id 时只推送给其中这一个），匿名提交的任务不推送。
+    任务在提交请求的进程中执行，连在其他 worker 进程上的SSE连接收不到，客户端应同时轮询任务状态。
+    """
+    NotificationService.send_user_event(job.user_id, 'export_finished', export_job_info(job),
+                                        client_id=job.client_id)
+
+@resume_bp.route('/api/resumes/<int:resume_id>/exports', methods=['POST'])
+@jwt_required(optional=True)
+def create_export(resume_id):
+    """提交异步导出任务，立即返回任务ID
+
+    登录用户提交的任务完成后通过 /api/notifications/events 推送给该用户的连接，
+    请求中的 client_id 只用于在该用户自己的连接中选择一个；推送可能收不到，以轮询任务状态为准。
+    """
+    try:
+        # 检查token黑名单
+        blacklist_result = check_token_blacklist()
+        if blacklist_result:
+            return blacklist_result
+        
+        resume = Resume.query.get_or_404(resume_id)
+        current_user = get_current_user_or_none()
+        
+        # 检查访问权限
+        if not resume.can_access(current_user):
+            return jsonify({
+                'success': False,
+                'errors': ['没有权限访问此简历']
+            }), 403
+        
+        data = request.get_json(silent=True) or {}
+        generator_name = data.get('generator', 'html')
+        if generator_name not in pdf_generators:
+            return jsonify({
+                'success': False,
+                'errors': [f'不支持的导出方式: {generator_name}']
+            }), 400
+        smart_onepage = parse_smart_onepage(generator_name, data.get('smart_onepage', False))
+        
+        # 保存解析结果会更新 updated_at，必须在计算缓存键之前完成
+        structured_data = load_structured_data(resume)
+        job = ExportJob(
+            resume.id, generator_name, smart_onepage,
+            artifact_key=pdf_export_key(resume, generator_name, smart_onepage),
+            filename=pdf_export_filename(resume, generator_name, smart_onepage),
+            user_id=current_user.public_id if current_user else None,
+            client_id=data.get('client_id') or request.headers.get('X-Client-ID')
         )
         
+        # 内容未变化时直接返回已完成的任务
+        path = pdf_artifact_cache.get(job.artifact_key)
+        if path is not None:
+            export_jobs.add_finished(job, path)
+            return jsonify({'success': True, 'job': export_job_info(job)}), 200
+        
+        export_jobs.submit(
+            job,
+            lambda output_path: render_pdf_file(generator_name, structured_data, smart_onepage, output_path),
+            on_finished=notify_export_finished
+        )
+        return jsonify({'success': True, 'job': export_job_info(job)}), 202
+        
+    except ExportQueueFull as e:
+        response = jsonify({'success': False, 'errors': [str(e)]})
+        response.headers['Retry-After'] = '5'
+        return response, 503
     except Exception as e:
-        return jsonify({'error': f'HTML转PDF生成失败: {str(e)}'}), 500
+        return jsonify({'error': f'创建导出任务失败: {str(e)}'}), 500
+
+@resume_bp.route('/api/exports/<job_id>', methods=['GET'])
+@jwt_required(optional=True)
+def get_export(job_id):
+    """查询导出任务状态，完成后带 download=true 参数下载PDF"""
+    try:
+        # 检查token黑名单
+        blacklist_result = check_token_blacklist()
+        if blacklist_result:
+            return blacklist_result
+        
+        job = export_jobs.get(job_id)
+        resume = Resume.query.get(job.resume_id) if job else None
+        if resume is None:
+            return jsonify({
+                'success': False,
+                'errors': ['导出任务不存在或已过期']
+            }), 404
+        
+        # 检查访问权限
+        if not resume.can_access(get_current_user_or_none()):
+            return jsonify({
+                'success': False,
+                'errors': ['没有权限访问此简历']
+            }), 403
+        
+        if request.args.get('download', 'false').lower() != 'true':
+            return jsonify({'success': True, 'job': export_job_info(job)}), 200
+        
+        if job.status != JOB_DONE:
+            return jsonify({
+                'success': False,
+                'errors': [f'导出失败: {job.error}' if job.error else '导出任务尚未完成'],
+                'job': export_job_info(job)
+            }), 409
+        
+        # 任务目录也不可用时PDF只在提交任务的进程内存中，超出内存上限后被丢弃
+        pdf_bytes = job.pdf_bytes
+        if job.path is None and pdf_bytes is None:
+            return jsonify({
+                'success': False,
+                'errors': ['导出文件已过期，请重新导出']
+            }), 410
+        
+        try:
+            return pdf_file_response(job.path or io.BytesIO(pdf_bytes), job.filename, job.artifact_key)
+        except FileNotFoundError:
+            return jsonify({
+                'success': False,
+                'errors': ['导出文件已过期，请重新导出']
+            }), 410
+        
+    except Exception as e:
+        return jsonify({'error': f'获取导出任务失败: {str(e)}'}), 500
+
+def cached_or_rendered_pdf(key, generator_name, structured_data, smart_onepage):
+    """返回缓存中的PDF路径，未命中时渲染"""
+    path = pdf_artifact_cache.get(key)
+    if path is not None:
+        return path
+    return render_pdf_artifact(key, generator_name, structured_data, smart_onepage)
+
+def bulk_export_entries(resume_ids, generator_name, smart_onepage):
+    """按渲染完成顺序产出 (ZIP内文件名, PDF文件)，同时渲染的简历不超过 BULK_EXPORT_PARALLELISM 份
+    
+    每份简历在提交渲染前才从数据库读取，用完即移出会话，内存占用与简历总数无关。
+    渲染失败的简历汇总到最后的「导出失败.txt」。
+    """
+    remaining = iter(resume_ids)
+    pending = {}
+    failures = []
+    
+    def submit_next(executor):
+        """提交下一份简历的渲染，跳过校验之后被删除的简历；没有剩余简历时返回 False"""
+        for resume_id in remaining:
+            resume = Resume.query.get(resume_id)
+            if resume is None:
+                logger.warning(f"批量导出跳过已删除的简历 {resume_id}")
+                failures.append(f"{resume_id}: 简历不存在或已被删除")
+                continue
+            # 保存解析结果会更新 updated_at，必须在计算缓存键之前完成
+            structured_data = load_structured_data(resume)
+            key = pdf_export_key(resume, generator_name, smart_onepage)
+            name = f"{resume.id}_{pdf_export_filename(resume, generator_name, smart_onepage)}"
+            db.session.expunge(resume)
+            future = executor.submit(cached_or_rendered_pdf, key, generator_name, structured_data, smart_onepage)
+            pending[future] = name
+            return True
+        return False
+    
+    with ThreadPoolExecutor(max_workers=max(1, BULK_EXPORT_PARALLELISM), thread_name_prefix='pdf-bulk') as executor:
+        try:
+            while len(pending) < BULK_EXPORT_PARALLELISM and submit_next(executor):
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                        pdf_file = open(result, 'rb') if isinstance(result, str) else result
+                    except Exception as e:
+                        logger.error(f"批量导出失败 {name}: {e}")
+                        failures.append(f"{name}: {e}")
+                    else:
+                        yield name, pdf_file
+                    submit_next(executor)
+        finally:
+            # 客户端断开时不再启动新的渲染
+            for future in pending:
+                future.cancel()
+    
+    if failures:
+        yield '导出失败.txt', '\n'.join(failures).encode('utf-8')
+
+@resume_bp.route('/api/resumes/export-bulk', methods=['POST'])
+@jwt_required(optional=True)
+def export_bulk():
+    """批量导出多份简历为ZIP，渲染完成一份就写入一份，边生成边发送"""
+    try:
+        # 检查token黑名单
+        blacklist_result = check_token_blacklist()
+        if blacklist_result:
+            return blacklist_result
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            resume_ids = list(dict.fromkeys(int(resume_id) for resume_id in data.get('ids') or []))
+        except (TypeError, ValueError):
+            resume_ids = []
+        if not resume_ids:
+            return jsonify({
+                'success': False,
+                'errors': ['请提供要导出的简历ID列表']
+            }), 400
+        if len(resume_ids) > BULK_EXPORT_MAX_RESUMES:
+            return jsonify({
+                'success': False,
+                'errors': [f'单次最多导出 {BULK_EXPORT_MAX_RESUMES} 份简历']
+            }), 400
+        
+        generator_name = data.get('generator', 'reportlab')
+        if generator_name not in pdf_generators:
+            return jsonify({
+                'success': False,
+                'errors': [f'不支持的导出方式: {generator_name}']
+            }), 400
+        smart_onepage = parse_smart_onepage(generator_name, data.get('smart_onepage', False))
+        
+        # 权限检查只需要元数据，正文在渲染前再按需读取
+        resumes = (Resume.query
+                   .options(defer(Resume.raw_markdown), defer(Resume.structured_data))
+                   .filter(Resume.id.in_(resume_ids))
+                   .all())
+        found = {resume.id: resume for resume in resumes}
+        missing = [resume_id for resume_id in resume_ids if resume_id not in found]
+        if missing:
+            return jsonify({
+                'success': False,
+                'errors': [f'简历不存在: {missing}']
+            }), 404
+        
+        # 检查访问权限
+        current_user = get_current_user_or_none()
+        denied = [resume_id for resume_id in resume_ids if not found[resume_id].can_access(current_user)]
+        if denied:
+            return jsonify({
+                'success': False,
+                'errors': [f'没有权限访问简历: {denied}']
+            }), 403
+        
+        db.session.expunge_all()
+        response = Response(
+            stream_with_context(stream_zip(bulk_export_entries(resume_ids, generator_name, smart_onepage))),
+            mimetype='application/zip'
+        )
+        response.headers.set('Content-Disposition', 'attachment',
+                             filename=f"简历批量导出_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip")
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'批量导出失败: {str(e)}'}), 500
 
 @resume_bp.route('/api/resumes/<int:resume_id>/html', methods=['GET'])
 @jwt_required(optional=True)
@@ -625,7 +997,12 @@ def preview_html(resume_id):
                 'errors': ['没有权限访问此简历']
             }), 403
         
-        html_content = parser.markdown_to_html(resume.raw_markdown)
+        # 内容未变化时直接复用已渲染的HTML
+        cache_key = (resume.id, resume.updated_at.isoformat() if resume.updated_at else None)
+        html_content = html_cache.get(cache_key)
+        if html_content is None:
+            html_content = parser.markdown_to_html(resume.raw_markdown)
+            html_cache.put(cache_key, html_content)
         
         return jsonify({
             'success': True,
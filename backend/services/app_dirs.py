@@ -0,0 +1,46 @@
+"""
+应用私有数据目录
+
+PDF缓存和导出任务记录默认放在应用自己的数据目录下（容器中为挂载到
+/app/data 的卷，本地开发为 backend/data），不放在所有用户共享的系统临时目录：
+其他本地用户可以抢先创建 /tmp 下的同名目录并放入文件。可通过 APP_DATA_DIR 指定。
+
+读取前检查目录属于当前用户且其他用户不可写，检查不通过时调用方不使用该目录。
+"""
+
+import os
+import stat
+
+APP_DATA_DIR = os.getenv('APP_DATA_DIR') or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+def app_data_path(name: str) -> str:
+    """应用数据目录下的子目录路径"""
+    return os.path.join(APP_DATA_DIR, name)
+
+
+def _owned_by_current_user(st: os.stat_result) -> bool:
+    if not hasattr(os, 'getuid'):  # Windows 没有 uid，依赖目录ACL
+        return True
+    return st.st_uid == os.getuid()
+
+
+def ensure_private_dir(path: str) -> bool:
+    """创建目录（0700），并确认它不是符号链接、属于当前用户且组和其他用户不可写"""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as e:
+        print(f"无法创建数据目录 {path}: {e}")
+        return False
+    if not stat.S_ISDIR(st.st_mode) or not _owned_by_current_user(st) or st.st_mode & 0o022:
+        print(f"数据目录 {path} 不属于当前用户或可被其他用户写入，不使用该目录")
+        return False
+    return True
+
+
+def is_private_file(fd: int) -> bool:
+    """已打开的文件是否为当前用户所有的普通文件"""
+    st = os.fstat(fd)
+    return stat.S_ISREG(st.st_mode) and _owned_by_current_user(st)
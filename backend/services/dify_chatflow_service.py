@@ -9,6 +9,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# 简历完成标识关键词（小写匹配）
+RESUME_COMPLETION_KEYWORDS = (
+    '简历创建完成', '简历已生成', '简历制作完成', '简历生成完毕',
+    'resume complete', 'resume generated', '创建完毕', '已完成',
+    '浩流简历', '简历内容如下', '您的简历已经准备好了'
+)
+
+# 出现这些部分标题即认为回答中包含markdown格式的简历内容
+RESUME_SECTION_MARKERS = ('## 个人信息', '## 工作经历', '## 教育背景')
+
 class DifyChatflowService:
     """浩流简历·flowork Dify 集成服务"""
     
@@ -242,28 +252,20 @@ class DifyChatflowService:
         metadata = response.get('metadata', {})
         
         # 检查完成标识关键词
-        completion_keywords = [
-            '简历创建完成', '简历已生成', '简历制作完成', '简历生成完毕',
-            'resume complete', 'resume generated', '创建完毕', '已完成',
-            '浩流简历', '简历内容如下', '您的简历已经准备好了'
-        ]
-        
-        for keyword in completion_keywords:
+        for keyword in RESUME_COMPLETION_KEYWORDS:
             if keyword.lower() in answer:
                 return True
         
         # 检查是否包含markdown格式的简历内容
-        if ('# ' in response.get('answer', '') and 
-            ('## 个人信息' in response.get('answer', '') or 
-             '## 工作经历' in response.get('answer', '') or
-             '## 教育背景' in response.get('answer', ''))):
+        if any(marker in response.get('answer', '') for marker in RESUME_SECTION_MARKERS):
             return True
         
         # 检查metadata中的完成标识
-        if metadata.get('status') == 'completed' or metadata.get('resume_ready'):
-            return True
-        
-        return False
+        return self._is_metadata_complete(metadata)
+    
+    def _is_metadata_complete(self, metadata: Dict) -> bool:
+        """检查metadata中的完成标识"""
+        return bool(metadata.get('status') == 'completed' or metadata.get('resume_ready'))
     
     def _extract_resume_content(self, response: Dict) -> Optional[Dict]:
         """从浩流简历·flowork响应中提取简历内容"""
@@ -0,0 +1,309 @@
+"""
+异步PDF导出任务
+
+HTML渲染导出要等待 wkhtmltopdf（最长30秒）或启动一次 Chromium，同步接口会在整个过程中
+占住一个请求线程。导出任务提交后立即返回任务ID，渲染在后台线程中进行（实际渲染仍由
+渲染进程池完成），结果直接写入PDF磁盘缓存，完成时通过回调推送通知。
+
+任务记录保存在当前进程内存中，同时以 JSON 文件写入应用数据目录下的 export-jobs
+（可通过 EXPORT_JOB_DIR 指定），多个 worker 进程查询同一任务时从文件读取；
+按提交顺序保留最近 EXPORT_JOB_RETENTION 个。PDF磁盘缓存关闭时结果写在任务记录旁边，
+随记录一起清理；任务目录不可用时结果保存在提交任务的进程内存中，总大小不超过
+EXPORT_JOB_MAX_MEMORY_BYTES，超出时丢弃最早的结果（下载返回已过期）。
+
+完成回调在执行任务的进程中调用，推送通知（SSE）只能到达连在同一进程上的客户端，
+连在其他 worker 进程上的客户端收不到，需要轮询任务状态。
+"""
+
+import os
+import re
+import json
+import uuid
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from services.app_dirs import app_data_path, ensure_private_dir, is_private_file
+from services.lru_cache import LRUCache
+from services.pdf_cache import pdf_artifact_cache, spool_pdf
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+RECORD_SUFFIX = '.json'
+RESULT_SUFFIX = '.pdf'
+
+
+def export_job_dir() -> str:
+    """任务记录目录，默认为应用数据目录下的 export-jobs，可通过 EXPORT_JOB_DIR 指定"""
+    return os.getenv('EXPORT_JOB_DIR') or app_data_path('export-jobs')
+
+
+class ExportQueueFull(RuntimeError):
+    """排队中的导出任务已满"""
+
+
+class ExportJob:
+    """一次PDF导出任务"""
+
+    def __init__(self, resume_id: int, generator_name: str, smart_onepage: bool,
+                 artifact_key: str, filename: str, user_id: Optional[str] = None,
+                 client_id: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.resume_id = resume_id
+        self.generator_name = generator_name
+        self.smart_onepage = smart_onepage
+        self.artifact_key = artifact_key
+        self.filename = filename
+        self.user_id = user_id  # 提交任务的用户，匿名提交时为 None
+        self.client_id = client_id
+        self.status = JOB_PENDING
+        self.error = None
+        self.path = None
+        self.pdf_bytes = None  # 磁盘缓存和任务目录都不可用时保留在内存中
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def complete(self, path: Optional[str], pdf_bytes: Optional[bytes] = None):
+        self.path = path
+        self.pdf_bytes = pdf_bytes if path is None else None
+        self.status = JOB_DONE
+        self.finished_at = datetime.utcnow()
+
+    def fail(self, error: str):
+        self.error = error
+        self.status = JOB_FAILED
+        self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'resume_id': self.resume_id,
+            'generator': self.generator_name,
+            'smart_onepage': self.smart_onepage,
+            'status': self.status,
+            'filename': self.filename,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """写入任务记录文件的字段（不含内存中的PDF内容）"""
+        record = self.to_dict()
+        record.update(artifact_key=self.artifact_key, user_id=self.user_id, client_id=self.client_id,
+                      path=self.path)
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'ExportJob':
+        job = cls(record['resume_id'], record['generator'], record['smart_onepage'],
+                  artifact_key=record['artifact_key'], filename=record['filename'],
+                  user_id=record.get('user_id'), client_id=record.get('client_id'))
+        job.id = record['job_id']
+        job.status = record['status']
+        job.error = record.get('error')
+        job.path = record.get('path')
+        job.created_at = datetime.fromisoformat(record['created_at'])
+        if record.get('finished_at'):
+            job.finished_at = datetime.fromisoformat(record['finished_at'])
+        return job
+
+
+class ExportJobManager:
+    """在后台线程中执行导出任务并保留最近的任务记录
+
+    指定 job_dir 时任务状态同时写入该目录，其他进程中的管理器可以查询到。
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, retention: int = 256,
+                 job_dir: Optional[str] = None, max_memory_bytes: int = 64 * 1024 * 1024):
+        self.max_pending = max(1, max_pending)
+        self.retention = max(1, retention)
+        self.job_dir = job_dir
+        self.max_memory_bytes = max(0, max_memory_bytes)
+        self._in_memory = OrderedDict()  # job_id -> (任务, 结果大小)，按完成顺序
+        self._memory_bytes = 0
+        self._dir_checked = None
+        self._jobs = LRUCache(retention, name='export_jobs')
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='pdf-export')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def shared(self) -> bool:
+        """是否把任务记录写入目录；目录不安全时只保存在内存中"""
+        if not self.job_dir:
+            return False
+        if self._dir_checked is None:
+            self._dir_checked = ensure_private_dir(self.job_dir)
+        return self._dir_checked
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """先查当前进程内的任务，没有时读取其他进程写入的记录"""
+        job = self._jobs.get(job_id)
+        if job is None and self.shared and JOB_ID_PATTERN.match(job_id):
+            job = self._load(job_id)
+        return job
+
+    def add_finished(self, job: ExportJob, path: str) -> ExportJob:
+        """PDF已在缓存中时直接登记为已完成的任务"""
+        job.complete(path)
+        self._jobs.put(job.id, job)
+        self._save(job, prune=True)
+        return job
+
+    def submit(self, job: ExportJob, write: Callable[[str], None],
+               on_finished: Optional[Callable[[ExportJob], None]] = None) -> ExportJob:
+        """提交任务，write(文件路径) 在后台线程中生成PDF，完成或失败后调用 on_finished"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExportQueueFull('导出任务繁忙，请稍后重试')
+            self._pending += 1
+        self._jobs.put(job.id, job)
+        self._save(job, prune=True)
+        self._executor.submit(self._run, job, write, on_finished)
+        return job
+
+    def _run(self, job: ExportJob, write: Callable[[str], None], on_finished):
+        job.status = JOB_RUNNING
+        self._save(job)
+        try:
+            if pdf_artifact_cache.enabled:
+                job.complete(pdf_artifact_cache.store(job.artifact_key, write))
+            elif self.shared:
+                job.complete(self._store_result(job, write))
+            else:
+                with spool_pdf(write) as pdf_file:
+                    pdf_bytes = pdf_file.read()
+                job.complete(None, pdf_bytes if self._keep_in_memory(job, len(pdf_bytes)) else None)
+        except Exception as e:
+            print(f"导出任务失败 {job.id}: {e}")
+            job.fail(str(e))
+        finally:
+            self._save(job)
+            with self._lock:
+                self._pending -= 1
+                if job.status == JOB_DONE:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+        if on_finished:
+            try:
+                on_finished(job)
+            except Exception as e:
+                print(f"导出任务完成通知失败 {job.id}: {e}")
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, job_id + RECORD_SUFFIX)
+
+    def _store_result(self, job: ExportJob, write: Callable[[str], None]) -> str:
+        """PDF磁盘缓存关闭时把结果写在任务记录旁边，先写临时文件再原子替换"""
+        path = os.path.join(self.job_dir, job.id + RESULT_SUFFIX)
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
+    def _keep_in_memory(self, job: ExportJob, size: int) -> bool:
+        """登记将保存在内存中的结果，总大小超过上限时丢弃最早的结果；结果本身超过上限时返回 False"""
+        with self._lock:
+            if size > self.max_memory_bytes:
+                return False
+            self._in_memory[job.id] = (job, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (oldest, oldest_size) = self._in_memory.popitem(last=False)
+                self._memory_bytes -= oldest_size
+                oldest.pdf_bytes = None
+            return True
+
+    def _save(self, job: ExportJob, prune: bool = False):
+        """原子写入任务记录，写入失败时任务仍保留在内存中"""
+        if not self.shared:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(job.to_record(), f, ensure_ascii=False)
+                os.replace(tmp_path, self._record_path(job.id))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"写入导出任务记录失败 {job.id}: {e}")
+            return
+        if prune:
+            self._prune()
+
+    def _load(self, job_id: str) -> Optional[ExportJob]:
+        try:
+            with open(self._record_path(job_id), encoding='utf-8') as f:
+                if not is_private_file(f.fileno()):
+                    return None
+                return ExportJob.from_record(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _prune(self):
+        """只保留最近 retention 个任务记录"""
+        try:
+            with os.scandir(self.job_dir) as it:
+                records = [(entry.stat().st_mtime, entry.path) for entry in it
+                           if entry.name.endswith(RECORD_SUFFIX)]
+        except OSError:
+            return
+        if len(records) <= self.retention:
+            return
+        for _, path in sorted(records)[:len(records) - self.retention]:
+            for stale in (path, path[:-len(RECORD_SUFFIX)] + RESULT_SUFFIX):
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """返回任务统计信息"""
+        with self._lock:
+            return {
+                'name': 'export_jobs',
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'retained': self._jobs.stats()['size'],
+                'memory_bytes': self._memory_bytes
+            }
+
+
+# 导出接口共享的任务管理器
+export_jobs = ExportJobManager(
+    max_workers=int(os.getenv('EXPORT_JOB_THREADS', '4')),
+    max_pending=int(os.getenv('EXPORT_JOB_QUEUE_LIMIT', '64')),
+    retention=int(os.getenv('EXPORT_JOB_RETENTION', '256')),
+    job_dir=export_job_dir(),
+    max_memory_bytes=int(os.getenv('EXPORT_JOB_MAX_MEMORY_BYTES', str(64 * 1024 * 1024)))
+)
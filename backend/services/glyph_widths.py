@@ -0,0 +1,49 @@
+"""
+字形宽度表
+
+智能一页在多个候选字号下估算行数时，逐段调用 pdfmetrics.stringWidth 或按字符数估算
+都不合适：前者每次都要重新编码和查表，后者假设每个字符宽 0.6 倍字号，CJK 字符实际
+接近 1 倍字号。这里为每个已注册字体维护一张“字符 -> 1pt 字号下宽度”的表，
+每个字符只向字体查询一次；文本宽度测量一次后，换字号只需要按比例缩放。
+"""
+
+import math
+import threading
+from typing import Dict, Iterable
+from reportlab.pdfbase import pdfmetrics
+
+_tables_lock = threading.Lock()
+_tables: Dict[str, 'GlyphWidthTable'] = {}
+
+
+class GlyphWidthTable(dict):
+    """单个字体的字形宽度表，未出现过的字符在首次访问时向字体查询"""
+
+    def __init__(self, font_name: str):
+        super().__init__()
+        self.font_name = font_name
+
+    def __missing__(self, char: str) -> float:
+        width = pdfmetrics.stringWidth(char, self.font_name, 1)
+        self[char] = width
+        return width
+
+    def text_width(self, text: str) -> float:
+        """文本在1pt字号下的宽度"""
+        return sum(map(self.__getitem__, text))
+
+
+def glyph_width_table(font_name: str) -> GlyphWidthTable:
+    """字体对应的宽度表，同一进程内共享"""
+    table = _tables.get(font_name)
+    if table is None:
+        with _tables_lock:
+            table = _tables.setdefault(font_name, GlyphWidthTable(font_name))
+    return table
+
+
+def count_lines(unit_widths: Iterable[float], font_size: float, available_width: float) -> int:
+    """由1pt字号下的各行宽度估算给定字号和行宽下的总行数（空行按一行计）"""
+    scale = font_size / available_width
+    return sum(max(1, math.ceil(width * scale)) for width in unit_widths)
+
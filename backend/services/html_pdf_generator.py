@@ -5,6 +5,8 @@ HTML转PDF生成器
 
 import markdown
 from markdown.extensions import codehilite, tables, toc
+from services.markdown_parser import MarkdownConverterPool, ENTRY_SECTION_TYPES, section_entries
+from services.render_timing import phase
 import os
 import tempfile
 from typing import Dict, Any
@@ -14,9 +16,12 @@ import platform
 class HTMLPDFGenerator:
     """基于HTML的PDF生成器"""
     
+    # 导出结果的版本，HTML模板或样式变化时递增，使已缓存的PDF失效
+    VERSION = 1
+    
     def __init__(self):
-        # 配置markdown扩展
-        self.md = markdown.Markdown(
+        # 配置markdown扩展（转换器池，线程间不共享同一实例）
+        self.md_pool = MarkdownConverterPool(
             extensions=[
                 'markdown.extensions.extra',  # 包含tables, fenced_code等
                 'markdown.extensions.codehilite',
@@ -76,6 +81,19 @@ class HTMLPDFGenerator:
             if section_title:
                 markdown_content += f"## {section_title}\n\n"
             
+            if section.get('type') in ENTRY_SECTION_TYPES:
+                # 经历类部分直接使用解析时提取的条目记录
+                for entry in section_entries(section):
+                    heading = ' | '.join(part for part in (entry['title'], entry['organization'], entry['date_range']) if part)
+                    if heading:
+                        markdown_content += f"### {heading}\n\n"
+                    for paragraph in entry['description']:
+                        markdown_content += f"{paragraph}\n\n"
+                    for bullet in entry['bullets']:
+                        markdown_content += f"- {bullet}\n"
+                    markdown_content += "\n"
+                continue
+            
             items = section.get('items', [])
             for item in items:
                 content = item.get('content', '')
@@ -92,7 +110,7 @@ class HTMLPDFGenerator:
             markdown_content += "\n"
         
         # 将markdown转换为HTML
-        html_body = self.md.convert(markdown_content)
+        html_body = self.md_pool.convert(markdown_content)
         
         # 构建完整的HTML文档
         html_template = """
@@ -295,6 +313,10 @@ class HTMLPDFGenerator:
     
     def generate_pdf_with_wkhtmltopdf(self, html_content: str, smart_onepage: bool = False) -> bytes:
         """使用wkhtmltopdf生成PDF"""
+        return self._read_output(self.write_pdf_with_wkhtmltopdf, html_content, smart_onepage)
+    
+    def write_pdf_with_wkhtmltopdf(self, html_content: str, pdf_path: str, smart_onepage: bool = False):
+        """使用wkhtmltopdf生成PDF，直接输出到 pdf_path"""
         if not self.wkhtmltopdf_available:
             raise RuntimeError("wkhtmltopdf 未安装或不可用")
         
@@ -303,10 +325,6 @@ class HTMLPDFGenerator:
             html_file.write(html_content)
             html_file_path = html_file.name
         
-        # 创建临时PDF文件
-        with tempfile.NamedTemporaryFile(mode='rb', suffix='.pdf', delete=False) as pdf_file:
-            pdf_file_path = pdf_file.name
-        
         try:
             # wkhtmltopdf命令选项
             cmd = [
@@ -329,36 +347,34 @@ class HTMLPDFGenerator:
                     '--dpi', '150',   # 提高DPI保持清晰度
                 ])
             
-            cmd.extend([html_file_path, pdf_file_path])
+            cmd.extend([html_file_path, pdf_path])
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            with phase('subprocess'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
             
             if result.returncode != 0:
                 raise RuntimeError(f"wkhtmltopdf 执行失败: {result.stderr}")
             
-            # 读取生成的PDF
-            with open(pdf_file_path, 'rb') as pdf_file:
-                pdf_data = pdf_file.read()
-            
-            return pdf_data
-            
         finally:
             # 清理临时文件
             try:
                 os.unlink(html_file_path)
-                os.unlink(pdf_file_path)
             except OSError:
                 pass
     
     def generate_pdf_with_playwright(self, html_content: str, smart_onepage: bool = False) -> bytes:
         """使用Playwright生成PDF（备用方案）"""
+        return self._read_output(self.write_pdf_with_playwright, html_content, smart_onepage)
+    
+    def write_pdf_with_playwright(self, html_content: str, pdf_path: str, smart_onepage: bool = False):
+        """使用Playwright生成PDF，直接输出到 pdf_path"""
         try:
             from playwright.sync_api import sync_playwright
         except ImportError:
             raise RuntimeError("Playwright 未安装，请运行: pip install playwright && playwright install chromium")
         
-        with sync_playwright() as p:
+        with phase('browser'), sync_playwright() as p:
             browser = p.chromium.launch()
             page = browser.new_page()
             
@@ -367,6 +383,7 @@ class HTMLPDFGenerator:
             
             # PDF选项
             pdf_options = {
+                'path': pdf_path,
                 'format': 'A4',
                 'margin': {
                     'top': '15mm' if smart_onepage else '20mm',
@@ -383,28 +400,46 @@ class HTMLPDFGenerator:
                 pdf_options['scale'] = 0.85
             
             # 生成PDF
-            pdf_data = page.pdf(**pdf_options)
+            page.pdf(**pdf_options)
             
             browser.close()
-            return pdf_data
+    
+    def _read_output(self, write, source, smart_onepage: bool) -> bytes:
+        """调用 write(source, 临时PDF路径, smart_onepage) 后读回，供需要 bytes 的调用方使用"""
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_file:
+            pdf_file_path = pdf_file.name
+        try:
+            write(source, pdf_file_path, smart_onepage)
+            with phase('output'), open(pdf_file_path, 'rb') as pdf_file:
+                return pdf_file.read()
+        finally:
+            try:
+                os.unlink(pdf_file_path)
+            except OSError:
+                pass
     
     def generate_pdf(self, resume_data: Dict[str, Any], smart_onepage: bool = False) -> bytes:
         """生成PDF简历"""
+        return self._read_output(self.write_pdf, resume_data, smart_onepage)
+    
+    def write_pdf(self, resume_data: Dict[str, Any], pdf_path: str, smart_onepage: bool = False):
+        """生成PDF简历直接写入 pdf_path，导出接口用它写入缓存文件，不再读回内存"""
         # 设置智能一页模式标记
         self._smart_onepage = smart_onepage
         
         # 生成HTML内容
-        html_content = self._generate_html_content(resume_data)
+        with phase('html'):
+            html_content = self._generate_html_content(resume_data)
         
         # 尝试使用wkhtmltopdf生成PDF
         if self.wkhtmltopdf_available:
             print("使用 wkhtmltopdf 生成PDF")
-            return self.generate_pdf_with_wkhtmltopdf(html_content, smart_onepage)
+            self.write_pdf_with_wkhtmltopdf(html_content, pdf_path, smart_onepage)
         else:
             # 备用：尝试使用Playwright
             try:
                 print("使用 Playwright 生成PDF")
-                return self.generate_pdf_with_playwright(html_content, smart_onepage)
+                self.write_pdf_with_playwright(html_content, pdf_path, smart_onepage)
             except RuntimeError as e:
                 # 如果都不可用，返回错误信息
                 raise RuntimeError(f"无法生成PDF: wkhtmltopdf和Playwright都不可用。错误: {str(e)}")
@@ -1,100 +1,339 @@
 import re
+import os
+import queue
+import json
+import hashlib
 import markdown
-from typing import Dict, List, Any
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+from services.lru_cache import LRUCache
+from services.section_classifier import section_classifier
+
+# 预编译模式：避免每次解析都重新查找正则缓存，并减少对全文的重复扫描
+NAME_PATTERN = re.compile(r'^#[^\S\n]+([^\n]+)$', re.MULTILINE)
+H2_PATTERN = re.compile(r'^##\s+(.+)$', re.MULTILINE)
+
+# 联系方式只在页眉（第一个H2之前）和个人信息类部分中提取，
+# 模式均有长度上限且不跨行，扫描耗时与文本长度成线性关系
+EMAIL_PATTERN = re.compile(r'(?<![A-Za-z0-9._%+-])([A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24})(?![A-Za-z0-9-])')
+PHONE_PATTERN = re.compile(r'(?<![\w+(])(\+?\(?(?:\d[ \-()]{0,2}){6,14}\d)(?!\d)')
+YEAR_RANGE_PATTERN = re.compile(r'^(?:19|20)\d{2}\s*-\s*(?:19|20)\d{2}$')
+URL_PATTERN = re.compile(r'((?:https?://|www\.)[^\s<>"\'()\[\]（）。，；：！？、|]{1,2048})')
+URL_TRAILING_PUNCTUATION = '.,;:!?。，；：！？'
+ADDRESS_PATTERN = re.compile(r'(地址|住址|现居)[:：](?=[^\S\n]*([^\n]{1,200}))')
+ADDRESS_LABELS = ('地址', '住址', '现居')  # 按优先级排列
+CONTACT_SECTION_KEYWORDS = ('个人信息', '基本信息', '联系', 'contact', 'personal')
+LIST_ITEM_PATTERN = re.compile(r'^[-*]\s+(.+)$', re.MULTILINE)
+
+# 经历类部分在解析时拆分为条目记录：标题行（### 或含 | 的行）+ 描述段落 + 列表要点
+# Markdown 表格的行（首尾都是 |）和分隔行（|---|---|）不是标题行，归入描述
+ENTRY_SECTION_TYPES = ('experience', 'education', 'projects')
+ENTRY_HEADING_PATTERN = re.compile(r'^#{3,6}\s+(.+)$')
+ENTRY_BULLET_PATTERN = re.compile(r'^[-*]\s+(.+)$')
+TABLE_ROW_PATTERN = re.compile(r'^\|.*\|$')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?$')
+DATE_HINT_PATTERN = re.compile(r'(?:19|20)\d{2}|至今|现在|present|now', re.IGNORECASE)
+
+# 解析结果的版本标记。增量解析只复用带有当前版本标记的数据中的部分；
+# 调用方直接提供的结构化数据和 v1 格式保存的数据都去掉标记，不会被复用。
+# 部分的划分、分类或条目提取规则变化时递增。
+PARSER_VERSION = 1
+
+# 按内容哈希缓存解析结果，各蓝图共享同一个实例
+parse_cache = LRUCache(max_entries=int(os.getenv('PARSE_CACHE_SIZE', '256')), name='markdown_parse')
+
+
+# 预览HTML缓存，键为 (简历ID, 更新时间)
+html_cache = LRUCache(max_entries=int(os.getenv('HTML_CACHE_SIZE', '128')), name='preview_html')
+
+
+def content_hash(text: str) -> str:
+    """计算文本内容的哈希，作为缓存键"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def section_hash(section: Dict[str, Any]) -> str:
+    """部分内容的哈希（标题、类型、正文、条目都参与计算），解析时计算一次保存在部分的 hash 字段"""
+    fields = {key: value for key, value in section.items() if key != 'hash'}
+    return content_hash(json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def strip_parser_version(data: Any) -> Any:
+    """去掉解析器版本标记，返回的数据不会再被增量解析复用"""
+    if isinstance(data, dict) and 'parser_version' in data:
+        return {key: value for key, value in data.items() if key != 'parser_version'}
+    return data
+
+
+def extract_entries(content: str) -> List[Dict[str, Any]]:
+    """把经历/教育/项目部分拆分为条目记录
+
+    标题行按 `标题 | 机构 | 时间` 拆分；标题行之后的列表项为要点，其余文字（包括表格）按空行分段作为描述。
+    所有字段都是原文的子串，便于紧凑存储。
+    """
+    entries = []
+    entry = None
+    paragraph = []
+
+    def flush_paragraph():
+        if paragraph:
+            entry['description'].append('\n'.join(paragraph).strip())
+            paragraph.clear()
+
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            if entry is not None:
+                flush_paragraph()
+            continue
+
+        heading = ENTRY_HEADING_PATTERN.match(line)
+        bullet = None if heading else ENTRY_BULLET_PATTERN.match(line)
+        table_row = TABLE_ROW_PATTERN.match(stripped) or TABLE_SEPARATOR_PATTERN.match(stripped)
+        if heading or (bullet is None and not table_row and '|' in stripped):
+            if entry is not None:
+                flush_paragraph()
+            entry = _parse_entry_heading(heading.group(1).strip() if heading else stripped)
+            entries.append(entry)
+            continue
+
+        if entry is None:
+            # 第一个标题行之前的内容归入无标题条目
+            entry = _parse_entry_heading('')
+            entries.append(entry)
+        if bullet:
+            flush_paragraph()
+            entry['bullets'].append(bullet.group(1).strip())
+        else:
+            paragraph.append(line)
+
+    if entry is not None:
+        flush_paragraph()
+    return entries
+
+
+def _parse_entry_heading(heading: str) -> Dict[str, Any]:
+    """拆分条目标题行：标题 | 机构 | 时间，只有两段且第二段像日期时视为 标题 | 时间"""
+    parts = heading.split('|', 2)
+    title = parts[0].strip()
+    organization = parts[1].strip() if len(parts) > 1 else ''
+    date_range = parts[2].strip() if len(parts) > 2 else ''
+    if len(parts) == 2 and DATE_HINT_PATTERN.search(organization):
+        organization, date_range = '', organization
+    return {
+        'title': title,
+        'organization': organization,
+        'date_range': date_range,
+        'bullets': [],
+        'description': []
+    }
+
+
+def section_entries(section: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """返回部分的条目记录；旧数据中没有条目时从正文（或条目列表）即时提取"""
+    entries = section.get('entries')
+    if entries is not None:
+        return entries
+    content = section.get('content')
+    if not content:
+        content = '\n\n'.join(
+            ('- ' if item.get('type') == 'list_item' else '') + item['content']
+            for item in section.get('items') or [] if item.get('content')
+        )
+    return extract_entries(content)
+
+
+class MarkdownConverterPool:
+    """Markdown转换器池
+    
+    markdown.Markdown 实例带有内部状态，不能在线程间共享。每次转换独占借出一个实例，
+    归还前调用 reset() 清理状态，空闲实例数量有上限。
+    """
+    
+    def __init__(self, max_idle: int = 8, **markdown_options):
+        self._markdown_options = markdown_options
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+    
+    @contextmanager
+    def converter(self):
+        """借出一个已重置的转换器"""
+        try:
+            md = self._idle.get_nowait()
+        except queue.Empty:
+            md = markdown.Markdown(**self._markdown_options)
+        try:
+            yield md
+        finally:
+            md.reset()
+            try:
+                self._idle.put_nowait(md)
+            except queue.Full:
+                pass
+    
+    def convert(self, text: str) -> str:
+        """使用池中的转换器将Markdown转换为HTML"""
+        with self.converter() as md:
+            return md.convert(text)
+
 
 class ResumeMarkdownParser:
     """简历Markdown解析器，将Markdown格式的简历解析为结构化数据"""
     
-    def __init__(self):
-        self.md = markdown.Markdown(extensions=['extra', 'codehilite'])
+    def __init__(self, cache: Optional[LRUCache] = None):
+        self.md_pool = MarkdownConverterPool(extensions=['extra', 'codehilite'])
+        # 可选的解析缓存；命中时返回的是共享对象，调用方不应原地修改
+        self.cache = cache
     
     def parse(self, markdown_text: str) -> Dict[str, Any]:
         """解析Markdown简历为结构化数据"""
+        return self._parse(markdown_text)
+    
+    def parse_incremental(self, markdown_text: str, previous_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """增量解析：只重新解析内容有变化的部分
+        
+        以 (标题, 正文) 作为部分的指纹，与上一次保存的 structured_data 比对，
+        未变化的部分直接复用原有的部分字典。只有带当前 PARSER_VERSION 标记（即由当前版本的
+        解析器生成）的数据才会被复用，此时结果与 parse 完全一致；其他数据整体重新解析。
+        """
+        reusable = {}
+        if not isinstance(previous_data, dict) or previous_data.get('parser_version') != PARSER_VERSION:
+            previous_data = None
+        for section in (previous_data or {}).get('sections') or []:
+            if not isinstance(section, dict) or 'type' not in section or 'items' not in section:
+                continue
+            # 旧数据中的经历类部分没有条目记录，需要重新构建
+            if section['type'] in ENTRY_SECTION_TYPES and 'entries' not in section:
+                continue
+            reusable[(section.get('title'), section.get('content'))] = section
+        
+        return self._parse(markdown_text, reusable)
+    
+    def _parse(self, markdown_text: str, reusable: Optional[Dict[tuple, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """解析入口，优先查询内容哈希缓存"""
         
         # 清理和预处理
         markdown_text = markdown_text.strip()
         
-        # 基本信息提取
+        cache_key = None
+        if self.cache is not None:
+            cache_key = content_hash(markdown_text)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # 先切分部分，个人信息类部分也参与联系方式提取
+        sections = self._extract_sections(markdown_text, reusable)
         resume_data = {
-            'personal_info': self._extract_personal_info(markdown_text),
-            'sections': self._extract_sections(markdown_text),
-            'raw_markdown': markdown_text
+            'personal_info': self._extract_personal_info(markdown_text, sections),
+            'sections': sections,
+            'raw_markdown': markdown_text,
+            'parser_version': PARSER_VERSION
         }
         
+        # 复用了上次保存的部分时结果取决于调用方传入的数据，不能放进按内容共享的缓存
+        reused = {id(section) for section in reusable.values()} if reusable else ()
+        if cache_key is not None and not any(id(section) in reused for section in sections):
+            self.cache.put(cache_key, resume_data)
+        
         return resume_data
     
-    def _extract_personal_info(self, text: str) -> Dict[str, str]:
-        """提取个人基本信息"""
+    def _extract_personal_info(self, text: str, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """提取个人基本信息
+        
+        联系方式只在页眉（第一个H2之前）和个人信息类部分中查找，支持多个邮箱、电话和链接，
+        email / phone 字段保留第一个值以兼容旧数据。
+        """
         info = {}
         
         # 提取姓名 (通常是第一个H1标题)
-        name_match = re.search(r'^#\s+(.+)$', text, re.MULTILINE)
+        name_match = NAME_PATTERN.search(text)
         if name_match:
             info['name'] = name_match.group(1).strip()
         
-        # 提取联系方式
-        email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', text)
-        if email_match:
-            info['email'] = email_match.group(1)
-        
-        phone_match = re.search(r'(\+?[\d\s\-\(\)]{10,})', text)
-        if phone_match:
-            info['phone'] = phone_match.group(1).strip()
-        
-        # 提取地址
-        address_patterns = [
-            r'地址[:：]\s*(.+)',
-            r'住址[:：]\s*(.+)',
-            r'现居[:：]\s*(.+)'
-        ]
-        for pattern in address_patterns:
-            match = re.search(pattern, text)
-            if match:
-                info['address'] = match.group(1).strip()
+        first_h2 = H2_PATTERN.search(text)
+        blocks = [text[:first_h2.start()] if first_h2 else text]
+        for section in sections:
+            title_lower = section['title'].lower()
+            if any(keyword in title_lower for keyword in CONTACT_SECTION_KEYWORDS):
+                blocks.append(section['content'])
+        
+        emails, phones, urls = [], [], []
+        addresses = {}
+        for block in blocks:
+            for match in EMAIL_PATTERN.finditer(block):
+                self._append_unique(emails, match.group(1))
+            for match in PHONE_PATTERN.finditer(block):
+                phone = match.group(1).strip()
+                if not YEAR_RANGE_PATTERN.match(phone):
+                    self._append_unique(phones, phone)
+            for match in URL_PATTERN.finditer(block):
+                self._append_unique(urls, match.group(1).rstrip(URL_TRAILING_PUNCTUATION))
+            for match in ADDRESS_PATTERN.finditer(block):
+                addresses.setdefault(match.group(1), match.group(2).strip())
+        
+        if emails:
+            info['email'] = emails[0]
+        if phones:
+            info['phone'] = phones[0]
+        for label in ADDRESS_LABELS:
+            if addresses.get(label):
+                info['address'] = addresses[label]
                 break
+        if emails:
+            info['emails'] = emails
+        if phones:
+            info['phones'] = phones
+        if urls:
+            info['urls'] = urls
         
         return info
     
-    def _extract_sections(self, text: str) -> List[Dict[str, Any]]:
-        """提取简历各个部分"""
+    @staticmethod
+    def _append_unique(values: List[str], value: str):
+        """按出现顺序追加不重复的值"""
+        if value and value not in values:
+            values.append(value)
+    
+    def _extract_sections(self, text: str, reusable: Optional[Dict[tuple, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """提取简历各个部分（按H2标题单次扫描），可复用未变化的部分"""
         sections = []
+        title = None
+        content_start = 0
         
-        # 按H2标题分割内容
-        h2_pattern = r'^##\s+(.+)$'
-        parts = re.split(h2_pattern, text, flags=re.MULTILINE)
-        
-        # 第一部分通常是个人信息，跳过
-        for i in range(1, len(parts), 2):
-            if i + 1 < len(parts):
-                title = parts[i].strip()
-                content = parts[i + 1].strip()
-                
-                section = {
-                    'title': title,
-                    'content': content,
-                    'type': self._classify_section_type(title),
-                    'items': self._extract_section_items(content, title)
-                }
-                sections.append(section)
+        # 第一个H2之前通常是个人信息，跳过
+        for match in H2_PATTERN.finditer(text):
+            if title is not None:
+                sections.append(self._build_section(title, text[content_start:match.start()], reusable))
+            title = match.group(1).strip()
+            content_start = match.end()
+        
+        if title is not None:
+            sections.append(self._build_section(title, text[content_start:], reusable))
         
         return sections
     
+    def _build_section(self, title: str, content: str,
+                       reusable: Optional[Dict[tuple, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """根据标题和正文构建部分"""
+        content = content.strip()
+        if reusable:
+            section = reusable.get((title, content))
+            if section is not None:
+                return section
+        section = {
+            'title': title,
+            'content': content,
+            'type': self._classify_section_type(title),
+            'items': self._extract_section_items(content, title)
+        }
+        if section['type'] in ENTRY_SECTION_TYPES:
+            section['entries'] = extract_entries(content)
+        section['hash'] = section_hash(section)
+        return section
+    
     def _classify_section_type(self, title: str) -> str:
         """分类部分类型"""
-        title_lower = title.lower()
-        
-        if any(keyword in title_lower for keyword in ['教育', '学历', 'education']):
-            return 'education'
-        elif any(keyword in title_lower for keyword in ['工作', '经历', '职业', 'experience', 'work']):
-            return 'experience'
-        elif any(keyword in title_lower for keyword in ['技能', 'skills', '专业技能']):
-            return 'skills'
-        elif any(keyword in title_lower for keyword in ['项目', 'projects', '项目经验']):
-            return 'projects'
-        elif any(keyword in title_lower for keyword in ['证书', '认证', 'certificates']):
-            return 'certificates'
-        else:
-            return 'other'
+        return section_classifier.classify(title)
     
     def _extract_section_items(self, content: str, section_title: str) -> List[Dict[str, Any]]:
         """提取部分中的条目"""
@@ -103,7 +342,7 @@ class ResumeMarkdownParser:
         # 按列表项或段落分割
         if '-' in content or '*' in content:
             # 列表格式
-            list_items = re.findall(r'^[-*]\s+(.+)$', content, re.MULTILINE)
+            list_items = LIST_ITEM_PATTERN.findall(content)
             for item in list_items:
                 items.append({
                     'type': 'list_item',
@@ -122,4 +361,59 @@ class ResumeMarkdownParser:
 
     def markdown_to_html(self, markdown_text: str) -> str:
         """将Markdown转换为HTML"""
-        return self.md.convert(markdown_text)
\ No newline at end of file
+        return self.md_pool.convert(markdown_text)
+
+
+class StreamingResumeParser:
+    """流式解析器：边接收Dify回答分块边切分部分
+    
+    每当一个新的H2标题行完整到达，上一个部分即视为结束并立即构建；流结束时
+    只需构建最后一个部分，其余部分直接复用，结果与一次性 parse 完全一致。
+    同时在增量文本上检测简历完成标识，不必等到 message_end 再扫描全文。
+    """
+    
+    def __init__(self, parser: ResumeMarkdownParser, completion_keywords=()):
+        self.parser = parser
+        self.text = ''
+        self.finished_sections: List[Dict[str, Any]] = []
+        self.completion_detected = False
+        self._reusable: Dict[tuple, Dict[str, Any]] = {}
+        self._open_section = None  # (标题, 正文起始位置)
+        self._scan_pos = 0
+        self._keywords = tuple(keyword.lower() for keyword in completion_keywords)
+        self._keyword_overlap = max((len(keyword) for keyword in self._keywords), default=1) - 1
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """追加一个分块，返回因此结束的部分"""
+        if not chunk:
+            return []
+        start = len(self.text)
+        self.text += chunk
+        
+        if not self.completion_detected and self._keywords:
+            # 只检查新到达的文本，并向前重叠关键词长度以覆盖跨分块的关键词
+            window = self.text[max(0, start - self._keyword_overlap):].lower()
+            self.completion_detected = any(keyword in window for keyword in self._keywords)
+        
+        if '\n' not in chunk:
+            return []
+        
+        finished = []
+        for match in H2_PATTERN.finditer(self.text, self._scan_pos):
+            if match.end() == len(self.text):
+                break  # 标题行尚未结束，等待后续分块
+            if self._open_section is not None:
+                title, content_start = self._open_section
+                section = self.parser._build_section(title, self.text[content_start:match.start()])
+                self._reusable[(section['title'], section['content'])] = section
+                finished.append(section)
+            self._open_section = (match.group(1).strip(), match.end())
+            self._scan_pos = match.end()
+        
+        self.finished_sections.extend(finished)
+        return finished
+    
+    def finish(self, markdown_text: Optional[str] = None) -> Dict[str, Any]:
+        """流结束后返回完整的解析结果，默认解析已接收的全部文本"""
+        text = self.text if markdown_text is None else markdown_text
+        return self.parser._parse(text, self._reusable)
@@ -0,0 +1,189 @@
+"""
+PDF导出结果的磁盘缓存
+
+公开简历会被反复下载，内容不变时每次重新渲染都是浪费。导出的PDF按
+(简历ID, 更新时间, 生成器, 智能一页, 生成器版本) 计算内容地址保存到本地磁盘，
+键同时作为 HTTP ETag：简历或渲染代码变化时键随之变化，旧文件不再被命中，
+最终按最近使用时间淘汰。多个 worker 进程共享同一目录，写入先写临时文件再原子替换。
+缓存目录默认在应用私有数据目录下；目录属于其他用户或可被其他用户写入时不使用缓存。
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, Optional
+
+from services.app_dirs import app_data_path, ensure_private_dir
+
+ARTIFACT_SUFFIX = '.pdf'
+
+
+def pdf_cache_dir() -> str:
+    """PDF缓存目录，默认为应用数据目录下的 pdf-cache，可通过 PDF_CACHE_DIR 指定"""
+    return os.getenv('PDF_CACHE_DIR') or app_data_path('pdf-cache')
+
+
+def _write_bytes(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _unlink_quietly(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def spool_pdf(write: Callable[[str], None]) -> IO[bytes]:
+    """缓存关闭时使用：调用 write(临时文件路径) 生成PDF，返回已删除文件的只读句柄
+
+    句柄交给 send_file 按文件发送，关闭后磁盘空间自动释放。
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        return open(tmp_path, 'rb')
+    finally:
+        _unlink_quietly(tmp_path)
+
+
+class PDFArtifactCache:
+    """按总大小淘汰的PDF文件缓存，以文件修改时间作为最近使用时间"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir or pdf_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dir_checked = None
+
+    @property
+    def enabled(self) -> bool:
+        """容量为0或缓存目录不安全时不读写缓存"""
+        if self.max_bytes <= 0:
+            return False
+        if self._dir_checked is None:
+            self._dir_checked = ensure_private_dir(self.cache_dir)
+        return self._dir_checked
+
+    @staticmethod
+    def artifact_key(resume_id: int, updated_at: Optional[datetime], generator: str,
+                     smart_onepage: bool, version: Any) -> str:
+        """缓存键，同时用作 ETag"""
+        updated = updated_at.isoformat() if updated_at else ''
+        key = f'{resume_id}|{updated}|{generator}|{int(smart_onepage)}|{version}'
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ARTIFACT_SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """命中时返回文件路径并刷新其最近使用时间"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        """写入PDF并按总大小淘汰最久未使用的文件，返回文件路径；写入失败时返回 None"""
+        if not self.enabled or len(data) > self.max_bytes:
+            return None
+        try:
+            return self.store(key, lambda tmp_path: _write_bytes(tmp_path, data))
+        except OSError as e:
+            print(f"写入PDF缓存失败 {self._path(key)}: {e}")
+            return None
+
+    def store(self, key: str, write: Callable[[str], None]) -> str:
+        """调用 write(临时文件路径) 把PDF直接写到缓存目录，完成后原子替换为缓存文件并返回路径
+
+        生成器和渲染进程直接写文件，PDF内容不经过当前进程内存。
+        """
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        path = self._path(key)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _unlink_quietly(tmp_path)
+            raise
+        self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        """缓存目录中的 (最近使用时间, 大小, 路径)"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(ARTIFACT_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:  # 已被其他进程淘汰
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self, keep: str):
+        """总大小超过上限时从最久未使用的文件开始删除"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """删除全部缓存文件"""
+        for _, _, path in self._entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        entries = self._entries()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': 'pdf_artifact',
+                'size': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# 导出接口共享的缓存，PDF_CACHE_MAX_BYTES=0 时关闭
+pdf_artifact_cache = PDFArtifactCache(max_bytes=int(os.getenv('PDF_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
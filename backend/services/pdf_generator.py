@@ -2,85 +2,248 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.lib.colors import HexColor, black, grey, white
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepInFrame
 from reportlab.lib.units import inch, mm
+from reportlab import rl_config
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.platypus.frames import Frame
 from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
+from services.markdown_parser import ENTRY_SECTION_TYPES, PARSER_VERSION, section_entries, section_hash
+from services.font_loader import load_ttfont
+from services.glyph_widths import glyph_width_table, count_lines
+from services.pdf_markup import MarkupConverter
+from services.render_timing import phase
+from services.lru_cache import LRUCache
 import io
+import copy
+import html
 import re
 import os
 import math
+import threading
+from types import MappingProxyType
+
+# pdfmetrics 的字体注册表是进程全局的，字体在首次渲染时注册一次，各生成器实例共享
+_font_lock = threading.Lock()
+_registered_fonts = None
+
+# 草稿质量使用的CID字体：PDF阅读器自带字形，不嵌入也不需要解析和子集化TrueType字体
+DRAFT_CID_FONT = os.getenv('PDF_DRAFT_FONT', 'STSong-Light')
+
+# 智能一页：压缩比例下限、二分查找最多轮数和收敛精度
+ONEPAGE_MIN_RATIO = 0.55
+ONEPAGE_SEARCH_STEPS = 6
+# 压缩比例量化为固定档位，每个档位的样式表只创建一次
+ONEPAGE_RATIO_STEP = 0.025
+ONEPAGE_RATIO_LEVELS = tuple(round(ONEPAGE_MIN_RATIO + i * ONEPAGE_RATIO_STEP, 3)
+                             for i in range(round((1.0 - ONEPAGE_MIN_RATIO) / ONEPAGE_RATIO_STEP) + 1))
+
+# 估算文本宽度时去掉 _clean_markdown 生成的字体标签
+MARKUP_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# SimpleDocTemplate 正文框架的内边距，以及判断放得下时允许的误差
+FRAME_PADDING = 6
+LAYOUT_TOLERANCE = 1e-6
+
+# 各部分已换行的 flowable 缓存的条目数（每个条目是一个部分在一种样式和框架宽度下的排版结果）
+SECTION_LAYOUT_CACHE_SIZE = int(os.getenv('SECTION_LAYOUT_CACHE_SIZE', '512'))
+
+
+def ratio_level(compression_ratio: float) -> int:
+    """压缩比例向下取整到的档位下标，超出范围时取最近的档位"""
+    level = math.floor((compression_ratio - ONEPAGE_MIN_RATIO) / ONEPAGE_RATIO_STEP + 1e-9)
+    return max(0, min(len(ONEPAGE_RATIO_LEVELS) - 1, level))
+
+
+def register_fonts() -> Dict[str, str]:
+    """注册中文字体，返回 regular / bold / medium 对应的字体名"""
+    global _registered_fonts
+    with _font_lock:
+        if _registered_fonts is None:
+            fonts = {'regular': 'Helvetica', 'bold': 'Helvetica-Bold', 'medium': 'Helvetica-Bold'}  # 默认字体
+
+            # 尝试注册HarmonyOS Sans字体
+            try:
+                # 获取fonts目录的绝对路径
+                fonts_dir = os.path.join(os.path.dirname(__file__), '..', 'fonts')
+                fonts_dir = os.path.abspath(fonts_dir)
+
+                # HarmonyOS Sans简体中文字体路径
+                harmony_fonts_dir = os.path.join(fonts_dir, 'HarmonyOS Sans', 'HarmonyOS_Sans_SC')
+
+                # 定义字体文件映射
+                font_files = {
+                    'regular': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Regular.ttf'),
+                    'bold': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Bold.ttf'),
+                    'medium': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Medium.ttf'),
+                    'light': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Light.ttf')
+                }
+
+                # 检查并注册HarmonyOS Sans字体
+                fonts_registered = 0
+                for weight, font_path in font_files.items():
+                    try:
+                        if os.path.exists(font_path):
+                            font_name = f'HarmonyOS-{weight.capitalize()}'
+                            pdfmetrics.registerFont(load_ttfont(font_name, font_path))
+                            print(f"成功注册字体: {font_name} -> {font_path}")
+                            fonts_registered += 1
+
+                            # 设置主要字体
+                            if weight == 'regular':
+                                fonts['regular'] = font_name
+                            elif weight == 'bold':
+                                fonts['bold'] = font_name
+                            elif weight == 'medium':
+                                fonts['medium'] = font_name
+
+                    except Exception as e:
+                        print(f"注册字体失败 {weight}: {e}")
+                        continue
+
+                if fonts_registered > 0:
+                    print(f"HarmonyOS Sans 字体注册成功，共注册 {fonts_registered} 个字重")
+                    print(f"常规字体: {fonts['regular']}")
+                    print(f"粗体字体: {fonts['bold']}")
+                    print(f"中等字体: {fonts['medium']}")
+                else:
+                    # 如果HarmonyOS Sans不可用，尝试备选字体
+                    _register_fallback_fonts(fonts_dir, fonts)
+
+            except Exception as e:
+                print(f"HarmonyOS Sans字体注册过程出错: {e}")
+                _register_fallback_fonts(fonts_dir, fonts)
+
+            print(f"最终使用字体 - 常规: {fonts['regular']}, 粗体: {fonts['bold']}")
+            _registered_fonts = fonts
+        return _registered_fonts
+
+
+def register_draft_fonts() -> Dict[str, str]:
+    """注册草稿质量使用的CID字体，regular / bold / medium 都使用这一种字体"""
+    with _font_lock:
+        if DRAFT_CID_FONT not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(UnicodeCIDFont(DRAFT_CID_FONT))
+    return {'regular': DRAFT_CID_FONT, 'bold': DRAFT_CID_FONT, 'medium': DRAFT_CID_FONT}
+
+
+def _register_fallback_fonts(fonts_dir, fonts):
+    """注册备选字体"""
+    try:
+        # 备选字体路径
+        fallback_fonts = [
+            (os.path.join(fonts_dir, 'SourceHanSansSC-Regular.otf'), 'SourceHanSans'),
+            (os.path.join(fonts_dir, 'NotoSansCJKsc-Regular.otf'), 'NotoSans'),
+            ('/System/Library/Fonts/PingFang.ttc', 'PingFang'),
+        ]
+
+        for font_path, font_name in fallback_fonts:
+            try:
+                if os.path.exists(font_path):
+                    print(f"尝试注册备选字体: {font_path}")
+                    if font_path.endswith('.otf'):
+                        pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    else:
+                        pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=0))
+
+                    fonts['regular'] = font_name
+                    fonts['bold'] = font_name  # 使用相同字体作为粗体
+                    fonts['medium'] = font_name
+                    print(f"成功注册备选字体: {font_name}")
+                    return
+            except Exception as e:
+                print(f"备选字体注册失败 {font_name}: {e}")
+                continue
+
+        # 最后尝试CID字体
+        try:
+            pdfmetrics.registerFont(UnicodeCIDFont('HeiseiKakuGo-W5'))
+            fonts['regular'] = 'HeiseiKakuGo-W5'
+            fonts['bold'] = 'HeiseiKakuGo-W5'
+            fonts['medium'] = 'HeiseiKakuGo-W5'
+            print("使用CID字体: HeiseiKakuGo-W5")
+        except:
+            print("使用默认字体: Helvetica")
+
+    except Exception as e:
+        print(f"备选字体注册过程出错: {e}")
+
+
+def section_layout_hash(section: Dict[str, Any], trusted: bool = False) -> str:
+    """部分内容的哈希：解析器生成的数据（trusted）直接使用解析时计算的 hash，其余数据现算"""
+    if trusted and isinstance(section.get('hash'), str):
+        return section['hash']
+    return section_hash(section)
+
+
+class LayoutParagraph(Paragraph):
+    """记住换行结果的段落：以相同宽度再次 wrap 时直接复用，不再重新断行
+    
+    Paragraph.wrap 每次都重新断行，而排版测量、doc.build 以及之后的导出会以同一宽度反复调用。
+    断行结果与可用高度无关，只需按宽度判断。
+    
+    断行结果（blPara）和 frags 在各次渲染的浅拷贝之间共享，只读使用；ReportLab 只在跨页拆分
+    段落时原地修改它们（改写最后一个词或片段的类），所以 split 之前先深拷贝成本段落自己的副本。
+    """
+    
+    def _own_layout(self):
+        """深拷贝共享的断行结果和 frags，之后的修改只影响本段落"""
+        if self.__dict__.get('_owns_layout'):
+            return
+        self.frags = copy.deepcopy(self.frags)
+        if 'blPara' in self.__dict__:
+            self.blPara = copy.deepcopy(self.blPara)
+        self._layout = None
+        self._owns_layout = True
+    
+    def split(self, availWidth, availHeight):
+        self._own_layout()
+        return Paragraph.split(self, availWidth, availHeight)
+    
+    def draw(self):
+        # 从右到左排版时 drawPara 会原地反转每行的词序
+        if self.style.wordWrap == 'RTL':
+            self._own_layout()
+        return Paragraph.draw(self)
+    
+    def wrap(self, availWidth, availHeight):
+        layout = self.__dict__.get('_layout')
+        if layout is not None and abs(layout[0] - availWidth) <= LAYOUT_TOLERANCE:
+            _, self.width, self.height, self._wrapWidths, self.blPara = layout
+            return self.width, self.height
+        width, height = Paragraph.wrap(self, availWidth, availHeight)
+        self._layout = (availWidth, width, height, self._wrapWidths, self.blPara)
+        return width, height
+
 
 class ResumePDFGenerator:
-    """简历PDF生成器 - 使用ReportLab"""
+    """简历PDF生成器 - 使用ReportLab
     
-    def __init__(self):
-        # 注册HarmonyOS Sans中文字体
-        self.chinese_font = 'Helvetica'  # 默认字体
-        self.chinese_bold_font = 'Helvetica-Bold'
-        self.chinese_medium_font = 'Helvetica-Bold'
-        
-        # 尝试注册HarmonyOS Sans字体
-        try:
-            # 获取fonts目录的绝对路径
-            fonts_dir = os.path.join(os.path.dirname(__file__), '..', 'fonts')
-            fonts_dir = os.path.abspath(fonts_dir)
-            
-            # HarmonyOS Sans简体中文字体路径
-            harmony_fonts_dir = os.path.join(fonts_dir, 'HarmonyOS Sans', 'HarmonyOS_Sans_SC')
-            
-            # 定义字体文件映射
-            font_files = {
-                'regular': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Regular.ttf'),
-                'bold': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Bold.ttf'),
-                'medium': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Medium.ttf'),
-                'light': os.path.join(harmony_fonts_dir, 'HarmonyOS_Sans_SC_Light.ttf')
-            }
-            
-            # 检查并注册HarmonyOS Sans字体
-            fonts_registered = 0
-            for weight, font_path in font_files.items():
-                try:
-                    if os.path.exists(font_path):
-                        font_name = f'HarmonyOS-{weight.capitalize()}'
-                        pdfmetrics.registerFont(TTFont(font_name, font_path))
-                        print(f"成功注册字体: {font_name} -> {font_path}")
-                        fonts_registered += 1
-                        
-                        # 设置主要字体
-                        if weight == 'regular':
-                            self.chinese_font = font_name
-                        elif weight == 'bold':
-                            self.chinese_bold_font = font_name
-                        elif weight == 'medium':
-                            self.chinese_medium_font = font_name
-                            
-                except Exception as e:
-                    print(f"注册字体失败 {weight}: {e}")
-                    continue
-            
-            if fonts_registered > 0:
-                print(f"HarmonyOS Sans 字体注册成功，共注册 {fonts_registered} 个字重")
-                print(f"常规字体: {self.chinese_font}")
-                print(f"粗体字体: {self.chinese_bold_font}")
-                print(f"中等字体: {self.chinese_medium_font}")
-            else:
-                # 如果HarmonyOS Sans不可用，尝试备选字体
-                self._register_fallback_fonts(fonts_dir)
-                
-        except Exception as e:
-            print(f"HarmonyOS Sans字体注册过程出错: {e}")
-            self._register_fallback_fonts(fonts_dir)
-        
-        print(f"最终使用字体 - 常规: {self.chinese_font}, 粗体: {self.chinese_bold_font}")
-        
-        # 创建样式 - 确保在字体注册后创建
-        self.styles = getSampleStyleSheet()
-        self._create_modern_styles()
+    字体和样式在首次使用时才注册和创建，导入模块或创建实例都不会解析字体文件。
+    
+    draft=True 时生成草稿质量的PDF，供编辑器内预览：使用不嵌入的CID字体，各字重合用一种字体，
+    省去嵌入字体子集的开销；忽略 smart_onepage，不做按高度搜索压缩档位的一页适配；
+    各部分直接排版，不查找也不写入部分排版缓存（预览每次都在修改内容，缓存几乎不会命中）。
+    字号、行距、间距与正式导出的普通排版相同。
+    """
+    
+    # 导出结果的版本，排版或样式变化时递增，使已缓存的PDF失效
+    VERSION = 1
+    
+    _LAZY_ATTRIBUTES = ('styles', 'chinese_font', 'chinese_bold_font', 'chinese_medium_font', '_markup_converter')
+    
+    def __init__(self, draft: bool = False):
+        self.draft = draft
+        self._init_lock = threading.Lock()
+        # 压缩档位 -> 只读样式表，各请求和线程共享
+        self._optimized_styles = {}
+        # 当前线程正在进行的渲染的状态（Markdown转换结果等）
+        self._render_state = threading.local()
+        # (部分内容哈希, 样式表, 框架宽度, 智能一页) -> 已按框架宽度换行的 flowable，只读共享；草稿不缓存
+        self._section_layouts = None if draft else LRUCache(SECTION_LAYOUT_CACHE_SIZE, name='pdf_section_layouts')
         
         # A4页面配置
         self.page_width, self.page_height = A4
@@ -88,53 +251,36 @@ class ResumePDFGenerator:
         self.available_height = self.page_height - self.default_margins['top'] - self.default_margins['bottom']
         self.available_width = self.page_width - self.default_margins['left'] - self.default_margins['right']
     
-    def _register_fallback_fonts(self, fonts_dir):
-        """注册备选字体"""
-        try:
-            # 备选字体路径
-            fallback_fonts = [
-                (os.path.join(fonts_dir, 'SourceHanSansSC-Regular.otf'), 'SourceHanSans'),
-                (os.path.join(fonts_dir, 'NotoSansCJKsc-Regular.otf'), 'NotoSans'),
-                ('/System/Library/Fonts/PingFang.ttc', 'PingFang'),
-            ]
-            
-            for font_path, font_name in fallback_fonts:
-                try:
-                    if os.path.exists(font_path):
-                        print(f"尝试注册备选字体: {font_path}")
-                        if font_path.endswith('.otf'):
-                            pdfmetrics.registerFont(TTFont(font_name, font_path))
-                        else:
-                            pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=0))
-                        
-                        self.chinese_font = font_name
-                        self.chinese_bold_font = font_name  # 使用相同字体作为粗体
-                        self.chinese_medium_font = font_name
-                        print(f"成功注册备选字体: {font_name}")
-                        return
-                except Exception as e:
-                    print(f"备选字体注册失败 {font_name}: {e}")
-                    continue
+    def __getattr__(self, name):
+        """首次访问字体或样式时注册字体并创建样式"""
+        if name in ResumePDFGenerator._LAZY_ATTRIBUTES:
+            self._load_fonts()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    def _load_fonts(self):
+        """注册字体并创建样式；样式最后赋值，其他线程不会看到未创建完的样式表"""
+        with self._init_lock:
+            if 'styles' in self.__dict__:
+                return
+            fonts = register_draft_fonts() if self.draft else register_fonts()
+            self.chinese_font = fonts['regular']
+            self.chinese_bold_font = fonts['bold']
+            self.chinese_medium_font = fonts['medium']
+            self._markup_converter = MarkupConverter(self.chinese_font, self.chinese_bold_font,
+                                                     self.chinese_medium_font)
             
-            # 最后尝试CID字体
-            try:
-                pdfmetrics.registerFont(UnicodeCIDFont('HeiseiKakuGo-W5'))
-                self.chinese_font = 'HeiseiKakuGo-W5'
-                self.chinese_bold_font = 'HeiseiKakuGo-W5'
-                self.chinese_medium_font = 'HeiseiKakuGo-W5'
-                print("使用CID字体: HeiseiKakuGo-W5")
-            except:
-                print("使用默认字体: Helvetica")
-                
-        except Exception as e:
-            print(f"备选字体注册过程出错: {e}")
+            # 创建样式 - 确保在字体注册后创建
+            styles = getSampleStyleSheet()
+            self._create_modern_styles(styles)
+            self.styles = styles
     
-    def _create_modern_styles(self):
+    def _create_modern_styles(self, styles):
         """创建现代化样式"""
         # 主标题 - 姓名
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='NameTitle',
-            parent=self.styles['Title'],
+            parent=styles['Title'],
             fontName=self.chinese_bold_font,
             fontSize=28,
             textColor=HexColor('#1a1a1a'),
@@ -145,9 +291,9 @@ class ResumePDFGenerator:
         ))
         
         # 联系信息
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='ContactInfo',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_font,
             fontSize=10,
             textColor=HexColor('#666666'),
@@ -158,9 +304,9 @@ class ResumePDFGenerator:
         ))
         
         # 章节标题
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='SectionTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontName=self.chinese_medium_font,
             fontSize=14,
             textColor=HexColor('#2c3e50'),
@@ -174,9 +320,9 @@ class ResumePDFGenerator:
         ))
         
         # 正文内容
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='ModernBodyText',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_font,
             fontSize=10,
             textColor=HexColor('#333333'),
@@ -188,9 +334,9 @@ class ResumePDFGenerator:
         ))
         
         # 工作经历标题
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='JobTitle',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_medium_font,
             fontSize=11,
             textColor=HexColor('#2c3e50'),
@@ -200,9 +346,9 @@ class ResumePDFGenerator:
         ))
         
         # 公司和时间
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CompanyDate',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_font,
             fontSize=9,
             textColor=HexColor('#7f8c8d'),
@@ -212,9 +358,9 @@ class ResumePDFGenerator:
         ))
         
         # 列表项
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='BulletPoint',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_font,
             fontSize=9,
             textColor=HexColor('#444444'),
@@ -226,9 +372,9 @@ class ResumePDFGenerator:
         ))
         
         # 技能项
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='SkillItem',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontName=self.chinese_font,
             fontSize=9,
             textColor=HexColor('#444444'),
@@ -249,85 +395,14 @@ class ResumePDFGenerator:
             'compression_ratio': 1.0
         }
         
-        # 计算头部高度（姓名 + 联系信息 + 间距）
-        header_height = 0
-        personal_info = resume_data.get('personal_info', {})
-        
-        # 姓名标题高度
-        if personal_info.get('name'):
-            name_style = self.styles['NameTitle']
-            header_height += name_style.fontSize + name_style.spaceAfter
-        
-        # 联系信息高度
-        contact_items = []
-        if personal_info.get('email'):
-            contact_items.append(personal_info['email'])
-        if personal_info.get('phone'):
-            contact_items.append(personal_info['phone'])
-        if personal_info.get('address'):
-            contact_items.append(personal_info['address'])
-        
-        if contact_items:
-            contact_style = self.styles['ContactInfo']
-            header_height += contact_style.fontSize + contact_style.spaceAfter
-        
-        # 额外分隔间距
-        header_height += 10
-        
-        analysis['header_height'] = header_height
-        
-        # 计算内容区域高度
-        content_height = 0
         sections = resume_data.get('sections', [])
         analysis['sections_count'] = len(sections)
+        analysis['total_items'] = sum(len(section.get('items', [])) for section in sections)
         
-        for section in sections:
-            # 章节标题高度
-            section_title = section.get('title', '')
-            if section_title:
-                section_style = self.styles['SectionTitle']
-                content_height += (section_style.spaceBefore + 
-                                 section_style.fontSize + 
-                                 section_style.spaceAfter)
-                # 分隔线高度
-                content_height += 8 + 8  # 线条上下间距
-            
-            # 章节内容高度
-            items = section.get('items', [])
-            analysis['total_items'] += len(items)
-            
-            section_type = section.get('type', 'other')
-            
-            for item in items:
-                content = item.get('content', '')
-                if content:
-                    item_type = item.get('type', 'text')
-                    
-                    # 估算文本行数
-                    clean_content = self._clean_markdown(content)
-                    estimated_lines = self._estimate_text_lines(clean_content, self.available_width)
-                    
-                    if item_type == 'list_item':
-                        # 列表项
-                        bullet_style = self.styles['BulletPoint']
-                        item_height = (bullet_style.leading * estimated_lines + 
-                                     bullet_style.spaceBefore + bullet_style.spaceAfter)
-                    elif '|' in clean_content and section_type in ['experience', 'education', 'projects']:
-                        # 职位/教育标题
-                        job_style = self.styles['JobTitle']
-                        item_height = (job_style.leading * estimated_lines + 
-                                     job_style.spaceBefore + job_style.spaceAfter)
-                    else:
-                        # 普通文本
-                        body_style = self.styles['ModernBodyText']
-                        item_height = (body_style.leading * estimated_lines + 
-                                     body_style.spaceBefore + body_style.spaceAfter)
-                    
-                    content_height += item_height
-            
-            # 章节间距
-            content_height += 12
-        
+        header_blocks, content_blocks = self._measure_text_blocks(resume_data)
+        header_height, content_height = self._estimate_height(
+            header_blocks, content_blocks, sections, self.styles, self.available_width)
+        analysis['header_height'] = header_height
         analysis['content_height'] = content_height
         analysis['estimated_height'] = header_height + content_height
         
@@ -338,33 +413,106 @@ class ResumePDFGenerator:
         
         return analysis
     
-    def _estimate_text_lines(self, text: str, available_width: float, font_size: int = 10) -> int:
-        """估算文本需要的行数"""
-        if not text:
-            return 1
+    def _measure_text_blocks(self, resume_data: Dict[str, Any]):
+        """收集需要估算高度的文本块 (样式名, 1pt字号下的宽度)，分为头部和正文两组
         
-        # 简单估算：假设平均字符宽度为字号的0.6倍
-        char_width = font_size * 0.6
-        chars_per_line = int(available_width / char_width)
-        
-        # 按行分割处理
-        lines = text.split('\n')
-        total_lines = 0
+        候选样式只改变字号和间距、不改变字体，宽度测量一次即可用于所有候选字号。
+        """
+        header_blocks = []
+        personal_info = resume_data.get('personal_info', {})
+        if personal_info.get('name'):
+            header_blocks.append(self._measure_block('NameTitle', personal_info['name']))
+        contact_items = [personal_info[key] for key in ('email', 'phone', 'address') if personal_info.get(key)]
+        if contact_items:
+            header_blocks.append(self._measure_block('ContactInfo', ' • '.join(contact_items)))
         
-        for line in lines:
-            if len(line) <= chars_per_line:
-                total_lines += 1
+        content_blocks = []
+        for section in resume_data.get('sections', []):
+            if section.get('title'):
+                content_blocks.append(self._measure_block('SectionTitle', section['title'].upper()))
+            
+            section_type = section.get('type', 'other')
+            items = section.get('items', [])
+            if section_type in ENTRY_SECTION_TYPES:
+                # 经历类部分按解析时提取的条目记录估算
+                blocks = [block for entry in section_entries(section) for block in self._entry_blocks(entry)]
+            elif section_type == 'skills':
+                blocks = [('SkillItem', item['content']) for item in items if item.get('content')]
             else:
-                # 需要换行
-                total_lines += math.ceil(len(line) / chars_per_line)
+                blocks = [('BulletPoint' if item.get('type') == 'list_item' else 'ModernBodyText', item['content'])
+                          for item in items if item.get('content')]
+            content_blocks.extend(self._measure_block(style_name, content) for style_name, content in blocks)
         
-        return max(1, total_lines)
+        return header_blocks, content_blocks
     
-    def _create_optimized_styles(self, compression_ratio: float):
-        """根据压缩比例创建优化的样式"""
-        # 确保压缩比例在合理范围内
-        compression_ratio = max(0.55, min(1.0, compression_ratio))
+    def _measure_block(self, style_name: str, text: str):
+        """按样式字体测量一段文本；段落中的换行和空白与 Paragraph 一样按单个空格处理"""
+        plain = html.unescape(MARKUP_TAG_PATTERN.sub('', self._clean_markdown(text)))
+        if style_name in ('BulletPoint', 'SkillItem'):
+            plain = f"• {plain}"
+        table = glyph_width_table(self.styles[style_name].fontName)
+        return style_name, table.text_width(' '.join(plain.split()))
+    
+    def _estimate_height(self, header_blocks, content_blocks, sections, styles, available_width: float):
+        """按给定样式估算头部和正文高度，返回 (头部高度, 正文高度)"""
+        def blocks_height(blocks):
+            height = 0
+            for style_name, unit_width in blocks:
+                style = styles[style_name]
+                line_width = available_width - style.leftIndent - style.rightIndent
+                lines = count_lines((unit_width,), style.fontSize, line_width)
+                height += style.leading * lines + style.spaceBefore + style.spaceAfter
+            return height
+        
+        # 头部下方的分隔间距；每个章节的分隔线（线条上下间距）和章节间距
+        header_height = blocks_height(header_blocks) + 10
+        content_height = (blocks_height(content_blocks)
+                          + sum(8 + 8 for section in sections if section.get('title'))
+                          + 12 * len(sections))
+        return header_height, content_height
+    
+    def _estimate_fit_ratio(self, resume_data: Dict[str, Any]) -> float:
+        """从大到小估算各压缩档位下的高度，返回估计能放进一页的最大档位比例
+        
+        文本宽度只测量一次，每个档位只需按字号缩放计算行数。
+        """
+        with phase('analysis'):
+            header_blocks, content_blocks = self._measure_text_blocks(resume_data)
+            sections = resume_data.get('sections', [])
+            for ratio in reversed(ONEPAGE_RATIO_LEVELS):
+                frame_width, frame_height = self._frame_size(self._optimized_margins(ratio))
+                header_height, content_height = self._estimate_height(
+                    header_blocks, content_blocks, sections, self._create_optimized_styles(ratio), frame_width)
+                if header_height + content_height <= frame_height:
+                    return ratio
+            return ONEPAGE_MIN_RATIO
+    
+    def _estimate_text_lines(self, text: str, available_width: float, font_size: int = 10,
+                             font_name: Optional[str] = None) -> int:
+        """估算文本需要的行数（按字体的实际字形宽度，每个换行单独计行）"""
+        if not text:
+            return 1
         
+        table = glyph_width_table(font_name or self.chinese_font)
+        return max(1, count_lines(map(table.text_width, text.split('\n')), font_size, available_width))
+    
+    def _create_optimized_styles(self, compression_ratio: float):
+        """根据压缩比例返回优化的样式
+        
+        比例向下取到 ONEPAGE_RATIO_LEVELS 中的档位，每个档位的样式表只创建一次并缓存；
+        返回的样式表是只读映射，调用方不能修改其中的样式。
+        """
+        level = ratio_level(compression_ratio)
+        styles = self._optimized_styles.get(level)
+        if styles is None:
+            with phase('styles'):
+                # 并发时可能重复创建，setdefault 保证所有线程拿到同一份
+                styles = self._optimized_styles.setdefault(
+                    level, MappingProxyType(self._build_optimized_styles(ONEPAGE_RATIO_LEVELS[level]).byName))
+        return styles
+    
+    def _build_optimized_styles(self, compression_ratio: float):
+        """按压缩比例创建优化的样式表"""
         # 更激进的压缩策略
         if compression_ratio < 0.75:
             # 需要大幅压缩
@@ -501,39 +649,36 @@ class ResumePDFGenerator:
     def generate_pdf(self, resume_data: Dict[str, Any], smart_onepage: bool = False) -> bytes:
         """生成现代化PDF简历"""
         buffer = io.BytesIO()
-        
-        # 智能一页模式处理
-        current_styles = self.styles
-        margins = self.default_margins.copy()
+        self.write_pdf(resume_data, buffer, smart_onepage)
+        with phase('output'):
+            return buffer.getvalue()
+    
+    def write_pdf(self, resume_data: Dict[str, Any], output, smart_onepage: bool = False):
+        """生成PDF直接写入文件路径或二进制文件对象，导出接口用它写入缓存文件，不再经过 bytes 中转"""
+        self._render_state.markup = {}
+        try:
+            self._render_pdf(resume_data, output, smart_onepage and not self.draft)
+        finally:
+            self._render_state.markup = None
+    
+    def _render_pdf(self, resume_data: Dict[str, Any], output, smart_onepage: bool = False):
+        """排版并写出PDF"""
+        # 首次渲染时注册字体并创建样式
+        with phase('styles'):
+            base_styles = self.styles
         
         if smart_onepage:
             print("启用智能一页模式")
-            # 分析内容需求
-            analysis = self._analyze_content_requirements(resume_data)
-            print(f"内容分析: 预估高度 {analysis['estimated_height']:.1f}pt, 可用高度 {self.available_height:.1f}pt")
-            
-            if analysis['requires_compression']:
-                compression_ratio = analysis['compression_ratio']
-                print(f"需要压缩，压缩比例: {compression_ratio:.2f}")
-                
-                # 使用优化的样式
-                current_styles = self._create_optimized_styles(compression_ratio)
-                
-                # 优化边距（适度减少）
-                margin_reduction = max(0.8, compression_ratio + 0.15)
-                margins = {
-                    'top': int(self.default_margins['top'] * margin_reduction),
-                    'bottom': int(self.default_margins['bottom'] * margin_reduction),
-                    'left': int(self.default_margins['left'] * margin_reduction),
-                    'right': int(self.default_margins['right'] * margin_reduction)
-                }
-                print(f"优化边距: 上下 {margins['top']}pt, 左右 {margins['left']}pt")
-            else:
-                print("内容适合一页，无需压缩")
+            # 测量实际排版高度确定样式和边距，文档只构建一次
+            current_styles, margins, story = self._fit_to_one_page(resume_data)
+        else:
+            current_styles = base_styles
+            margins = self.default_margins.copy()
+            story = self._build_story(resume_data, current_styles, smart_onepage, self._frame_size(margins)[0])
         
         # 创建PDF文档
         doc = SimpleDocTemplate(
-            buffer,
+            output,
             pagesize=A4,
             rightMargin=margins['right'],
             leftMargin=margins['left'],
@@ -541,23 +686,116 @@ class ResumePDFGenerator:
             bottomMargin=margins['bottom']
         )
         
-        # 构建文档内容
-        story = []
-        
-        # 添加头部（姓名和联系信息）
-        self._add_modern_header(story, resume_data, current_styles, smart_onepage)
-        
-        # 添加各个部分（使用新的布局）
-        self._add_modern_sections(story, resume_data, current_styles, smart_onepage)
-        
-        # 构建PDF
-        doc.build(story)
-        
-        # 获取PDF数据
-        pdf_data = buffer.getvalue()
-        buffer.close()
+        # 构建PDF，序列化并写出文件单独计为 output
+        doc._doSave = 0
+        with phase('build'):
+            doc.build(story)
+        with phase('output'):
+            doc.canv.save()
+    
+    def _build_story(self, resume_data: Dict[str, Any], styles, smart_onepage: bool = False,
+                     frame_width: Optional[float] = None):
+        """构建文档内容：头部（姓名和联系信息）和各个部分，frame_width 为正文框架的可用宽度"""
+        if frame_width is None:
+            frame_width = self._frame_size(self.default_margins)[0]
+        with phase('story'):
+            story = []
+            self._add_modern_header(story, resume_data, styles, smart_onepage)
+            self._add_modern_sections(story, resume_data, styles, smart_onepage, frame_width)
+            return story
+    
+    def _optimized_margins(self, compression_ratio: float) -> Dict[str, int]:
+        """根据压缩比例适度减少边距（不超过默认边距）"""
+        margin_reduction = min(1.0, max(0.8, compression_ratio + 0.15))
+        return {side: int(margin * margin_reduction) for side, margin in self.default_margins.items()}
+    
+    def _frame_size(self, margins: Dict[str, int]) -> Tuple[float, float]:
+        """SimpleDocTemplate 正文框架的可用宽高（Frame 四周各有6pt内边距）"""
+        return (self.page_width - margins['left'] - margins['right'] - 2 * FRAME_PADDING,
+                self.page_height - margins['top'] - margins['bottom'] - 2 * FRAME_PADDING)
+    
+    def _measure_story(self, story, frame_width: float, frame_height: float) -> float:
+        """用 wrap() 测量内容实际占用的高度，段前/段后间距的合并方式与 Frame._add 相同
+        
+        超过 frame_height 后立即返回，此时返回值只保证大于 frame_height。
+        """
+        with phase('analysis'):
+            height = 0
+            space_after = 0
+            for flowable in story:
+                space_before = 0
+                if height:
+                    space_before = flowable.getSpaceBefore()
+                    if rl_config.overlapAttachedSpace:
+                        space_before = max(space_before - space_after, 0)
+                _, flowable_height = flowable.wrap(frame_width, frame_height)
+                height += space_before + flowable_height
+                if height > frame_height + LAYOUT_TOLERANCE:
+                    return height
+                space_after = flowable.getSpaceAfter()
+                height += space_after
+            return height - space_after
+    
+    def _layout_onepage(self, resume_data: Dict[str, Any], styles, margins: Dict[str, int]):
+        """按给定样式和边距构建内容并测量，返回 (story, 实际高度, 是否能放进一页)"""
+        frame_width, frame_height = self._frame_size(margins)
+        story = self._build_story(resume_data, styles, smart_onepage=True, frame_width=frame_width)
+        height = self._measure_story(story, frame_width, frame_height)
+        return story, height, height <= frame_height + LAYOUT_TOLERANCE
+    
+    def _fit_to_one_page(self, resume_data: Dict[str, Any]):
+        """智能一页：在压缩档位上二分查找，取能放进一页的最大档位
         
-        return pdf_data
+        每一轮都用 wrap() 测量实际高度而不是估算，最多排版
+        ONEPAGE_SEARCH_STEPS + 2 轮；最小档位仍然放不下时整体缩放内容，保证只有一页。
+        返回 (样式, 边距, story)。
+        """
+        margins = self.default_margins.copy()
+        story, height, fits = self._layout_onepage(resume_data, self.styles, margins)
+        print(f"内容测量: 实际高度 {height:.1f}pt, 可用高度 {self._frame_size(margins)[1]:.1f}pt")
+        if fits:
+            print("内容适合一页，无需压缩")
+            return self.styles, margins, story
+        
+        # low 为已知能放下的最大档位，high 为已知放不下的最小档位；
+        # 用宽度表估算的档位作为第一次尝试，通常能减少查找轮数
+        low, high = -1, len(ONEPAGE_RATIO_LEVELS)
+        level = ratio_level(self._estimate_fit_ratio(resume_data))
+        best = None
+        passes = 1
+        for _ in range(ONEPAGE_SEARCH_STEPS):
+            ratio = ONEPAGE_RATIO_LEVELS[level]
+            styles = self._create_optimized_styles(ratio)
+            margins = self._optimized_margins(ratio)
+            story, height, fits = self._layout_onepage(resume_data, styles, margins)
+            passes += 1
+            if fits:
+                best = (ratio, styles, margins, story)
+                low = level
+            else:
+                high = level
+            if high - low <= 1:
+                break
+            level = (low + high) // 2
+        
+        if best is None and high > 0:
+            # 查找过程没有尝试到最小档位
+            styles = self._create_optimized_styles(ONEPAGE_MIN_RATIO)
+            margins = self._optimized_margins(ONEPAGE_MIN_RATIO)
+            story, height, fits = self._layout_onepage(resume_data, styles, margins)
+            passes += 1
+            if fits:
+                best = (ONEPAGE_MIN_RATIO, styles, margins, story)
+        
+        if best is None:
+            # 最小字号仍然放不下：整体缩放内容
+            print(f"最小压缩比例仍超出一页（{passes} 轮排版），整体缩放内容")
+            frame_width, frame_height = self._frame_size(margins)
+            return styles, margins, [KeepInFrame(frame_width, frame_height, story, mode='shrink')]
+        
+        ratio, styles, margins, story = best
+        print(f"压缩比例: {ratio:.3f}（{passes} 轮排版）, 边距: 上下 {margins['top']}pt, 左右 {margins['left']}pt")
+        return styles, margins, story
     
     def _add_modern_header(self, story, resume_data: Dict[str, Any], styles, smart_onepage: bool = False):
         """添加现代化头部信息"""
@@ -567,7 +805,7 @@ class ResumePDFGenerator:
         name = personal_info.get('name', '简历')
         # 清理姓名中的markdown符号
         name = self._clean_markdown(name)
-        title_para = Paragraph(name, styles['NameTitle'])
+        title_para = LayoutParagraph(name, styles['NameTitle'])
         story.append(title_para)
         
         # 联系信息 - 简洁布局
@@ -584,89 +822,115 @@ class ResumePDFGenerator:
         
         if contact_items:
             contact_text = ' • '.join(contact_items)
-            contact_para = Paragraph(contact_text, styles['ContactInfo'])
+            contact_para = LayoutParagraph(contact_text, styles['ContactInfo'])
             story.append(contact_para)
         
         # 分隔线（智能一页模式下大幅减少间距）
         spacer_height = 3 if smart_onepage else 10
         story.append(Spacer(1, spacer_height))
     
-    def _add_modern_sections(self, story, resume_data: Dict[str, Any], styles, smart_onepage: bool = False):
-        """添加现代化的各个部分"""
+    def _add_modern_sections(self, story, resume_data: Dict[str, Any], styles, smart_onepage: bool = False,
+                             frame_width: Optional[float] = None):
+        """添加现代化的各个部分
+        
+        每个部分的 flowable 按 (内容哈希, 样式表, 框架宽度, 智能一页) 缓存，并在写入缓存前按框架宽度换行；
+        只修改了一个部分再次导出时，其余部分直接复用已换行的段落。缓存中的 flowable 只读，
+        排版会修改 flowable 的属性，这里放入 story 的是浅拷贝，共享的断行结果由 LayoutParagraph
+        在需要修改前复制。内容哈希使用解析时计算的值，只有客户端提供的数据才现算。
+        """
         sections = resume_data.get('sections', [])
+        if self._section_layouts is None:
+            for section in sections:
+                self._add_modern_section(story, section, styles, smart_onepage)
+            return
+        trusted = resume_data.get('parser_version') == PARSER_VERSION
+        if frame_width is None:
+            frame_width = self._frame_size(self.default_margins)[0]
+        # 样式表创建后不再替换，在生成器的生命周期内 id 不变
+        styles_id = id(styles)
+        
+        for section in sections:
+            key = (section_layout_hash(section, trusted), styles_id, round(frame_width, 3), smart_onepage)
+            flowables = self._section_layouts.get(key)
+            if flowables is None:
+                flowables = []
+                self._add_modern_section(flowables, section, styles, smart_onepage)
+                for flowable in flowables:
+                    if isinstance(flowable, LayoutParagraph):
+                        flowable.wrap(frame_width, self.page_height)
+                self._section_layouts.put(key, flowables)
+            story.extend(copy.copy(flowable) for flowable in flowables)
+    
+    def _add_modern_section(self, story, section: Dict[str, Any], styles, smart_onepage: bool = False):
+        """添加一个部分：分隔线、标题、内容和部分间距"""
         # 动态计算文档宽度（考虑边距变化）
         margins = self.default_margins if not smart_onepage else {'left': 48, 'right': 48}
         doc_width = A4[0] - margins['left'] - margins['right']
         
-        for section in sections:
-            # 部分标题
-            section_title = section.get('title', '')
-            if section_title:
-                # 清理markdown符号
-                clean_title = self._clean_markdown(section_title)
-                
-                # 添加分隔线
-                line_table = Table([['']], colWidths=[doc_width])
-                line_table.setStyle(TableStyle([
-                    ('LINEBELOW', (0, 0), (-1, -1), 1, HexColor('#3498db')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]))
-                story.append(line_table)
-                
-                # 智能一页模式下大幅减少间距
-                spacer_height = 3 if smart_onepage else 8
-                story.append(Spacer(1, spacer_height))
-                
-                # 章节标题
-                title_para = Paragraph(clean_title.upper(), styles['SectionTitle'])
-                story.append(title_para)
+        # 部分标题
+        section_title = section.get('title', '')
+        if section_title:
+            # 清理markdown符号
+            clean_title = self._clean_markdown(section_title)
             
-            # 部分内容
-            section_type = section.get('type', 'other')
-            items = section.get('items', [])
-            
-            if section_type == 'skills':
-                self._add_modern_skills_section(story, items, styles)
-            elif section_type in ['experience', 'education', 'projects']:
-                self._add_modern_structured_section(story, items, section_type, styles)
-            else:
-                self._add_modern_generic_section(story, items, styles)
+            # 添加分隔线
+            line_table = Table([['']], colWidths=[doc_width])
+            line_table.setStyle(TableStyle([
+                ('LINEBELOW', (0, 0), (-1, -1), 1, HexColor('#3498db')),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ]))
+            story.append(line_table)
             
-            # 章节间距（智能一页模式下大幅减少）
-            section_spacer = 4 if smart_onepage else 12
-            story.append(Spacer(1, section_spacer))
+            # 智能一页模式下大幅减少间距
+            spacer_height = 3 if smart_onepage else 8
+            story.append(Spacer(1, spacer_height))
             
+            # 章节标题
+            title_para = LayoutParagraph(clean_title.upper(), styles['SectionTitle'])
+            story.append(title_para)
+        
+        # 部分内容
+        section_type = section.get('type', 'other')
+        items = section.get('items', [])
+        
+        if section_type == 'skills':
+            self._add_modern_skills_section(story, items, styles)
+        elif section_type in ENTRY_SECTION_TYPES:
+            self._add_modern_structured_section(story, section, styles)
+        else:
+            self._add_modern_generic_section(story, items, styles)
+        
+        # 章节间距（智能一页模式下大幅减少）
+        section_spacer = 4 if smart_onepage else 12
+        story.append(Spacer(1, section_spacer))
+    
     def _add_modern_skills_section(self, story, items, styles):
         """添加现代化技能部分"""
         for item in items:
             content = item.get('content', '')
             if content:
                 clean_content = self._clean_markdown(content)
-                skill_para = Paragraph(f"• {clean_content}", styles['SkillItem'])
+                skill_para = LayoutParagraph(f"• {clean_content}", styles['SkillItem'])
                 story.append(skill_para)
     
-    def _add_modern_structured_section(self, story, items, section_type, styles):
-        """添加现代化结构化部分（经历、教育等）"""
-        for item in items:
-            content = item.get('content', '')
-            if content:
+    def _entry_blocks(self, entry: Dict[str, Any]):
+        """条目记录对应的 (样式名, 文本) 序列：标题行、描述段落、要点"""
+        heading = ' | '.join(part for part in (entry['title'], entry['organization'], entry['date_range']) if part)
+        if heading:
+            yield 'JobTitle', heading
+        for paragraph in entry['description']:
+            yield 'ModernBodyText', paragraph
+        for bullet in entry['bullets']:
+            yield 'BulletPoint', bullet
+    
+    def _add_modern_structured_section(self, story, section, styles):
+        """添加现代化结构化部分（经历、教育等），直接使用解析时提取的条目记录"""
+        for entry in section_entries(section):
+            for style_name, content in self._entry_blocks(entry):
                 clean_content = self._clean_markdown(content)
-                
-                if item.get('type') == 'list_item':
-                    # 列表项
-                    list_para = Paragraph(f"• {clean_content}", styles['BulletPoint'])
-                    story.append(list_para)
-                else:
-                    # 段落内容
-                    # 检查是否是职位/标题行（包含 | 符号）
-                    if '|' in clean_content and section_type in ['experience', 'education', 'projects']:
-                        # 这是一个职位或教育标题行
-                        job_para = Paragraph(clean_content, styles['JobTitle'])
-                        story.append(job_para)
-                    else:
-                        # 普通段落
-                        para = Paragraph(clean_content, styles['ModernBodyText'])
-                        story.append(para)
+                if style_name == 'BulletPoint':
+                    clean_content = f"• {clean_content}"
+                story.append(LayoutParagraph(clean_content, styles[style_name]))
     
     def _add_modern_generic_section(self, story, items, styles):
         """添加现代化通用部分"""
@@ -676,10 +940,10 @@ class ResumePDFGenerator:
                 clean_content = self._clean_markdown(content)
                 
                 if item.get('type') == 'list_item':
-                    list_para = Paragraph(f"• {clean_content}", styles['BulletPoint'])
+                    list_para = LayoutParagraph(f"• {clean_content}", styles['BulletPoint'])
                     story.append(list_para)
                 else:
-                    para = Paragraph(clean_content, styles['ModernBodyText'])
+                    para = LayoutParagraph(clean_content, styles['ModernBodyText'])
                     story.append(para)
     
     def _add_skills_section(self, story, items):
@@ -718,47 +982,14 @@ class ResumePDFGenerator:
                     story.append(para)
     
     def _clean_markdown(self, text: str) -> str:
-        """清理Markdown标记，保留加粗、斜体等格式效果"""
-        if not text:
-            return ""
-        
-        # 移除标题标记 (#)
-        text = re.sub(r'^#+\s*', '', text, flags=re.MULTILINE)
-        
-        # 转换粗体标记 - 使用简单的font标签
-        text = re.sub(r'\*\*(.*?)\*\*', rf'<font name="{self.chinese_bold_font}">\1</font>', text)
-        
-        # 转换斜体标记 - 使用中等字体，简单格式
-        text = re.sub(r'(?<!\*)\*([^*]+?)\*(?!\*)', rf'<font name="{self.chinese_medium_font}">\1</font>', text)
-        
-        # 转换下划线斜体标记
-        text = re.sub(r'_([^_]+?)_', rf'<font name="{self.chinese_medium_font}">\1</font>', text)
-        
-        # 转换代码标记 - 使用背景色区分代码
-        text = re.sub(r'`([^`]+?)`', rf'<font name="{self.chinese_font}" backColor="#f5f5f5">\1</font>', text)
-        
-        # 移除链接标记，保留文本
-        text = re.sub(r'\[([^\]]+?)\]\([^)]*?\)', r'\1', text)
-        
-        # 移除列表标记但保留缩进
-        text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除数字列表标记
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除水平分隔线
-        text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
-        
-        # 移除块引用标记
-        text = re.sub(r'^>\s*', '', text, flags=re.MULTILINE)
-        
-        # 清理多余的空行
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
-        
-        # 清理行首标点符号问题 - 移除行首多余的标点符号
-        text = re.sub(r'^[，。；：！？、]+', '', text, flags=re.MULTILINE)
-        
-        # 移除行首行尾空白
-        text = text.strip()
-        
-        return text
\ No newline at end of file
+        """清理Markdown标记，保留加粗、斜体等格式效果
+        
+        渲染过程中同一段文本只转换一次：估算、各轮排版测量和最终构建共用本次渲染的转换结果。
+        """
+        memo = getattr(self._render_state, 'markup', None)
+        if memo is None:
+            return self._markup_converter.convert(text)
+        markup = memo.get(text)
+        if markup is None:
+            markup = memo[text] = self._markup_converter.convert(text)
+        return markup
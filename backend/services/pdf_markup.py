@@ -0,0 +1,73 @@
+"""
+Markdown 到 ReportLab 段落标记的转换
+
+原先的 _clean_markdown 对每段文本依次执行 13 次 re.sub，每次都用 f-string 拼出
+模式和替换串，PDF 生成的估算和排版阶段会对同一段文本重复调用。这里把所有规则
+合并成一个预编译的正则，按从左到右一次扫描输出 <font> 标记：
+
+- 行首标记（标题 #、列表 -*+、数字列表、引用 >、行首中文标点）按原先的顺序去除
+- 单独一行的水平分隔线 --- 去除，三个及以上的连续换行合并为一个空行
+- **粗体**、*斜体*、_斜体_、`代码` 转换为对应字体，[文本](链接) 只保留文本；
+  强调内部的标记递归转换
+
+行首标记只匹配空格和制表符，不会像原先的 \\s* 那样跨行吞掉空行；多行的 * 列表不会
+再被当作跨行斜体。首尾紧贴的强调标记（如 **a***b*）按从左到右的顺序匹配，结果可能与
+原先逐条替换不同，原先的结果本身也是错误嵌套的标签。
+"""
+
+import re
+from typing import Dict
+
+# 同一位置的分支按顺序尝试：分隔线优先于行首标记，粗体优先于斜体
+_INLINE_RULES = r'''
+    \*\*(?P<bold>.*?)\*\*
+  | (?<!\*)\*(?P<italic>[^*]+?)\*(?!\*)
+  | _(?P<underscore>[^_]+?)_
+  | `(?P<code>[^`]+?)`
+  | \[(?P<link>[^\]]+?)\]\([^)]*?\)
+'''
+
+MARKUP_TOKEN_PATTERN = re.compile(r'''
+    (?P<rule>^---+$)
+  | (?P<prefix>^(?:\#+[ \t]*)?(?:[ \t]*[-*+][ \t]+)?(?:[ \t]*\d+\.[ \t]+)?(?:>[ \t]*)?[，。；：！？、]*)
+  | (?P<blank>\n(?:[ \t]*\n){2,})
+  | ''' + _INLINE_RULES, re.MULTILINE | re.VERBOSE)
+
+INLINE_TOKEN_PATTERN = re.compile(_INLINE_RULES, re.VERBOSE)
+
+# 强调内部不含这些字符时无需递归
+_INLINE_MARKERS = re.compile(r'[*_`\[]')
+
+
+class MarkupConverter:
+    """按给定字体把Markdown文本转换为 ReportLab Paragraph 可用的标记"""
+
+    def __init__(self, regular_font: str, bold_font: str, medium_font: str):
+        self._open_tags: Dict[str, str] = {
+            'bold': f'<font name="{bold_font}">',
+            'italic': f'<font name="{medium_font}">',
+            'underscore': f'<font name="{medium_font}">',
+            'code': f'<font name="{regular_font}" backColor="#f5f5f5">',
+        }
+
+    def convert(self, text: str) -> str:
+        """转换一段文本，结果去除首尾空白"""
+        if not text:
+            return ""
+        return MARKUP_TOKEN_PATTERN.sub(self._replace, text).strip()
+
+    def _replace(self, match) -> str:
+        kind = match.lastgroup
+        if kind in ('rule', 'prefix'):
+            return ''
+        if kind == 'blank':
+            return '\n\n'
+        return self._wrap(kind, match.group(kind))
+
+    def _wrap(self, kind: str, inner: str) -> str:
+        """转换强调内部的标记并加上对应字体"""
+        if _INLINE_MARKERS.search(inner):
+            inner = INLINE_TOKEN_PATTERN.sub(self._replace, inner)
+        if kind == 'link':
+            return inner
+        return f'{self._open_tags[kind]}{inner}</font>'
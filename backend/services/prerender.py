@@ -0,0 +1,128 @@
+"""
+保存后的后台预渲染
+
+简历创建或更新后，第一次导出总要付出完整的渲染耗时。开启 PRERENDER_ENABLED 后，每次
+内容变化都会安排一次延迟的后台渲染，把默认的导出版本提前写入PDF磁盘缓存，用户下载时
+直接命中。编辑器自动保存会在短时间内连续触发更新：同一份简历在 PRERENDER_DEBOUNCE_SECONDS
+内的多次变化只保留最后一次，合并为一次渲染。
+
+预渲染在单个后台线程中逐个执行，与导出请求共用渲染进程池；进程池繁忙时直接跳过，
+不与用户请求争抢。
+"""
+
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from services.pdf_cache import pdf_artifact_cache
+from services.render_pool import RenderPoolBusy
+
+# (缓存键, 生成器, 智能一页)
+PreRenderVariant = Tuple[str, str, bool]
+
+
+def parse_variants(spec: str) -> List[Tuple[str, bool]]:
+    """解析 PRERENDER_VARIANTS，如 'reportlab,reportlab+onepage' -> [('reportlab', False), ('reportlab', True)]"""
+    variants = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, option = part.partition('+')
+        variants.append((name.strip(), option.strip() == 'onepage'))
+    return variants
+
+
+class PreRenderScheduler:
+    """按简历去抖的后台预渲染（线程安全）"""
+
+    def __init__(self, enabled: bool = False, debounce_seconds: float = 3.0,
+                 variants: List[Tuple[str, bool]] = None):
+        self.enabled = enabled
+        self.debounce_seconds = debounce_seconds
+        self.variants = variants if variants is not None else [('reportlab', False)]
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Tuple[float, Dict[str, Any], List[PreRenderVariant], Callable]] = {}
+        self._thread = None
+        self.scheduled = 0
+        self.coalesced = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def schedule(self, resume_id: int, structured_data: Dict[str, Any], variants: List[PreRenderVariant],
+                 render: Callable[[str, Dict[str, Any], bool, str], None]):
+        """安排预渲染，去抖时间内同一简历的再次变化会替换尚未执行的任务
+
+        render(生成器, 数据, 智能一页, 输出路径) 负责把PDF写入输出路径。
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            if resume_id in self._pending:
+                self.coalesced += 1
+            self.scheduled += 1
+            self._pending[resume_id] = (time.monotonic() + self.debounce_seconds, structured_data, variants, render)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pdf-prerender', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _next_due(self):
+        """等待并取出最早到期的任务"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due_id = min(self._pending, key=lambda rid: self._pending[rid][0], default=None)
+                if due_id is not None and self._pending[due_id][0] <= now:
+                    return self._pending.pop(due_id)
+                self._cond.wait(self._pending[due_id][0] - now if due_id is not None else None)
+
+    def _run(self):
+        while True:
+            _, structured_data, variants, render = self._next_due()
+            for artifact_key, generator_name, smart_onepage in variants:
+                self._render_variant(artifact_key, generator_name, smart_onepage, structured_data, render)
+
+    def _render_variant(self, artifact_key, generator_name, smart_onepage, structured_data, render):
+        if pdf_artifact_cache.get(artifact_key) is not None:
+            with self._cond:
+                self.skipped += 1
+            return
+        try:
+            pdf_artifact_cache.store(artifact_key,
+                                     lambda path: render(generator_name, structured_data, smart_onepage, path))
+        except RenderPoolBusy:
+            with self._cond:
+                self.skipped += 1
+            return
+        except Exception as e:
+            print(f"预渲染失败 ({generator_name}, 智能一页={smart_onepage}): {e}")
+            with self._cond:
+                self.failed += 1
+            return
+        with self._cond:
+            self.rendered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回预渲染统计信息"""
+        with self._cond:
+            return {
+                'name': 'prerender',
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'scheduled': self.scheduled,
+                'coalesced': self.coalesced,
+                'rendered': self.rendered,
+                'skipped': self.skipped,
+                'failed': self.failed
+            }
+
+
+# 保存简历时共享的预渲染调度器，PRERENDER_ENABLED=1 时开启
+prerender_scheduler = PreRenderScheduler(
+    enabled=os.getenv('PRERENDER_ENABLED', '0').lower() in ('1', 'true'),
+    debounce_seconds=float(os.getenv('PRERENDER_DEBOUNCE_SECONDS', '3')),
+    variants=parse_variants(os.getenv('PRERENDER_VARIANTS', 'reportlab,reportlab+onepage'))
+)
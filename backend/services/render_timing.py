@@ -0,0 +1,151 @@
+"""
+PDF渲染分阶段计时
+
+导出耗时由多个阶段组成：内容分析（智能一页的估算和排版测量）、样式创建、构建 story、
+doc.build、wkhtmltopdf 子进程或浏览器、PDF字节输出，以及等待渲染进程和进程间通信。
+生成器在各阶段外包一层 phase(名称)，耗时记到当前线程正在收集的 RenderTimings 上；
+没有在收集时 phase() 不做任何事。
+
+阶段可以嵌套，每个阶段只记自身耗时（减去内部阶段），各阶段之和等于被计时的总耗时。
+导出接口把结果放进 Server-Timing 响应头，同时累计到进程内的直方图，
+管理员可从 /api/debug/render-timings 以 JSON 或 Prometheus 文本格式读取。
+"""
+
+import time
+import bisect
+import threading
+import contextlib
+from typing import Dict, Iterator, Optional, Tuple
+
+# 直方图的桶上限（秒）
+TIMING_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = threading.local()
+
+
+class RenderTimings:
+    """一次渲染各阶段的耗时（秒），按首次出现的顺序排列"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.total = 0.0
+        self._stack = []  # [阶段名, 开始时间, 内部阶段耗时]
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def merge(self, phases: Dict[str, float]):
+        """并入其他线程或渲染进程记录的阶段耗时"""
+        for name, seconds in phases.items():
+            self.add(name, seconds)
+        if self._stack:
+            self._stack[-1][2] += sum(phases.values())
+
+    def server_timing(self) -> str:
+        """Server-Timing 响应头的值，耗时单位为毫秒"""
+        metrics = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.phases.items()]
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def current_timings() -> Optional[RenderTimings]:
+    return getattr(_current, 'timings', None)
+
+
+@contextlib.contextmanager
+def collect_timings() -> Iterator[RenderTimings]:
+    """在当前线程收集阶段耗时；嵌套收集时，结束后并入外层"""
+    outer = current_timings()
+    timings = RenderTimings()
+    _current.timings = timings
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - start
+        _current.timings = outer
+        if outer is not None:
+            outer.merge(timings.phases)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """记录一个阶段的耗时，不含其中嵌套的其他阶段"""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    timings._stack.append(frame)
+    try:
+        yield
+    finally:
+        timings._stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        timings.add(name, elapsed - frame[2])
+        if timings._stack:
+            timings._stack[-1][2] += elapsed
+
+
+class RenderHistogram:
+    """按 (生成器, 阶段) 累计的耗时直方图（线程安全）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = TIMING_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # (生成器, 阶段) -> [各桶计数（最后一个为 +Inf）, 次数, 总耗时]
+        self._series: Dict[Tuple[str, str], list] = {}
+
+    def observe(self, generator_name: str, timings: RenderTimings):
+        """记录一次渲染，总耗时以 total 阶段记录"""
+        with self._lock:
+            for name, seconds in list(timings.phases.items()) + [('total', timings.total)]:
+                series = self._series.get((generator_name, name))
+                if series is None:
+                    series = self._series[(generator_name, name)] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+                series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+                series[1] += 1
+                series[2] += seconds
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted((key, list(counts), count, total) for key, (counts, count, total) in self._series.items())
+
+    def stats(self) -> Dict[str, Dict[str, Dict]]:
+        """{生成器: {阶段: {count, sum, mean_ms, buckets: {上限: 累计次数}}}}"""
+        result = {}
+        for (generator_name, name), counts, count, total in self._snapshot():
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+            result.setdefault(generator_name, {})[name] = {
+                'count': count,
+                'sum': round(total, 6),
+                'mean_ms': round(total / count * 1000, 2) if count else 0,
+                'buckets': buckets
+            }
+        return result
+
+    def prometheus(self, metric: str = 'pdf_render_phase_seconds') -> str:
+        """Prometheus 文本格式"""
+        lines = [f'# HELP {metric} PDF渲染各阶段耗时', f'# TYPE {metric} histogram']
+        for (generator_name, name), counts, count, total in self._snapshot():
+            labels = f'generator="{generator_name}",phase="{name}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+# 导出接口共享的渲染耗时直方图
+render_histogram = RenderHistogram()
@@ -0,0 +1,122 @@
+"""
+简历部分类型分类器
+
+关键词表按类型优先级排列，编译为一条前缀树形式的前瞻正则：标题中每个位置只按字符
+向下匹配一次，分类耗时只与标题长度有关，不随类型和语言的增加而增长。
+可通过环境变量 SECTION_KEYWORDS_FILE 指定 JSON 文件覆盖默认关键词表，格式为
+[["education", ["教育", "education"]], ...]，列表顺序即优先级。
+"""
+
+import os
+import re
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+from services.lru_cache import LRUCache
+
+# (类型, 关键词) 按优先级排列：标题同时命中多个类型时取排在前面的类型
+SECTION_TYPE_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('education', (
+        '教育', '学历', 'education', 'academic',
+        '学歴',  # 日文
+        '학력', '교육',  # 韩文
+    )),
+    ('experience', (
+        '工作', '经历', '职业', 'experience', 'work', 'employment',
+        '職歴', '経歴', '職務',
+        '경력', '경험',
+    )),
+    ('skills', (
+        '技能', 'skills', '专业技能', 'skill', 'expertise',
+        'スキル', '技術',
+        '기술', '스킬',
+    )),
+    ('projects', (
+        '项目', 'projects', '项目经验', 'project',
+        'プロジェクト',
+        '프로젝트',
+    )),
+    ('certificates', (
+        '证书', '认证', 'certificates', 'certificate', 'certification',
+        '資格', '免許',
+        '자격',
+    )),
+)
+
+DEFAULT_SECTION_TYPE = 'other'
+
+
+def load_section_keywords() -> Sequence[Tuple[str, Sequence[str]]]:
+    """读取关键词表，未配置 SECTION_KEYWORDS_FILE 时使用默认表"""
+    path = os.getenv('SECTION_KEYWORDS_FILE')
+    if not path:
+        return SECTION_TYPE_KEYWORDS
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(section_type, tuple(keywords)) for section_type, keywords in json.load(f)]
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """把前缀树转换为正则，子分支排在结束标记之前，保证取到最长匹配"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        body = '(?:' + body + ')?'
+    return body
+
+
+class SectionClassifier:
+    """根据标题关键词判断部分类型"""
+
+    def __init__(self, keyword_table: Optional[Sequence[Tuple[str, Sequence[str]]]] = None,
+                 cache_size: int = 1024):
+        self._priority: Dict[str, int] = {}
+        self._types: List[str] = []
+        for section_type, keywords in (keyword_table or load_section_keywords()):
+            self._types.append(section_type)
+            for keyword in keywords:
+                # 同一关键词出现在多个类型中时以优先级高的为准
+                self._priority.setdefault(keyword.lower(), len(self._types) - 1)
+
+        # 同一位置上命中的关键词互为前缀，最长的那个一定存在；
+        # 把每个关键词的优先级提升为它所有前缀关键词中最高的，只需取每个位置的最长匹配
+        for keyword in sorted(self._priority, key=len):
+            for end in range(1, len(keyword)):
+                prefix_priority = self._priority.get(keyword[:end])
+                if prefix_priority is not None and prefix_priority < self._priority[keyword]:
+                    self._priority[keyword] = prefix_priority
+
+        # 关键词编译为前缀树形式的前瞻正则：每个位置按字符分支，不随关键词数量线性回溯
+        trie = {}
+        for keyword in self._priority:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self._pattern = re.compile('(?=(' + _trie_pattern(trie) + '))') if trie else None
+        self.cache = LRUCache(max_entries=cache_size, name='section_type')
+
+    def classify(self, title: str) -> str:
+        """返回标题对应的部分类型"""
+        cached = self.cache.get(title)
+        if cached is not None:
+            return cached
+
+        section_type = self._match(title)
+        self.cache.put(title, section_type)
+        return section_type
+
+    def _match(self, title: str) -> str:
+        """不经缓存直接匹配关键词"""
+        if self._pattern is None:
+            return DEFAULT_SECTION_TYPE
+        best = len(self._types)
+        for match in self._pattern.finditer(title.lower()):
+            best = min(best, self._priority[match.group(1)])
+            if best == 0:
+                break
+        return self._types[best] if best < len(self._types) else DEFAULT_SECTION_TYPE
+
+
+# 各解析器共享的默认分类器
+section_classifier = SectionClassifier(cache_size=int(os.getenv('SECTION_TYPE_CACHE_SIZE', '1024')))
@@ -0,0 +1,174 @@
+"""
+结构化数据的紧凑存储格式
+
+v1（旧格式）：每个部分保存完整的 content，每个条目再保存一份 content，
+并额外嵌入一份 raw_markdown，正文在一行记录里存了约三遍。
+
+v2（紧凑格式）：部分标题、正文、条目以及经历类部分的条目记录只保存指向
+raw_markdown.strip() 的 (起始, 结束) 偏移，读取时再展开成与 v1 相同的字典结构。偏移依赖原文，
+因此同时记录原文哈希，原文被单独修改时展开结果视为缺失，由调用方重新解析。
+"""
+
+from typing import Any, Dict, List, Optional
+from services.markdown_parser import content_hash
+
+STORAGE_VERSION = 2
+
+ITEM_TYPE_CODES = {'list_item': 'l', 'paragraph': 'p'}
+ITEM_TYPE_NAMES = {code: name for name, code in ITEM_TYPE_CODES.items()}
+
+SECTION_KEYS = {'title', 'content', 'type', 'items'}
+# 部分中可选的字段：经历类部分的条目记录，以及解析时计算的内容哈希
+OPTIONAL_SECTION_KEYS = {'entries', 'hash'}
+ENTRY_TEXT_KEYS = ('title', 'organization', 'date_range')
+ENTRY_LIST_KEYS = ('bullets', 'description')
+
+
+def _locate(text: str, value: Any, start: int) -> Optional[List[int]]:
+    """从 start 开始查找 value 在文本中的位置，返回 [起始, 结束]"""
+    if not isinstance(value, str):
+        return None
+    position = text.find(value, start)
+    if position < 0:
+        return None
+    return [position, position + len(value)]
+
+
+def _compact_entries(text: str, entries: Any, start: int, end: int) -> Optional[List[list]]:
+    """条目记录压缩为 [标题, 机构, 时间, [要点...], [描述...]] 形式的偏移列表"""
+    if not isinstance(entries, list):
+        return None
+
+    def locate(value):
+        # 字段只需还原出相同的字符串，取部分正文内任意一处出现即可
+        span = _locate(text, value, start)
+        return span if span is not None and span[1] <= end else None
+
+    compact = []
+    for entry in entries:
+        if not isinstance(entry, dict) or set(entry) != set(ENTRY_TEXT_KEYS + ENTRY_LIST_KEYS):
+            return None
+        record = [locate(entry[key]) for key in ENTRY_TEXT_KEYS]
+        for key in ENTRY_LIST_KEYS:
+            if not isinstance(entry[key], list):
+                return None
+            record.append([locate(value) for value in entry[key]])
+        if None in record[:3] or any(None in spans for spans in record[3:]):
+            return None
+        compact.append(record)
+    return compact
+
+
+def _expand_entries(text: str, entries: List[list]) -> List[Dict[str, Any]]:
+    """展开条目记录"""
+    expanded = []
+    for record in entries:
+        entry = {key: text[span[0]:span[1]] for key, span in zip(ENTRY_TEXT_KEYS, record)}
+        for key, spans in zip(ENTRY_LIST_KEYS, record[3:]):
+            entry[key] = [text[s:e] for s, e in spans]
+        expanded.append(entry)
+    return expanded
+
+
+def compact_structured_data(data: Dict[str, Any], raw_markdown: str) -> Optional[Dict[str, Any]]:
+    """将解析结果压缩为 v2 格式；结构与原文对不上时返回 None（按 v1 保存）"""
+    if not isinstance(data, dict) or not isinstance(raw_markdown, str):
+        return None
+    text = raw_markdown.strip()
+    if data.get('raw_markdown') != text or not isinstance(data.get('sections'), list):
+        return None
+
+    sections = []
+    cursor = 0
+    for section in data['sections']:
+        if not isinstance(section, dict) or set(section) - OPTIONAL_SECTION_KEYS != SECTION_KEYS:
+            return None
+
+        title_span = _locate(text, section['title'], cursor)
+        if title_span is None:
+            return None
+        content_span = _locate(text, section['content'], title_span[1])
+        if content_span is None:
+            return None
+
+        items = []
+        item_cursor = content_span[0]
+        for item in section['items'] or []:
+            if not isinstance(item, dict) or set(item) != {'type', 'content'}:
+                return None
+            type_code = ITEM_TYPE_CODES.get(item['type'])
+            item_span = _locate(text, item['content'], item_cursor)
+            if type_code is None or item_span is None or item_span[1] > content_span[1]:
+                return None
+            items.append(item_span + [type_code])
+            item_cursor = item_span[1]
+
+        compact_section = {
+            'title': title_span,
+            'content': content_span,
+            'type': section['type'],
+            'items': items
+        }
+        if 'entries' in section:
+            entries = _compact_entries(text, section['entries'], *content_span)
+            if entries is None:
+                return None
+            compact_section['entries'] = entries
+        if 'hash' in section:
+            if not isinstance(section['hash'], str):
+                return None
+            compact_section['hash'] = section['hash']
+        sections.append(compact_section)
+        cursor = content_span[1]
+
+    compact = {'version': STORAGE_VERSION, 'source_hash': content_hash(text)}
+    for key, value in data.items():
+        if key == 'sections':
+            compact['sections'] = sections
+        elif key != 'raw_markdown':
+            compact[key] = value
+    return compact
+
+
+def is_compact(stored: Any) -> bool:
+    """判断存储的数据是否为 v2 紧凑格式"""
+    return isinstance(stored, dict) and stored.get('version') == STORAGE_VERSION
+
+
+def expand_structured_data(stored: Any, raw_markdown: str) -> Any:
+    """将存储的数据展开为解析结果的字典结构，v1 数据原样返回，原文不匹配时返回 None"""
+    if not is_compact(stored):
+        return stored
+
+    text = (raw_markdown or '').strip()
+    if stored.get('source_hash') != content_hash(text):
+        return None
+
+    sections = []
+    for section in stored.get('sections', []):
+        content_start, content_end = section['content']
+        expanded = {
+            'title': text[section['title'][0]:section['title'][1]],
+            'content': text[content_start:content_end],
+            'type': section['type'],
+            'items': [
+                {'type': ITEM_TYPE_NAMES[code], 'content': text[start:end]}
+                for start, end, code in section['items']
+            ]
+        }
+        if 'entries' in section:
+            expanded['entries'] = _expand_entries(text, section['entries'])
+        if 'hash' in section:
+            expanded['hash'] = section['hash']
+        sections.append(expanded)
+
+    data = {}
+    for key, value in stored.items():
+        if key in ('version', 'source_hash'):
+            continue
+        if key == 'sections':
+            data['sections'] = sections
+            data['raw_markdown'] = text
+        else:
+            data[key] = value
+    return data
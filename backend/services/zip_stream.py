@@ -0,0 +1,69 @@
+"""
+流式ZIP打包
+
+批量导出时不能先把所有PDF放进内存里的 ZipFile 再返回。这里让 zipfile 写入一个
+不可 seek 的输出对象（zipfile 会改用数据描述符记录每个文件的大小和CRC），每写入一块
+就把已生成的字节交给调用方发送，内存占用只与块大小有关，与文件数量和总大小无关。
+"""
+
+import io
+import time
+import zipfile
+from typing import IO, Iterable, Iterator, Tuple, Union
+
+ZipSource = Union[str, bytes, IO[bytes]]
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """收集 zipfile 写出的字节，由生成器取走后清空"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+
+def _open_source(source: ZipSource) -> IO[bytes]:
+    if isinstance(source, str):
+        return open(source, 'rb')
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return source
+
+
+def stream_zip(entries: Iterable[Tuple[str, ZipSource]], chunk_size: int = ZIP_CHUNK_SIZE,
+               compresslevel: int = 1) -> Iterator[bytes]:
+    """把 (ZIP内文件名, 文件路径/字节/文件对象) 依次写入ZIP并逐块产出
+
+    entries 可以是惰性的生成器，每个文件写完后才取下一个；文件对象写完后关闭。
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        for name, source in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with _open_source(source) as src, archive.open(info, 'w') as dest:
+                while True:
+                    block = src.read(chunk_size)
+                    if not block:
+                        break
+                    dest.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # 中央目录在关闭时写出
+    yield sink.drain()
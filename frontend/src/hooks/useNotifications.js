@@ -19,7 +19,11 @@ export const useNotifications = (enabled = true) => {
     const connectSSE = () => {
       try {
         const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8080';
-        const sseUrl = `${apiUrl}/api/notifications/events`;
+        // EventSource 不能设置请求头，登录后通过查询参数携带令牌，才能收到自己的导出完成通知
+        const token = localStorage.getItem('access_token');
+        const sseUrl = token
+          ? `${apiUrl}/api/notifications/events?token=${encodeURIComponent(token)}`
+          : `${apiUrl}/api/notifications/events`;
         
         console.log('[SSE] 建立连接:', sseUrl);
         
@@ -114,11 +114,12 @@ export const resumeAPI = {
   // 删除简历
   deleteResume: (id) => api.delete(`/api/resumes/${id}`),
   
-  // 导出PDF
-  exportPDF: (id, smartOnepage = false) => api.get(`/api/resumes/${id}/pdf`, {
+  // 导出PDF（quality 为 'draft' 时生成供预览的草稿质量PDF，草稿忽略 smartOnepage）
+  exportPDF: (id, smartOnepage = false, quality = 'full') => api.get(`/api/resumes/${id}/pdf`, {
     responseType: 'blob',
     params: {
-      smart_onepage: smartOnepage
+      smart_onepage: smartOnepage,
+      quality
     }
   }),
 
@@ -130,6 +131,34 @@ export const resumeAPI = {
     }
   }),
 
+  // 提交异步导出任务；登录用户完成后可能收到 export_finished 推送（仅同一后端进程上的连接），应以 getExport 轮询为准
+  createExport: (id, { generator = 'html', smartOnepage = false, clientId } = {}) => api.post(`/api/resumes/${id}/exports`, {
+    generator,
+    smart_onepage: smartOnepage,
+    client_id: clientId
+  }),
+
+  // 查询导出任务状态
+  getExport: (jobId) => api.get(`/api/exports/${jobId}`),
+
+  // 下载已完成的导出任务
+  downloadExport: (jobId) => api.get(`/api/exports/${jobId}`, {
+    responseType: 'blob',
+    params: {
+      download: true
+    }
+  }),
+
+  // 批量导出多份简历为ZIP
+  exportBulk: (ids, generator = 'reportlab', smartOnepage = false) => api.post('/api/resumes/export-bulk', {
+    ids,
+    generator,
+    smart_onepage: smartOnepage
+  }, {
+    responseType: 'blob',
+    timeout: 0
+  }),
+
   // 获取HTML内容（用于预览）
   getHTML: (id, smartOnepage = false) => api.get(`/api/resumes/${id}/html`, {
     params: {
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Markdown解析与渲染预处理的基准测试
+
+用固定随机种子生成合成简历语料（1~200个部分，中文/英文/中英混排，长列表），
+分别计时 ResumeMarkdownParser.parse、markdown_to_html 与 ResumePDFGenerator._clean_markdown，
+结果以JSON输出，可与之前提交的结果对比以发现性能回退：
+
+    python tests/benchmark_parser.py --output bench-new.json
+    python tests/benchmark_parser.py --compare bench-old.json --threshold 0.15
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator
+
+SECTION_COUNTS = (1, 5, 20, 50, 100, 200)
+LANGUAGES = ('cjk', 'latin', 'mixed')
+
+CJK_TITLES = ['工作经历', '项目经验', '教育背景', '专业技能', '证书认证', '自我评价', '获奖情况']
+LATIN_TITLES = ['Work Experience', 'Projects', 'Education', 'Skills', 'Certificates', 'Summary', 'Awards']
+CJK_WORDS = ['负责', '核心', '产品', '架构', '设计', '开发', '团队', '优化', '性能', '提升', '系统',
+             '数据', '平台', '用户', '增长', '交付', '维护', '上线', '重构', '服务']
+LATIN_WORDS = ['led', 'designed', 'built', 'scalable', 'services', 'latency', 'team', 'platform',
+               'pipeline', 'migrated', 'reduced', 'cost', 'users', 'shipped', 'API', 'Kubernetes',
+               'Python', 'React', 'metrics', 'on-call']
+CJK_ORGS = ['ABC科技公司', '清华大学', '某互联网公司', '数据智能实验室']
+LATIN_ORGS = ['Acme Corp', 'Globex', 'Initech', 'Stanford University']
+
+
+def _sentence(rng, language, min_words=6, max_words=24):
+    """生成一句带有少量Markdown标记的文本"""
+    if language == 'mixed':
+        # 中英混排：英文单词前后加空格，中文词直接相连
+        words = [rng.choice(CJK_WORDS) if rng.random() < 0.5 else f' {rng.choice(LATIN_WORDS)} '
+                 for _ in range(rng.randint(min_words, max_words))]
+        separator = ''
+    else:
+        pool = CJK_WORDS if language == 'cjk' else LATIN_WORDS
+        words = [rng.choice(pool) for _ in range(rng.randint(min_words, max_words))]
+        separator = '' if language == 'cjk' else ' '
+
+    marker = rng.random()
+    index = rng.randrange(len(words))
+    if marker < 0.15:
+        words[index] = f'**{words[index].strip()}**'
+    elif marker < 0.25:
+        words[index] = f'*{words[index].strip()}*'
+    elif marker < 0.32:
+        words[index] = f'`{words[index].strip()}`'
+    elif marker < 0.36:
+        words[index] = f'[{words[index].strip()}](https://example.com/{index})'
+    return separator.join(words).replace('  ', ' ').strip()
+
+
+def generate_resume(seed: int, section_count: int, language: str = 'mixed') -> str:
+    """生成一份合成简历，相同参数总是得到相同文本"""
+    rng = random.Random(f'{seed}-{section_count}-{language}')
+    titles = CJK_TITLES if language == 'cjk' else LATIN_TITLES
+    orgs = CJK_ORGS if language == 'cjk' else LATIN_ORGS
+    if language == 'mixed':
+        titles = CJK_TITLES + LATIN_TITLES
+        orgs = CJK_ORGS + LATIN_ORGS
+
+    lines = [
+        '# 张三 Zhang San' if language != 'latin' else '# Jane Doe',
+        '',
+        f'📧 user{seed}@example.com | 📱 138-0000-{seed % 10000:04d} | https://github.com/user{seed}',
+        '地址：北京市海淀区' if language != 'latin' else 'Address: Seattle, WA',
+        ''
+    ]
+    for index in range(section_count):
+        lines.extend([f'## {rng.choice(titles)} {index}', ''])
+        style = rng.random()
+        if style < 0.6:
+            # 条目式经历：子标题 + 长列表
+            for _ in range(rng.randint(1, 3)):
+                start_year = rng.randint(2005, 2022)
+                lines.append(f'### {_sentence(rng, language, 2, 4)} | {rng.choice(orgs)} | '
+                             f'{start_year}.0{rng.randint(1, 9)} - {start_year + rng.randint(1, 3)}.12')
+                lines.extend(f'- {_sentence(rng, language)}' for _ in range(rng.randint(3, 40)))
+                lines.append('')
+        elif style < 0.8:
+            lines.extend(f'* {_sentence(rng, language, 2, 8)}' for _ in range(rng.randint(5, 30)))
+            lines.append('')
+        else:
+            for _ in range(rng.randint(1, 4)):
+                lines.extend([_sentence(rng, language, 20, 80), ''])
+    return '\n'.join(lines)
+
+
+def build_corpus(seed: int):
+    """返回 (用例名, 文本) 列表"""
+    return [(f'{language}/{count}', generate_resume(seed, count, language))
+            for language in LANGUAGES for count in SECTION_COUNTS]
+
+
+def _measure(func, repeat: int):
+    """运行 repeat 次，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _git_commit():
+    """当前提交哈希，不在git仓库中时返回 None"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(seed: int = 2024, repeat: int = 5):
+    """执行全部基准测试并返回可序列化为JSON的结果"""
+    parser = ResumeMarkdownParser()  # 不使用解析缓存，测量实际解析耗时
+    pdf_generator = ResumePDFGenerator()
+
+    benchmarks = {
+        'parse': lambda text: parser.parse(text),
+        'markdown_to_html': lambda text: parser.markdown_to_html(text),
+        'clean_markdown': lambda text: pdf_generator._clean_markdown(text),
+    }
+
+    results = []
+    for case, text in build_corpus(seed):
+        for name, func in benchmarks.items():
+            func(text)  # 预热
+            timings = _measure(lambda: func(text), repeat)
+            results.append({
+                'benchmark': name,
+                'case': case,
+                'chars': len(text),
+                'min_ms': round(min(timings), 4),
+                'median_ms': round(statistics.median(timings), 4),
+            })
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results
+    }
+
+
+def compare_results(current, baseline, threshold: float):
+    """按 min_ms 对比两次结果，返回超过阈值的回退列表"""
+    previous = {(r['benchmark'], r['case']): r for r in baseline['results']}
+    regressions = []
+    print(f"{'基准':<18} {'用例':<12} {'之前(ms)':>10} {'现在(ms)':>10} {'变化':>8}")
+    for result in current['results']:
+        old = previous.get((result['benchmark'], result['case']))
+        if not old or not old['min_ms']:
+            continue
+        change = result['min_ms'] / old['min_ms'] - 1
+        flag = ' !' if change > threshold else ''
+        print(f"{result['benchmark']:<18} {result['case']:<12} {old['min_ms']:>10.3f} "
+              f"{result['min_ms']:>10.3f} {change:>+8.1%}{flag}")
+        if change > threshold:
+            regressions.append({**result, 'baseline_min_ms': old['min_ms'], 'change': round(change, 4)})
+    return regressions
+
+
+def print_results(report):
+    """以表格形式输出结果"""
+    print(f"{'基准':<18} {'用例':<12} {'字符数':>8} {'最短(ms)':>10} {'中位数(ms)':>12}")
+    for result in report['results']:
+        print(f"{result['benchmark']:<18} {result['case']:<12} {result['chars']:>8} "
+              f"{result['min_ms']:>10.3f} {result['median_ms']:>12.3f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Markdown解析基准测试')
+    arg_parser.add_argument('--seed', type=int, default=2024, help='语料随机种子')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='每个用例的重复次数')
+    arg_parser.add_argument('--output', help='结果JSON输出路径')
+    arg_parser.add_argument('--compare', help='用于对比的历史结果JSON')
+    arg_parser.add_argument('--threshold', type=float, default=0.15, help='判定为回退的耗时增幅')
+    args = arg_parser.parse_args()
+
+    report = run_benchmarks(seed=args.seed, repeat=args.repeat)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已写入 {args.output}")
+
+    if not args.compare:
+        print_results(report)
+        return 0
+
+    baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+    regressions = compare_results(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）")
+        return 1
+    print("\n未发现性能回退")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+解析与PDF渲染优化的对比报告
+
+与 benchmark_parser.py 输出可比较的JSON结果不同，这里的每个报告只打印一次改动前后
+（旧实现与新实现、开关关闭与开启）的耗时、体积或内存对比，用于评估改动效果。
+旧实现的参照代码与对应测试共用，从测试模块导入。
+
+    python tests/benchmark_reports.py                  # 运行全部报告
+    python tests/benchmark_reports.py parse draft      # 只运行指定报告
+"""
+
+import io
+import os
+import re
+import copy
+import sys
+import math
+import time
+import argparse
+import threading
+import contextlib
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator
+from benchmark_parser import generate_resume, build_corpus
+
+
+def _min_ms(func, repeat):
+    """运行 repeat 次，返回最短耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def report_parse():
+    """解析耗时随文档大小的变化：逐行多次匹配的旧实现与单次扫描"""
+    from test_markdown_parser import legacy_parse, build_resume
+    parser = ResumeMarkdownParser()
+    print(f"{'章节数':>8} {'字符数':>10} {'旧实现(ms)':>12} {'新实现(ms)':>12}")
+    for section_count in [5, 50, 200, 1000, 2000]:
+        text = build_resume(section_count)
+        repeat = max(3, 2000 // section_count)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy_parse(text)
+        legacy_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parser.parse(text)
+        current_ms = (time.perf_counter() - start) / repeat * 1000
+
+        print(f"{section_count:>8} {len(text):>10} {legacy_ms:>12.3f} {current_ms:>12.3f}")
+
+
+def report_parse_stress():
+    """数字密集输入下联系方式提取的耗时随输入大小的变化（应为线性）"""
+    from test_markdown_parser import build_stress_resume, _time_parse
+    parser = ResumeMarkdownParser()
+    print(f"{'大小(KB)':>10} {'耗时(ms)':>10} {'每KB(ms)':>10}")
+    for size_kb in [64, 128, 256, 512, 1024]:
+        text = build_stress_resume(size_kb * 1024)
+        elapsed = min(_time_parse(parser, text) for _ in range(3)) * 1000
+        print(f"{size_kb:>10} {elapsed:>10.2f} {elapsed / size_kb:>10.4f}")
+
+
+def report_storage():
+    """样例语料上 v1 与 v2 结构化数据的存储体积"""
+    import json
+    from services.structured_data import compact_structured_data
+    from test_structured_data import sample_corpus
+    parser = ResumeMarkdownParser()
+    print(f"{'文档':>6} {'原文(B)':>10} {'v1(B)':>10} {'v2(B)':>10} {'节省':>8}")
+    total_v1 = total_v2 = 0
+    for index, markdown_text in enumerate(sample_corpus()):
+        data = parser.parse(markdown_text)
+        v1 = len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        v2 = len(json.dumps(compact_structured_data(data, markdown_text), ensure_ascii=False).encode('utf-8'))
+        total_v1 += v1
+        total_v2 += v2
+        source = len(markdown_text.encode('utf-8'))
+        print(f"{index:>6} {source:>10} {v1:>10} {v2:>10} {1 - v2 / v1:>8.1%}")
+    print(f"{'合计':>6} {'':>10} {total_v1:>10} {total_v2:>10} {1 - total_v2 / total_v1:>8.1%}")
+
+
+def report_classifier():
+    """关键词表扩大后逐类型扫描的旧实现与编译分类器的耗时"""
+    from services.section_classifier import SectionClassifier
+    from test_section_classifier import LEGACY_TABLE, legacy_classify, random_titles
+    titles = random_titles(5000, seed=11)
+    print(f"{'关键词数':>8} {'旧实现(ms)':>12} {'编译正则(ms)':>14}")
+    for factor in [1, 4, 16]:
+        table = [(section_type, keywords + [f'{k}{i}' for k in keywords for i in range(factor - 1)])
+                 for section_type, keywords in LEGACY_TABLE]
+        keyword_count = sum(len(keywords) for _, keywords in table)
+        classifier = SectionClassifier(table)
+
+        start = time.perf_counter()
+        for title in titles:
+            legacy_classify(title, table)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for title in titles:
+            classifier._match(title)
+        compiled_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{keyword_count:>8} {legacy_ms:>12.2f} {compiled_ms:>14.2f}")
+
+
+# worker 进程：加载四个字重并渲染一页PDF（子集化会访问字体数据），然后等待父进程读取内存统计
+FONT_WORKER_SCRIPT = """
+import sys; sys.path.insert(0, {backend!r})
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from services.font_loader import load_ttfont
+pdf = canvas.Canvas('/dev/null')
+for i, path in enumerate({fonts!r}):
+    font = load_ttfont(f'W{{i}}', path)
+    pdfmetrics.registerFont(font)
+    pdf.setFont(font.fontName, 12)
+    pdf.drawString(72, 720 - i * 20, {text!r})
+pdf.save()
+print('ready', flush=True)
+sys.stdin.read()
+"""
+
+
+def _memory_stats(pid):
+    """读取 /proc/<pid>/smaps_rollup 中的常驻内存统计（KB）"""
+    stats = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                stats[key] = int(value.split()[0])
+    return stats
+
+
+def report_font_memory(workers=4):
+    """同时运行的多个 worker 进程在整文件读取与内存映射两种方式下的常驻内存"""
+    from test_font_loader import FONT_DIR, SAMPLE_TEXT
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("当前系统不支持 /proc/<pid>/smaps_rollup，跳过内存统计")
+        return
+    fonts = [str(FONT_DIR / f'HarmonyOS_Sans_TC_{weight}.ttf') for weight in ('Regular', 'Bold', 'Medium', 'Light')]
+    script = FONT_WORKER_SCRIPT.format(backend=str(BACKEND_DIR), fonts=fonts, text=SAMPLE_TEXT)
+
+    print(f"{workers} 个 worker 同时加载 {len(fonts)} 个字重（每进程平均，KB）")
+    print(f"{'方式':<12} {'RSS':>10} {'PSS':>10} {'私有':>10} {'共享':>10}")
+    for label, flag in (('整文件读取', '0'), ('内存映射', '1')):
+        env = {**os.environ, 'FONT_MMAP': flag}
+        processes = [subprocess.Popen([sys.executable, '-c', script], stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, text=True, env=env) for _ in range(workers)]
+        try:
+            for process in processes:
+                process.stdout.readline()
+            samples = [_memory_stats(process.pid) for process in processes]
+        finally:
+            for process in processes:
+                process.communicate('')
+
+        def average(*keys):
+            return sum(sum(sample.get(key, 0) for key in keys) for sample in samples) / len(samples)
+
+        print(f"{label:<12} {average('Rss'):>10.0f} {average('Pss'):>10.0f} "
+              f"{average('Private_Clean', 'Private_Dirty'):>10.0f} {average('Shared_Clean', 'Shared_Dirty'):>10.0f}")
+
+
+def report_glyph_widths(repeat=5):
+    """一份较长简历的全部文本在10个候选字号下估算总行数的耗时"""
+    from reportlab.pdfbase import pdfmetrics
+    from services.glyph_widths import count_lines
+    from test_glyph_widths import legacy_estimate_lines
+    generator = ResumePDFGenerator()
+    data = ResumeMarkdownParser().parse(generate_resume(2024, 20, 'mixed'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, blocks = generator._measure_text_blocks(data)  # 注册字体
+    texts = [generator._clean_markdown(item['content']) for section in data['sections']
+             for item in section['items'] if item.get('content')]
+    font_name = generator.chinese_font
+    font_sizes = [10 * (1.0 - 0.45 * step / 9) for step in range(10)]
+    width = generator.available_width
+
+    def legacy():
+        return [sum(legacy_estimate_lines(text, width, size) for text in texts) for size in font_sizes]
+
+    def string_width():
+        return [sum(max(1, math.ceil(pdfmetrics.stringWidth(text, font_name, size) / width)) for text in texts)
+                for size in font_sizes]
+
+    def table():
+        unit_widths = [unit_width for _, unit_width in generator._measure_text_blocks(data)[1]]
+        return [count_lines(unit_widths, size, width) for size in font_sizes]
+
+    measured = [unit_width for _, unit_width in blocks]
+
+    def scale_only():
+        return [count_lines(measured, size, width) for size in font_sizes]
+
+    print(f"{len(texts)} 段文本 × {len(font_sizes)} 个候选字号")
+    print(f"{'方式':<20} {'耗时(ms)':>10}")
+    for label, func in (('按字符数估算', legacy), ('逐段stringWidth', string_width), ('宽度表(含测量)', table),
+                        ('宽度表(仅按字号缩放)', scale_only)):
+        func()
+        print(f"{label:<20} {_min_ms(func, repeat):>10.2f}")
+
+
+def report_styles(repeat=200):
+    """每次导出重新创建样式表与使用档位缓存的耗时"""
+    generator = ResumePDFGenerator()
+    ratios = [0.55 + 0.45 * i / (repeat - 1) for i in range(repeat)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.styles  # 注册字体
+        start = time.perf_counter()
+        for ratio in ratios:
+            generator._build_optimized_styles(ratio)
+        uncached_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for ratio in ratios:
+            generator._create_optimized_styles(ratio)
+        cached_ms = (time.perf_counter() - start) * 1000
+    print(f"创建 {repeat} 次优化样式: 每次新建 {uncached_ms:.1f}ms, 档位缓存 {cached_ms:.2f}ms")
+
+
+def report_markup(repeat=5):
+    """长中文要点上13次 re.sub 与单次扫描转换的耗时，以及一次智能一页渲染中的实际转换次数"""
+    from test_pdf_markup import converter, legacy_clean_markdown, long_cjk_bullets
+    bullets = long_cjk_bullets()
+    chars = sum(len(bullet) for bullet in bullets)
+
+    def convert_all(func):
+        return lambda: [func(bullet) for bullet in bullets]
+
+    legacy_ms = _min_ms(convert_all(legacy_clean_markdown), repeat)
+    single_ms = _min_ms(convert_all(converter.convert), repeat)
+    print(f"{len(bullets)} 条长中文要点, 共 {chars} 字符")
+    print(f"{'实现':<16} {'耗时(ms)':>10}")
+    print(f"{'13次re.sub':<16} {legacy_ms:>10.2f}")
+    print(f"{'单次扫描':<16} {single_ms:>10.2f}")
+    print(f"加速比: {legacy_ms / single_ms:.1f}x")
+
+    generator = ResumePDFGenerator()
+    generator.styles
+    lookups, conversions = [], []
+    clean_markdown = generator._clean_markdown
+    convert = generator._markup_converter.convert
+    generator._clean_markdown = lambda text: (lookups.append(1), clean_markdown(text))[1]
+    generator._markup_converter.convert = lambda text: (conversions.append(1), convert(text))[1]
+    data = ResumeMarkdownParser().parse(build_corpus(7)[2][1])
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.generate_pdf(data, smart_onepage=True)
+    print(f"智能一页渲染: 调用 _clean_markdown {len(lookups)} 次, 实际转换 {len(conversions)} 次")
+
+
+@contextlib.contextmanager
+def quiet_output():
+    """屏蔽本进程和渲染进程的生成日志（渲染进程继承标准输出的文件描述符）"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def report_render_pool(clients=4, jobs_per_client=5):
+    """多个线程同时导出一份较长的简历：在请求进程内渲染（共享GIL）与交给渲染进程池的吞吐量"""
+    from services.render_pool import RenderPool
+    data = ResumeMarkdownParser().parse(generate_resume(2024, 12, 'mixed'))
+    generator = ResumePDFGenerator()
+    pool = RenderPool(workers=clients)
+
+    def throughput(render):
+        threads = [threading.Thread(target=lambda: [render() for _ in range(jobs_per_client)])
+                   for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return clients * jobs_per_client / (time.perf_counter() - start)
+
+    with quiet_output():
+        in_process = lambda: generator.generate_pdf(data, smart_onepage=True)
+        pooled = lambda: pool.render('reportlab', data, smart_onepage=True)
+        in_process()
+        throughput(pooled)  # 启动渲染进程
+        local_rate = throughput(in_process)
+        pool_rate = throughput(pooled)
+        pool.shutdown()
+
+    print(f"{clients} 个线程并发导出, 每个线程 {jobs_per_client} 次, CPU 核数 {os.cpu_count()}")
+    print(f"{'方式':<12} {'吞吐量(份/秒)':>14}")
+    print(f"{'进程内渲染':<12} {local_rate:>14.1f}")
+    print(f"{'渲染进程池':<12} {pool_rate:>14.1f}")
+
+
+def report_render_timing(rounds=10):
+    """一份较长简历各阶段的平均耗时，以及开启计时与不开启计时的总耗时"""
+    from services.render_timing import RenderHistogram, collect_timings
+    data = ResumeMarkdownParser().parse(generate_resume(2024, 12, 'mixed'))
+    generator = ResumePDFGenerator()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.generate_pdf(data, smart_onepage=True)  # 注册字体、创建样式
+        rows = []
+        for smart_onepage in (False, True):
+            histogram = RenderHistogram()
+            untimed = time.perf_counter()
+            for _ in range(rounds):
+                generator.generate_pdf(data, smart_onepage=smart_onepage)
+            untimed = (time.perf_counter() - untimed) / rounds
+            for _ in range(rounds):
+                with collect_timings() as timings:
+                    generator.generate_pdf(data, smart_onepage=smart_onepage)
+                histogram.observe('reportlab', timings)
+            rows.append((smart_onepage, untimed, histogram.stats()['reportlab']))
+
+    for smart_onepage, untimed, phases in rows:
+        print(f"{'智能一页' if smart_onepage else '普通模式'} ({rounds} 次平均)")
+        for name, stats in phases.items():
+            print(f"  {name:<10} {stats['mean_ms']:>8.2f} ms")
+        print(f"  {'不计时':<10} {untimed * 1000:>8.2f} ms")
+
+
+def report_section_layout(rounds=10):
+    """模拟导出预览：每轮修改一条要点后重新导出，比较不缓存与缓存各部分排版的平均耗时"""
+    from services.lru_cache import LRUCache
+    from test_section_layout import RESUME_DATA, edit_bullet, render
+    edits = [edit_bullet(RESUME_DATA, i) for i in range(rounds)]
+    print(f"{len(RESUME_DATA['sections'])} 个部分的简历，每轮修改一条要点后导出，{rounds} 轮平均")
+    print(f"{'模式':<10} {'不缓存(ms)':>12} {'缓存(ms)':>10} {'加速':>8}")
+    for smart_onepage in (False, True):
+        timings = []
+        for cache_size in (1, 512):
+            generator = ResumePDFGenerator()
+            generator._section_layouts = LRUCache(cache_size, name='pdf_section_layouts')
+            render(generator, RESUME_DATA, smart_onepage)
+            start = time.perf_counter()
+            for data in edits:
+                render(generator, data, smart_onepage)
+            timings.append((time.perf_counter() - start) / rounds * 1000)
+        label = '智能一页' if smart_onepage else '普通模式'
+        print(f"{label:<10} {timings[0]:>12.1f} {timings[1]:>10.1f} {timings[0] / timings[1]:>7.2f}x")
+
+
+def report_draft(rounds=10):
+    """一份英文简历以嵌入TrueType字体的正式质量和不嵌入字体的草稿质量导出时的耗时、大小和页数"""
+    from test_draft_pdf import ENGLISH_DATA, embedded_full_fonts, render
+
+    def edited(round_index):
+        """模拟编辑器预览：每次导出前修改最后一个部分"""
+        data = copy.deepcopy(ENGLISH_DATA)
+        section = data['sections'][-1]
+        section['title'] = f"{section['title']} ({round_index})"
+        section.pop('hash', None)  # 解析时的哈希已不对应修改后的内容
+        return data
+
+    with embedded_full_fonts():
+        generators = (('正式质量', ResumePDFGenerator()), ('草稿质量', ResumePDFGenerator(draft=True)))
+        print(f"英文简历 {len(ENGLISH_DATA['sections'])} 个部分，每次修改最后一个部分，{rounds} 次平均")
+        print(f"{'质量':<10} {'智能一页':>8} {'耗时(ms)':>10} {'大小(KB)':>10} {'页数':>6} {'嵌入字体':>8}")
+        for label, generator in generators:
+            for smart_onepage in (False, True):
+                pdf_bytes = render(generator, ENGLISH_DATA, smart_onepage)
+                versions = [edited(i) for i in range(rounds)]
+                start = time.perf_counter()
+                for data in versions:
+                    render(generator, data, smart_onepage)
+                elapsed = (time.perf_counter() - start) / rounds * 1000
+                pages = int(re.search(rb'/Count (\d+)', pdf_bytes).group(1))
+                print(f"{label:<10} {'是' if smart_onepage else '否':>8} {elapsed:>10.1f} "
+                      f"{len(pdf_bytes) / 1024:>10.1f} {pages:>6} {pdf_bytes.count(b'/FontFile'):>8}")
+
+
+REPORTS = {
+    'parse': report_parse,
+    'parse-stress': report_parse_stress,
+    'storage': report_storage,
+    'classifier': report_classifier,
+    'font-memory': report_font_memory,
+    'glyph-widths': report_glyph_widths,
+    'styles': report_styles,
+    'markup': report_markup,
+    'render-pool': report_render_pool,
+    'render-timing': report_render_timing,
+    'section-layout': report_section_layout,
+    'draft': report_draft,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='解析与PDF渲染优化的对比报告')
+    arg_parser.add_argument('reports', nargs='*', metavar='report',
+                            help=f"要运行的报告，不指定时全部运行：{', '.join(REPORTS)}")
+    args = arg_parser.parse_args()
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        arg_parser.error(f"未知的报告: {', '.join(unknown)}")
+
+    for index, name in enumerate(args.reports or REPORTS):
+        if index:
+            print()
+        print(f"== {name}: {REPORTS[name].__doc__}")
+        REPORTS[name]()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+测试共用的路径设置和夹具
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+TESTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TESTS_DIR.parent / 'backend'))
+sys.path.insert(0, str(TESTS_DIR))
+
+from services.pdf_cache import PDFArtifactCache
+
+# 通过 from services.pdf_cache import pdf_artifact_cache 引用共享缓存的模块
+ARTIFACT_CACHE_USERS = ('services.export_jobs', 'services.prerender', 'routes.resume_routes')
+
+
+@pytest.fixture
+def artifact_cache(tmp_path, monkeypatch):
+    """临时目录中的PDF缓存，替换已导入模块中的共享缓存"""
+    cache = PDFArtifactCache(cache_dir=str(tmp_path / 'pdf-cache'), max_bytes=1024 * 1024)
+    for module_name in ARTIFACT_CACHE_USERS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            monkeypatch.setattr(module, 'pdf_artifact_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, artifact_cache):
+    """使用临时 SQLite 数据库的应用；PDF缓存和导出任务记录写入临时目录"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv('JWT_SECRET_KEY', 'test-jwt-secret-key-for-route-tests')
+    from app import create_app
+    from routes import resume_routes
+    from services.export_jobs import ExportJobManager
+    monkeypatch.setattr(resume_routes, 'pdf_artifact_cache', artifact_cache)
+    monkeypatch.setattr(resume_routes, 'export_jobs',
+                        ExportJobManager(max_workers=1, job_dir=str(tmp_path / 'export-jobs')))
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app, monkeypatch):
+    """创建用户并返回 (用户, 带访问令牌的请求头)；邮箱不做送达检查"""
+    import models
+    from types import SimpleNamespace
+    from flask_jwt_extended import create_access_token
+    monkeypatch.setattr(models, 'validate_email', lambda email: SimpleNamespace(email=email))
+
+    def make(username, is_admin=False):
+        user = models.User(username, f'{username}@example.com', 'password123')
+        user.is_admin = is_admin
+        models.db.session.add(user)
+        models.db.session.commit()
+        return user, {'Authorization': f'Bearer {create_access_token(identity=user.public_id)}'}
+    return make
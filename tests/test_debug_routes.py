@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+测试调试接口的权限检查
+"""
+
+import pytest
+
+STATS_URLS = ['/api/debug/cache-stats', '/api/debug/render-pool', '/api/debug/render-timings']
+
+
+@pytest.mark.parametrize('url', STATS_URLS)
+def test_stats_require_admin(client, make_user, url):
+    """运行统计只对管理员开放：未登录 401，普通用户 403"""
+    _, user_headers = make_user('alice')
+    _, admin_headers = make_user('admin', is_admin=True)
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=user_headers).status_code == 403
+    response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200 and response.get_json()['success']
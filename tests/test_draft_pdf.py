@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+测试草稿质量PDF（quality=draft）
+"""
+
+import io
+import re
+import contextlib
+from pathlib import Path
+
+from reportlab.pdfbase import pdfmetrics
+from services import pdf_generator as pdf_generator_module
+from services.font_loader import load_ttfont
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator, DRAFT_CID_FONT
+from benchmark_parser import generate_resume
+
+FONTS_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'fonts' / 'HarmonyOS Sans' / 'HarmonyOS_Sans'
+RESUME_DATA = ResumeMarkdownParser().parse(generate_resume(2024, 12, 'mixed'))
+ENGLISH_DATA = ResumeMarkdownParser().parse(generate_resume(2024, 12, 'en'))
+
+
+def render(generator, data, smart_onepage=False):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generator.generate_pdf(data, smart_onepage=smart_onepage)
+
+
+def page_count(pdf_bytes):
+    return int(re.search(rb'/Count (\d+)', pdf_bytes).group(1))
+
+
+@contextlib.contextmanager
+def embedded_full_fonts():
+    """正式质量改用仓库自带的 HarmonyOS Sans 拉丁字体（TrueType，导出时嵌入子集）"""
+    fonts = {}
+    for weight in ('Regular', 'Bold', 'Medium'):
+        font_name = f'HarmonyOS-Latin-{weight}'
+        pdfmetrics.registerFont(load_ttfont(font_name, str(FONTS_DIR / f'HarmonyOS_Sans_{weight}.ttf')))
+        fonts[weight.lower()] = font_name
+    saved = pdf_generator_module._registered_fonts
+    pdf_generator_module._registered_fonts = fonts
+    try:
+        yield
+    finally:
+        pdf_generator_module._registered_fonts = saved
+
+
+def test_draft_uses_cid_font_without_embedding():
+    pdf_bytes = render(ResumePDFGenerator(draft=True), RESUME_DATA)
+    assert DRAFT_CID_FONT.encode() in pdf_bytes
+    assert b'/FontFile' not in pdf_bytes
+
+
+def test_draft_skips_onepage_search_and_layout_cache(monkeypatch):
+    """草稿忽略 smart_onepage，不做一页适配，也不使用部分排版缓存"""
+    draft = ResumePDFGenerator(draft=True)
+    assert draft._section_layouts is None
+
+    def fail(*args, **kwargs):
+        raise AssertionError('草稿不应进行一页适配')
+
+    monkeypatch.setattr(draft, '_fit_to_one_page', fail)
+    onepage = render(draft, RESUME_DATA, smart_onepage=True)
+    assert page_count(onepage) == page_count(render(draft, RESUME_DATA)) > 1
+
+
+def test_draft_is_smaller_than_embedded_fonts():
+    with embedded_full_fonts():
+        full = render(ResumePDFGenerator(), ENGLISH_DATA)
+    draft = render(ResumePDFGenerator(draft=True), ENGLISH_DATA)
+    assert b'/FontFile2' in full and b'/FontFile' not in draft
+    assert len(draft) < len(full) * 0.8
+
+
+def test_draft_and_full_generators_do_not_share_styles():
+    """草稿生成器的样式表只使用草稿字体"""
+    draft = ResumePDFGenerator(draft=True)
+    style_names = ('NameTitle', 'SectionTitle', 'JobTitle', 'ModernBodyText', 'BulletPoint')
+    for styles in (draft.styles, draft._create_optimized_styles(0.6)):
+        assert {styles[name].fontName for name in style_names} == {DRAFT_CID_FONT}
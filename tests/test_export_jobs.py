@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+测试异步PDF导出任务
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+
+import pytest
+from services import export_jobs as export_jobs_module
+from services.export_jobs import ExportJob, ExportJobManager, ExportQueueFull, JOB_DONE, JOB_FAILED
+from services.pdf_cache import PDFArtifactCache
+
+
+def make_job(key='key'):
+    return ExportJob(1, 'html', False, artifact_key=key, filename='简历.pdf', user_id='user-1', client_id='client_1')
+
+
+def writer(data, wait=None):
+    """返回把 data 写入指定路径的 write 函数，可先等待事件"""
+    def write(path):
+        if wait is not None:
+            wait.wait()
+        Path(path).write_bytes(data)
+    return write
+
+
+def wait_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_job_completes_into_artifact_cache(artifact_cache):
+    """完成的任务写入磁盘缓存并调用完成回调"""
+    manager = ExportJobManager(max_workers=1)
+    finished = []
+    job = manager.submit(make_job(), writer(b'%PDF-1.4 job'), on_finished=finished.append)
+    wait_finished(job)
+
+    assert job.status == JOB_DONE and job.pdf_bytes is None
+    assert Path(job.path).read_bytes() == b'%PDF-1.4 job'
+    assert artifact_cache.get('key') == job.path
+    assert manager.get(job.id) is job
+    for _ in range(100):
+        if finished:
+            break
+        time.sleep(0.01)
+    assert finished == [job]
+    assert manager.stats()['completed'] == 1
+
+
+def test_failure_is_recorded(artifact_cache):
+    def render(path):
+        raise RuntimeError('wkhtmltopdf 执行失败')
+
+    manager = ExportJobManager(max_workers=1)
+    job = manager.submit(make_job(), render)
+    wait_finished(job)
+    assert job.status == JOB_FAILED and job.error == 'wkhtmltopdf 执行失败'
+    assert job.to_dict()['error'] == job.error
+    assert manager.stats()['failed'] == 1
+
+
+def test_keeps_bytes_when_cache_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs_module, 'pdf_artifact_cache', PDFArtifactCache(str(tmp_path), max_bytes=0))
+    manager = ExportJobManager(max_workers=1)
+    job = manager.submit(make_job(), writer(b'%PDF-1.4 memory'))
+    wait_finished(job)
+    assert (job.path, job.pdf_bytes) == (None, b'%PDF-1.4 memory')
+
+
+def test_memory_results_are_capped(tmp_path, monkeypatch):
+    """内存中的结果总大小超过上限时丢弃最早的结果"""
+    monkeypatch.setattr(export_jobs_module, 'pdf_artifact_cache', PDFArtifactCache(str(tmp_path), max_bytes=0))
+    manager = ExportJobManager(max_workers=1, max_memory_bytes=20)
+    first = manager.submit(make_job(), writer(b'%PDF-1.4 first'))
+    wait_finished(first)
+    second = manager.submit(make_job(), writer(b'%PDF-1.4 second'))
+    wait_finished(second)
+    assert first.pdf_bytes is None and second.pdf_bytes == b'%PDF-1.4 second'
+    assert manager.stats()['memory_bytes'] == len(second.pdf_bytes)
+
+
+def test_result_stored_with_record_when_cache_disabled(tmp_path, monkeypatch):
+    """磁盘缓存关闭时结果写在任务记录旁边，其他进程可以下载，随记录一起清理"""
+    monkeypatch.setattr(export_jobs_module, 'pdf_artifact_cache', PDFArtifactCache(str(tmp_path), max_bytes=0))
+    job_dir = tmp_path / 'jobs'
+    manager = ExportJobManager(max_workers=1, retention=1, job_dir=str(job_dir))
+    job = manager.submit(make_job(), writer(b'%PDF-1.4 spooled'))
+    wait_finished(job)
+    assert job.pdf_bytes is None and Path(job.path).read_bytes() == b'%PDF-1.4 spooled'
+    assert ExportJobManager(job_dir=str(job_dir)).get(job.id).path == job.path
+
+    os.utime(job_dir / f'{job.id}.json', (1000, 1000))
+    manager.add_finished(make_job(), str(job_dir / 'other.pdf'))
+    assert not Path(job.path).exists()
+
+
+def test_rejects_when_queue_is_full(artifact_cache):
+    """未完成的任务达到上限时拒绝新任务，完成后恢复"""
+    release = threading.Event()
+    manager = ExportJobManager(max_workers=1, max_pending=1)
+    job = manager.submit(make_job(), writer(b'%PDF', wait=release))
+    with pytest.raises(ExportQueueFull):
+        manager.submit(make_job('other'), writer(b'%PDF'))
+    release.set()
+    wait_finished(job)
+    while manager.stats()['pending']:
+        time.sleep(0.001)
+    manager.submit(make_job('other'), writer(b'%PDF'))
+    assert manager.stats()['rejected'] == 1
+
+
+def test_finished_job_registered_directly(artifact_cache):
+    manager = ExportJobManager()
+    path = artifact_cache.put('key', b'%PDF')
+    job = manager.add_finished(make_job(), path)
+    assert manager.get(job.id).status == JOB_DONE and job.path == path
+
+
+def test_job_visible_to_other_process_manager(artifact_cache, tmp_path):
+    """任务记录写入共享目录，另一个进程的管理器可以查询状态和结果路径"""
+    job_dir = str(tmp_path / 'jobs')
+    manager = ExportJobManager(max_workers=1, job_dir=job_dir)
+    job = manager.submit(make_job(), writer(b'%PDF-1.4 shared'))
+    wait_finished(job)
+    while manager.stats()['pending']:
+        time.sleep(0.001)
+
+    other = ExportJobManager(job_dir=job_dir).get(job.id)
+    assert other is not job
+    assert other.to_dict() == job.to_dict()
+    assert (other.path, other.user_id, other.client_id, other.artifact_key) == (job.path, 'user-1', 'client_1', 'key')
+    assert ExportJobManager(job_dir=job_dir).get('../' + job.id) is None
+
+
+def test_shared_records_are_pruned(artifact_cache, tmp_path):
+    job_dir = tmp_path / 'jobs'
+    manager = ExportJobManager(retention=2, job_dir=str(job_dir))
+    jobs = [manager.add_finished(make_job(), artifact_cache.put('key', b'%PDF')) for _ in range(2)]
+    for age, job in enumerate(jobs):
+        os.utime(job_dir / f'{job.id}.json', (1000 + age, 1000 + age))
+    manager.add_finished(make_job(), artifact_cache.get('key'))
+    assert len(list(job_dir.glob('*.json'))) == 2
+    assert ExportJobManager(job_dir=str(job_dir)).get(jobs[0].id) is None
+
+
+def test_export_notification_only_reaches_owner():
+    """导出完成通知只推送给提交任务的用户自己的连接，client_id 不能指向其他用户的连接"""
+    from routes.notification_routes import NotificationService, event_queues
+    owner = NotificationService.add_client('client_owner', 'user-1')
+    other = NotificationService.add_client('client_other', 'user-2')
+    stolen = NotificationService.add_client('client_owner')
+    try:
+        assert stolen != owner
+        assert NotificationService.send_user_event('user-1', 'export_finished', {}, client_id=other) == 0
+        assert NotificationService.send_user_event(None, 'export_finished', {}) == 0
+        assert NotificationService.send_user_event('user-1', 'export_finished', {}) == 1
+        assert event_queues[owner].qsize() == 1
+        assert event_queues[other].qsize() == event_queues[stolen].qsize() == 0
+    finally:
+        for client_id in (owner, other, stolen):
+            NotificationService.remove_client(client_id)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+测试字体延迟注册和内存映射加载
+"""
+
+import io
+import mmap
+from pathlib import Path
+
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from services.font_loader import load_ttfont
+from services.pdf_generator import ResumePDFGenerator
+
+# 仓库中的简体字体文件未随代码提交，测试使用同一字族的繁体字体
+FONT_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'fonts' / 'HarmonyOS Sans' / 'HarmonyOS_Sans_TC'
+FONT_PATH = FONT_DIR / 'HarmonyOS_Sans_TC_Regular.ttf'
+SAMPLE_TEXT = '高级软件工程师 | ABC科技公司 | 2020.01 - 至今 Python'
+
+
+def _render(font):
+    """用指定字体渲染一段文字，返回PDF字节"""
+    pdfmetrics.registerFont(font)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, invariant=1)
+    pdf.setFont(font.fontName, 12)
+    pdf.drawString(72, 720, SAMPLE_TEXT)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def test_font_data_is_memory_mapped(monkeypatch):
+    """开启 FONT_MMAP 后字体数据以只读映射保留，渲染结果与整文件读取一致"""
+    monkeypatch.setenv('FONT_MMAP', '1')
+    mapped = load_ttfont('MmapTest-A', str(FONT_PATH))
+    assert isinstance(mapped.face._ttf_data, mmap.mmap)
+
+    monkeypatch.setenv('FONT_MMAP', '0')
+    plain = load_ttfont('MmapTest-B', str(FONT_PATH))
+    parsed = TTFont('MmapTest-C', str(FONT_PATH))
+    assert isinstance(plain.face._ttf_data, bytes)
+    assert mapped.face.charWidths == parsed.face.charWidths
+    assert _render(mapped) == _render(plain)
+
+
+def test_generator_registers_fonts_lazily():
+    """创建生成器时不注册字体，首次使用样式时才注册"""
+    generator = ResumePDFGenerator()
+    assert 'styles' not in generator.__dict__
+    assert 'chinese_font' not in generator.__dict__
+
+    assert generator.styles['JobTitle'].fontName == generator.chinese_bold_font
+    assert 'styles' in generator.__dict__
+    assert generator.generate_pdf({'personal_info': {'name': '张三'}, 'sections': []}).startswith(b'%PDF')
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试字形宽度表与行数估算
+"""
+
+import math
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Paragraph
+from services.glyph_widths import glyph_width_table, count_lines
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator, ONEPAGE_RATIO_STEP
+from benchmark_parser import generate_resume
+
+generator = ResumePDFGenerator()
+parser = ResumeMarkdownParser()
+
+SAMPLES = [
+    '负责核心交易系统的架构设计与性能优化，带领团队完成微服务改造，接口平均延迟降低百分之四十',
+    'Led the migration of the billing pipeline to Kubernetes and reduced infrastructure cost by 30%',
+    '主导 Python 与 React 技术栈的数据平台建设，支撑日均千万级 API 调用，并推动 on-call 流程标准化',
+]
+
+
+def legacy_estimate_lines(text, available_width, font_size=10):
+    """原先按 0.6 倍字号估算字符宽度的实现"""
+    chars_per_line = int(available_width / (font_size * 0.6))
+    return max(1, sum(1 if len(line) <= chars_per_line else math.ceil(len(line) / chars_per_line)
+                      for line in text.split('\n')))
+
+
+def test_table_matches_string_width():
+    """宽度表与 pdfmetrics.stringWidth 结果一致，并按字号线性缩放"""
+    font_name = generator.chinese_font
+    table = glyph_width_table(font_name)
+    for text in SAMPLES:
+        assert math.isclose(table.text_width(text) * 9.5, pdfmetrics.stringWidth(text, font_name, 9.5))
+    assert glyph_width_table(font_name) is table
+
+
+def test_estimate_closer_to_actual_wrap_for_cjk():
+    """CJK文本的估算行数与 Paragraph 实际换行相差不超过一行，原先的估算明显偏少"""
+    style = generator.styles['ModernBodyText']
+    width = 200
+    for text in (SAMPLES[0] * 3, SAMPLES[2] * 2):
+        paragraph = Paragraph(text, style)
+        paragraph.wrap(width, 1000)
+        actual = len(paragraph.blPara.lines)
+        estimated = generator._estimate_text_lines(text, width, style.fontSize, style.fontName)
+        assert abs(estimated - actual) <= 1, (estimated, actual)
+        assert legacy_estimate_lines(text, width, style.fontSize) < actual - 1
+
+
+def test_count_lines_scales_with_font_size():
+    """字号越大行数越多，空文本按一行计"""
+    width = glyph_width_table(generator.chinese_font).text_width(SAMPLES[0])
+    assert count_lines((width,), 10, 200) <= count_lines((width,), 12, 200)
+    assert count_lines((0,), 10, 200) == 1
+
+
+def test_fit_ratio_estimate_is_close_to_search_result():
+    """估算出的初始比例不会过于保守：能放下时再大一个档位就放不下"""
+    data = parser.parse(generate_resume(3, 1, 'latin'))
+    ratio = generator._estimate_fit_ratio(data)
+    styles = generator._create_optimized_styles(ratio)
+    _, _, fits = generator._layout_onepage(data, styles, generator._optimized_margins(ratio))
+    next_ratio = ratio + ONEPAGE_RATIO_STEP
+    if fits and next_ratio <= 1.0:
+        styles = generator._create_optimized_styles(next_ratio)
+        _, _, next_fits = generator._layout_onepage(data, styles, generator._optimized_margins(next_ratio))
+        assert not next_fits
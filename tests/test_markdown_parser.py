@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+测试简历Markdown解析器
+"""
+
+import re
+import copy
+import time
+import random
+import threading
+
+from services.markdown_parser import ResumeMarkdownParser, MarkdownConverterPool, StreamingResumeParser, ENTRY_SECTION_TYPES
+from services.markdown_parser import extract_entries, section_entries, section_hash, strip_parser_version, PARSER_VERSION
+from services.dify_chatflow_service import DifyChatflowService, RESUME_COMPLETION_KEYWORDS, RESUME_SECTION_MARKERS
+from services.lru_cache import LRUCache
+
+SAMPLE_RESUME = """# 张三
+
+📧 zhangsan@example.com | 📱 138-0000-0000
+地址：北京市海淀区
+
+## 工作经历
+
+### 高级软件工程师 | ABC科技公司 | 2020.01 - 至今
+- 负责核心产品的架构设计和开发工作
+- 带领5人团队完成多个重要项目交付
+
+## 教育背景
+
+计算机科学与技术学士 | 清华大学 | 2014.09 至 2018.06
+
+主修课程：数据结构、算法设计
+
+## 技能特长
+* Python：精通
+* JavaScript：熟练
+"""
+
+_reference_parser = ResumeMarkdownParser()
+
+
+def legacy_parse(text):
+    """重构前的多次扫描实现，作为输出一致性的参照"""
+    text = text.strip()
+    info = {}
+    name_match = re.search(r'^#\s+(.+)$', text, re.MULTILINE)
+    if name_match:
+        info['name'] = name_match.group(1).strip()
+    email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', text)
+    if email_match:
+        info['email'] = email_match.group(1)
+    phone_match = re.search(r'(\+?[\d\s\-\(\)]{10,})', text)
+    if phone_match:
+        info['phone'] = phone_match.group(1).strip()
+    for pattern in [r'地址[:：]\s*(.+)', r'住址[:：]\s*(.+)', r'现居[:：]\s*(.+)']:
+        match = re.search(pattern, text)
+        if match:
+            info['address'] = match.group(1).strip()
+            break
+
+    sections = []
+    parts = re.split(r'^##\s+(.+)$', text, flags=re.MULTILINE)
+    for i in range(1, len(parts), 2):
+        title = parts[i].strip()
+        content = parts[i + 1].strip()
+        items = []
+        if '-' in content or '*' in content:
+            for item in re.findall(r'^[-*]\s+(.+)$', content, re.MULTILINE):
+                items.append({'type': 'list_item', 'content': item.strip()})
+        else:
+            for paragraph in [p.strip() for p in content.split('\n\n') if p.strip()]:
+                items.append({'type': 'paragraph', 'content': paragraph})
+        section = {
+            'title': title,
+            'content': content,
+            'type': _reference_parser._classify_section_type(title),
+            'items': items
+        }
+        # 条目记录和内容哈希是新增字段，旧实现中没有对应逻辑，沿用当前实现
+        if section['type'] in ENTRY_SECTION_TYPES:
+            section['entries'] = extract_entries(content)
+        section['hash'] = section_hash(section)
+        sections.append(section)
+
+    return {'personal_info': info, 'sections': sections, 'raw_markdown': text}
+
+
+def build_resume(section_count):
+    """生成指定章节数的简历文本"""
+    lines = ["# 张三", "", "📧 zhangsan@example.com | 📱 138-0000-0000", "地址：北京市海淀区", ""]
+    for i in range(section_count):
+        lines.extend([
+            f"## 工作经历 {i}",
+            "",
+            f"### 高级工程师 | 公司{i} | 2020.01 - 至今",
+            "- 负责核心产品的架构设计和开发工作，带领5人团队",
+            "- 使用Python、JavaScript等技术栈开发Web应用",
+            "- 实现了系统性能提升30%的优化方案",
+            ""
+        ])
+    return '\n'.join(lines)
+
+
+def build_stress_resume(size):
+    """生成约 size 字节、充满数字、日期和类似邮箱片段的简历，用于压力测试"""
+    header = ["# 压力测试", "📧 a@b.com | 📱 138 0000 0000 " + "1-" * 2000, "地址：" + "1" * 5000, ""]
+    line = "- 2019-2021 项目 123 456 789 0 (010) a.b.c.d@ 1.2.3.4.5.6 https://x" + "9" * 40
+    body = []
+    length = sum(len(part) for part in header)
+    index = 0
+    while length < size:
+        if index % 20 == 0:
+            body.append(f"## 经历 {index}")
+        body.append(line)
+        length += len(body[-1]) + 1
+        index += 1
+    return '\n'.join(header + body)
+
+
+def _time_parse(parser, text):
+    """返回单次解析耗时（秒）"""
+    start = time.perf_counter()
+    parser.parse(text)
+    return time.perf_counter() - start
+
+
+def test_parse_sample_resume():
+    """解析结果包含个人信息、部分和条目"""
+    data = ResumeMarkdownParser().parse(SAMPLE_RESUME)
+
+    assert data['personal_info'] == {
+        'name': '张三',
+        'email': 'zhangsan@example.com',
+        'phone': '138-0000-0000',
+        'address': '北京市海淀区',
+        'emails': ['zhangsan@example.com'],
+        'phones': ['138-0000-0000']
+    }
+    assert [s['type'] for s in data['sections']] == ['experience', 'education', 'skills']
+    assert data['sections'][0]['items'][1]['content'] == '带领5人团队完成多个重要项目交付'
+    assert [i['type'] for i in data['sections'][1]['items']] == ['paragraph', 'paragraph']
+    assert data['raw_markdown'] == SAMPLE_RESUME.strip()
+
+
+def test_entries_extracted_for_experience_sections():
+    """经历、教育、项目部分在解析时拆分为条目记录，其他部分没有条目"""
+    data = ResumeMarkdownParser().parse(SAMPLE_RESUME + """
+## 项目经验
+
+简介段落
+
+### **智能简历系统** | 2021.03 - 2021.12
+- 设计解析器
+- 实现PDF导出
+主导架构 | 团队5人 | 2022
+""")
+    experience, education, skills, projects = data['sections']
+
+    assert experience['entries'] == [{
+        'title': '高级软件工程师',
+        'organization': 'ABC科技公司',
+        'date_range': '2020.01 - 至今',
+        'bullets': ['负责核心产品的架构设计和开发工作', '带领5人团队完成多个重要项目交付'],
+        'description': []
+    }]
+    assert education['entries'][0]['organization'] == '清华大学'
+    assert education['entries'][0]['description'] == ['主修课程：数据结构、算法设计']
+    assert 'entries' not in skills
+    assert [(e['title'], e['organization'], e['date_range']) for e in projects['entries']] == [
+        ('', '', ''), ('**智能简历系统**', '', '2021.03 - 2021.12'), ('主导架构', '团队5人', '2022')
+    ]
+    assert projects['entries'][0]['description'] == ['简介段落']
+    assert projects['entries'][1]['bullets'] == ['设计解析器', '实现PDF导出']
+
+    # 旧数据没有条目记录时从正文或条目列表即时提取
+    assert section_entries({k: v for k, v in experience.items() if k != 'entries'}) == experience['entries']
+    assert section_entries({'items': experience['items']})[0]['bullets'] == experience['entries'][0]['bullets']
+
+
+def test_table_rows_are_not_entry_headings():
+    """Markdown 表格的行和分隔行归入描述，不拆成条目"""
+    entries = extract_entries("""### 后端工程师 | ABC科技公司 | 2020 - 至今
+- 负责支付系统
+| 指标 | 优化前 | 优化后 |
+|---|:---:|---:|
+| 延迟 | 120ms | 40ms |
+""")
+    assert [(e['title'], e['organization'], e['date_range']) for e in entries] == [
+        ('后端工程师', 'ABC科技公司', '2020 - 至今')
+    ]
+    assert entries[0]['bullets'] == ['负责支付系统']
+    assert entries[0]['description'] == ['| 指标 | 优化前 | 优化后 |\n|---|:---:|---:|\n| 延迟 | 120ms | 40ms |']
+
+
+def test_address_priority_within_line():
+    """同一行出现多个地址标签时仍按 地址 > 住址 > 现居 取值"""
+    data = ResumeMarkdownParser().parse("# 李四\n住址：上海 地址：北京\n现居：杭州")
+    assert data['personal_info']['address'] == '北京'
+
+
+def test_multiple_contacts_in_header():
+    """页眉中的多个邮箱、电话和链接按出现顺序去重保留"""
+    data = ResumeMarkdownParser().parse(
+        "# 王五\n"
+        "📧 wang@example.com / wang.work@corp.example.cn | 📱 +86 138-0000-0000 | (010) 6275-1234\n"
+        "主页：https://wang.dev。GitHub：[wang](https://github.com/wang) wang@example.com\n"
+        "2016-2020 北京大学\n"
+        "## 项目经历\n"
+        "- 联系 other@example.com 13900000000 https://example.com/project\n"
+    )
+    info = data['personal_info']
+
+    assert info['email'] == 'wang@example.com'
+    assert info['emails'] == ['wang@example.com', 'wang.work@corp.example.cn']
+    assert info['phone'] == '+86 138-0000-0000'
+    assert info['phones'] == ['+86 138-0000-0000', '(010) 6275-1234']
+    assert info['urls'] == ['https://wang.dev', 'https://github.com/wang']
+
+
+def test_contacts_in_personal_info_section():
+    """联系方式写在“个人信息”部分时同样能提取，其他部分中的号码不会被误认"""
+    data = ResumeMarkdownParser().parse(
+        "# 赵六\n\n"
+        "## 工作经历\n- 2019-2021 客服热线 400-800-8888\n\n"
+        "## 个人信息\n- 邮箱：zhao@example.com\n- 电话：13811112222\n- 地址：杭州市西湖区\n"
+    )
+    assert data['personal_info'] == {
+        'name': '赵六',
+        'email': 'zhao@example.com',
+        'phone': '13811112222',
+        'address': '杭州市西湖区',
+        'emails': ['zhao@example.com'],
+        'phones': ['13811112222']
+    }
+
+
+def test_contact_extraction_is_linear():
+    """数字密集的大文档解析耗时随长度线性增长"""
+    parser = ResumeMarkdownParser()
+    small = build_stress_resume(256 * 1024)
+    large = build_stress_resume(1024 * 1024)
+
+    small_cost = min(_time_parse(parser, small) for _ in range(3)) / len(small)
+    large_cost = min(_time_parse(parser, large) for _ in range(3)) / len(large)
+    assert large_cost < small_cost * 3
+
+
+def test_matches_legacy_output():
+    """随机拼装的文档与旧实现的部分切分一致"""
+    fragments = [
+        '#', '##', '# 张三', '## 工作经历', '## 教育', '### 子标题', '-', '- 条目', '* 星号',
+        '  - 缩进', '', ' ', '地址：北京', '住址: 上海', '现居：', 'a@b.com', '138 0000 0000',
+        '2020 - 2021', '普通文本', '**加粗**', '---', '## ', '1. 编号'
+    ]
+    parser = ResumeMarkdownParser()
+    rng = random.Random(42)
+    for _ in range(5000):
+        text = '\n'.join(rng.choice(fragments) for _ in range(rng.randint(0, 15)))
+        data, expected = parser.parse(text), legacy_parse(text)
+        assert data['sections'] == expected['sections'], repr(text)
+        assert data['raw_markdown'] == expected['raw_markdown']
+
+    data, expected = parser.parse(build_resume(20)), legacy_parse(build_resume(20))
+    assert data['sections'] == expected['sections']
+    assert {k: data['personal_info'][k] for k in expected['personal_info']} == expected['personal_info']
+
+
+def test_parse_incremental_reuses_unchanged_sections():
+    """增量解析只重建有变化的部分，结果与完整解析一致"""
+    parser = ResumeMarkdownParser()
+    previous = parser.parse(SAMPLE_RESUME)
+    edited = SAMPLE_RESUME.replace('带领5人团队', '带领8人团队')
+
+    data = parser.parse_incremental(edited, previous)
+
+    assert data == parser.parse(edited)
+    assert data['sections'][0] is not previous['sections'][0]
+    assert data['sections'][1] is previous['sections'][1]
+    assert data['sections'][2] is previous['sections'][2]
+    assert parser.parse_incremental(edited, None) == parser.parse(edited)
+
+    # 旧版本保存的经历部分没有条目记录，不能直接复用
+    legacy = parser.parse(edited)
+    legacy['sections'] = [{k: v for k, v in section.items() if k != 'entries'} for section in legacy['sections']]
+    assert parser.parse_incremental(edited, legacy) == parser.parse(edited)
+
+
+def test_parse_incremental_reuses_only_parser_output():
+    """没有当前解析器版本标记的数据（客户端提供或旧数据）不复用，整体重新解析"""
+    parser = ResumeMarkdownParser()
+    previous = parser.parse(SAMPLE_RESUME)
+    assert previous['parser_version'] == PARSER_VERSION
+    edited = SAMPLE_RESUME.replace('带领5人团队', '带领8人团队')
+
+    for untrusted in (strip_parser_version(previous), dict(previous, parser_version=PARSER_VERSION - 1)):
+        forged = copy.deepcopy(untrusted)
+        forged['sections'][1]['type'] = 'other'
+        data = parser.parse_incremental(edited, forged)
+        assert data == parser.parse(edited)
+        assert data['sections'][1] is not forged['sections'][1]
+
+
+def test_incremental_parse_does_not_poison_cache():
+    """增量解析复用了调用方数据中的部分时，结果不写入共享缓存"""
+    parser = ResumeMarkdownParser(cache=LRUCache(max_entries=8, name='test'))
+    expected = ResumeMarkdownParser().parse(SAMPLE_RESUME)
+    forged = copy.deepcopy(expected)
+    forged['sections'][0]['type'] = 'other'
+    forged['sections'][0]['items'] = [{'type': 'paragraph', 'content': '伪造的条目'}]
+
+    parser.parse_incremental(SAMPLE_RESUME, forged)
+
+    assert parser.parse(SAMPLE_RESUME) == expected
+    assert parser.parse(SAMPLE_RESUME)['sections'][0]['type'] == 'experience'
+
+
+def test_parse_cache_hits_and_eviction():
+    """相同内容命中缓存，超出容量后淘汰最久未使用的条目"""
+    cache = LRUCache(max_entries=2, name='test')
+    parser = ResumeMarkdownParser(cache=cache)
+
+    first = parser.parse(SAMPLE_RESUME)
+    assert parser.parse('  ' + SAMPLE_RESUME + '\n') is first
+    parser.parse('# A')
+    parser.parse('# B')
+    assert parser.parse(SAMPLE_RESUME) is not first
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (1, 4, 2, 2)
+
+
+def _random_chunks(text, rng):
+    """把文本切成随机长度的分块，模拟Dify流式输出"""
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 12)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def test_streaming_parser_matches_parse():
+    """任意切分的分块流式解析结果与一次性解析一致"""
+    fragments = ['# 张三', '## 工作经历', '## 教育', '##', '###  子标题', '- 条目', '* 星号', '',
+                 ' ', '普通文本', 'a@b.com', '地址：北京', '## 个人信息', '---']
+    parser = ResumeMarkdownParser()
+    rng = random.Random(9)
+    documents = [SAMPLE_RESUME, build_resume(15)]
+    documents += ['\n'.join(rng.choice(fragments) for _ in range(rng.randint(0, 20))) for _ in range(2000)]
+    for text in documents:
+        stream = StreamingResumeParser(parser)
+        for chunk in _random_chunks(text, rng):
+            stream.feed(chunk)
+        assert stream.text == text
+        assert stream.finish() == parser.parse(text), repr(text)
+
+
+def test_streaming_parser_finishes_sections_early():
+    """下一个H2标题到达时上一个部分立即构建，结束时复用"""
+    parser = ResumeMarkdownParser()
+    stream = StreamingResumeParser(parser)
+    assert stream.feed("# 张三\n## 工作经历\n- 负责架构设计\n") == []
+    assert stream.feed("## 教育") == []
+
+    finished = stream.feed("背景\n")
+    assert [section['title'] for section in finished] == ['工作经历']
+    assert finished[0]['items'] == [{'type': 'list_item', 'content': '负责架构设计'}]
+
+    stream.feed("计算机科学学士")
+    data = stream.finish()
+    assert data['sections'][0] is finished[0]
+    assert data == parser.parse(stream.text)
+
+
+def test_streaming_completion_matches_service_check():
+    """流式完成检测与 DifyChatflowService._is_resume_complete 一致，关键词跨分块也能识别"""
+    service = DifyChatflowService()
+    keywords = RESUME_COMPLETION_KEYWORDS + RESUME_SECTION_MARKERS
+    pieces = ['您的简历', '已经准备好了', 'Resume ', 'Generated', '## 工作经历', '# 张三', '## 其他',
+              '继续补充', '已完', '成', '\n']
+    rng = random.Random(3)
+    for _ in range(2000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 6)))
+        stream = StreamingResumeParser(ResumeMarkdownParser(), completion_keywords=keywords)
+        for chunk in _random_chunks(text, rng):
+            stream.feed(chunk)
+        assert stream.completion_detected == service._is_resume_complete({'answer': text, 'metadata': {}}), repr(text)
+
+
+def test_converter_pool_resets_between_conversions():
+    """转换器归还前重置，上一份文档的脚注不会混入下一份"""
+    pool = MarkdownConverterPool(max_idle=1, extensions=['extra'])
+    pool.convert('正文[^1]\n\n[^1]: 上一份简历的脚注')
+    assert '脚注' not in pool.convert('其他内容')
+
+
+def test_markdown_to_html_is_thread_safe():
+    """多线程并发转换时每个线程得到各自正确的结果"""
+    parser = ResumeMarkdownParser()
+    expected = {i: parser.markdown_to_html(f"## 标题{i}\n\n- 条目{i}") for i in range(8)}
+    errors = []
+
+    def worker(i):
+        for _ in range(50):
+            if parser.markdown_to_html(f"## 标题{i}\n\n- 条目{i}") != expected[i]:
+                errors.append(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试智能一页的排版测量与压缩比例查找
+"""
+
+import io
+import re
+import threading
+
+import pytest
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator, ONEPAGE_SEARCH_STEPS, ONEPAGE_RATIO_LEVELS, ratio_level
+from benchmark_parser import generate_resume
+
+parser = ResumeMarkdownParser()
+generator = ResumePDFGenerator()
+
+
+def page_count(pdf_bytes):
+    """PDF页数（ReportLab 输出的页面树对象未压缩）"""
+    return int(re.search(rb'/Count (\d+)', pdf_bytes).group(1))
+
+
+def resume_data(section_count, language='cjk', seed=3):
+    return parser.parse(generate_resume(seed, section_count, language))
+
+
+def test_measured_height_matches_layout():
+    """测量高度与 doc.build 实际排版一致：框架高度恰好等于测量高度时排成一页，少1pt就换页"""
+    data = resume_data(1)
+    styles = generator._create_optimized_styles(0.6)
+    margins = generator._optimized_margins(0.6)
+    frame_width, _ = generator._frame_size(margins)
+    height = generator._measure_story(generator._build_story(data, styles, smart_onepage=True), frame_width, A4[1])
+    assert height < A4[1] - margins['top'] - 12
+
+    for shortfall, expected_pages in ((0, 1), (1, 2)):
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=margins['left'], rightMargin=margins['right'],
+                                topMargin=margins['top'],
+                                bottomMargin=A4[1] - margins['top'] - 12 - height + shortfall)
+        doc.build(generator._build_story(data, styles, smart_onepage=True))
+        assert page_count(buffer.getvalue()) == expected_pages, (height, shortfall)
+
+
+def test_smart_onepage_always_one_page():
+    """不同长度和语言的简历在智能一页模式下都只有一页"""
+    for language in ('cjk', 'latin', 'mixed'):
+        for section_count in (1, 3, 5, 8, 20):
+            pdf = generator.generate_pdf(resume_data(section_count, language), smart_onepage=True)
+            assert page_count(pdf) == 1, (language, section_count)
+
+
+def test_build_called_once(monkeypatch):
+    """查找过程只做测量，文档只构建一次"""
+    calls = []
+    original_build = SimpleDocTemplate.build
+    monkeypatch.setattr(SimpleDocTemplate, 'build', lambda self, story, **kwargs: (calls.append(1), original_build(self, story, **kwargs)))
+
+    passes = []
+    original_layout = generator._layout_onepage
+    monkeypatch.setattr(generator, '_layout_onepage', lambda *args: (passes.append(1), original_layout(*args))[1])
+
+    generator.generate_pdf(resume_data(5), smart_onepage=True)
+    assert len(calls) == 1
+    assert 1 < len(passes) <= ONEPAGE_SEARCH_STEPS + 2
+
+
+def test_short_resume_keeps_default_styles():
+    """内容本来就能放进一页时不压缩"""
+    data = {'personal_info': {'name': '张三'}, 'sections': [
+        {'title': '技能', 'type': 'skills', 'items': [{'type': 'list_item', 'content': 'Python'}]}]}
+    styles, margins, _ = generator._fit_to_one_page(data)
+    assert styles is generator.styles
+    assert margins == generator.default_margins
+
+
+def test_ratios_are_quantized():
+    """比例向下取到档位，超出范围时取最近的档位"""
+    assert ONEPAGE_RATIO_LEVELS[0] == 0.55 and ONEPAGE_RATIO_LEVELS[-1] == 1.0
+    assert ONEPAGE_RATIO_LEVELS[ratio_level(0.8)] == 0.8
+    assert ONEPAGE_RATIO_LEVELS[ratio_level(0.8249)] == 0.8
+    assert ratio_level(0.1) == 0
+    assert ratio_level(1.3) == len(ONEPAGE_RATIO_LEVELS) - 1
+
+
+def test_optimized_styles_are_cached_and_read_only():
+    """同一档位的比例共享同一份只读样式表，多线程下也只有一份"""
+    fresh = ResumePDFGenerator()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fresh._create_optimized_styles(0.71)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(styles is results[0] for styles in results)
+    assert fresh._create_optimized_styles(0.72) is results[0]
+    assert fresh._create_optimized_styles(0.73) is not results[0]
+    with pytest.raises(TypeError):
+        results[0]['BulletPoint'] = None
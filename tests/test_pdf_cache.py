@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试PDF导出结果的磁盘缓存
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from services.pdf_cache import PDFArtifactCache, spool_pdf
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def test_put_and_get(tmp_path):
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=1024)
+    key = cache.artifact_key(1, UPDATED_AT, 'reportlab', False, 1)
+    assert cache.get(key) is None
+
+    path = cache.put(key, b'%PDF-1.4 test')
+    assert cache.get(key) == path
+    assert Path(path).read_bytes() == b'%PDF-1.4 test'
+    assert (cache.stats()['hits'], cache.stats()['misses'], cache.stats()['size']) == (1, 1, 1)
+
+
+def test_key_covers_every_field():
+    """任何一个字段变化都得到不同的键"""
+    base = (1, UPDATED_AT, 'reportlab', False, 1)
+    variants = [
+        (2, UPDATED_AT, 'reportlab', False, 1),
+        (1, datetime(2024, 5, 1, 12, 0, 1), 'reportlab', False, 1),
+        (1, UPDATED_AT, 'html', False, 1),
+        (1, UPDATED_AT, 'reportlab', True, 1),
+        (1, UPDATED_AT, 'reportlab', False, 2),
+    ]
+    keys = {PDFArtifactCache.artifact_key(*args) for args in [base] + variants}
+    assert len(keys) == len(variants) + 1
+    assert PDFArtifactCache.artifact_key(*base) == PDFArtifactCache.artifact_key(*base)
+
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    """总大小超出上限时淘汰最久未使用的文件，刚读取过的文件保留"""
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=350)
+    keys = [cache.artifact_key(i, UPDATED_AT, 'reportlab', False, 1) for i in range(3)]
+    for age, key in enumerate(keys):
+        path = cache.put(key, b'x' * 100)
+        os.utime(path, (1000 + age, 1000 + age))
+
+    cache.get(keys[0])  # 最早写入，但刚被读取
+    cache.put(cache.artifact_key(3, UPDATED_AT, 'reportlab', False, 1), b'x' * 100)
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()['bytes'] <= 350
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disabled_when_capacity_is_zero(tmp_path):
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=0)
+    key = cache.artifact_key(1, UPDATED_AT, 'reportlab', False, 1)
+    assert cache.put(key, b'%PDF') is None
+    assert cache.get(key) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_disabled_when_directory_is_shared(tmp_path):
+    """缓存目录可被其他用户写入时不读写缓存"""
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    cache = PDFArtifactCache(cache_dir=str(shared), max_bytes=1024)
+    assert not cache.enabled
+    assert cache.put(cache.artifact_key(1, UPDATED_AT, 'reportlab', False, 1), b'%PDF') is None
+    assert list(shared.iterdir()) == []
+
+
+def test_oversized_artifact_is_not_cached(tmp_path):
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=10)
+    assert cache.put(cache.artifact_key(1, UPDATED_AT, 'reportlab', False, 1), b'x' * 11) is None
+
+
+def test_store_writes_in_place(tmp_path):
+    """store 让生成器直接写缓存目录中的临时文件，完成后原子替换"""
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=1024)
+    key = cache.artifact_key(1, UPDATED_AT, 'reportlab', False, 1)
+    written = []
+
+    def write(path):
+        assert Path(path).parent == tmp_path
+        written.append(path)
+        Path(path).write_bytes(b'%PDF-1.4 store')
+
+    path = cache.store(key, write)
+    assert cache.get(key) == path and Path(path).read_bytes() == b'%PDF-1.4 store'
+    assert not Path(written[0]).exists()
+
+
+def test_store_removes_partial_file_on_error(tmp_path):
+    cache = PDFArtifactCache(cache_dir=str(tmp_path), max_bytes=1024)
+
+    def write(path):
+        Path(path).write_bytes(b'%PDF-1.4 partial')
+        raise RuntimeError('渲染失败')
+
+    with pytest.raises(RuntimeError):
+        cache.store('key', write)
+    assert not list(tmp_path.iterdir())
+
+
+def test_spool_returns_unlinked_file():
+    """缓存关闭时生成到临时文件，返回的句柄可读，文件本身已删除"""
+    paths = []
+
+    def write(path):
+        paths.append(path)
+        Path(path).write_bytes(b'%PDF-1.4 spool')
+
+    with spool_pdf(write) as pdf_file:
+        assert not Path(paths[0]).exists()
+        assert pdf_file.read() == b'%PDF-1.4 spool'
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试 Markdown 到 ReportLab 标记的单次扫描转换
+"""
+
+import re
+import random
+
+from services.markdown_parser import ResumeMarkdownParser, section_entries
+from services.pdf_markup import MarkupConverter
+from services.pdf_generator import ResumePDFGenerator
+from benchmark_parser import build_corpus, CJK_WORDS, LATIN_WORDS
+
+REGULAR, BOLD, MEDIUM = 'Regular', 'Bold', 'Medium'
+converter = MarkupConverter(REGULAR, BOLD, MEDIUM)
+
+
+def legacy_clean_markdown(text):
+    """重构前逐条 re.sub 的实现"""
+    if not text:
+        return ""
+    text = re.sub(r'^#+\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\*\*(.*?)\*\*', rf'<font name="{BOLD}">\1</font>', text)
+    text = re.sub(r'(?<!\*)\*([^*]+?)\*(?!\*)', rf'<font name="{MEDIUM}">\1</font>', text)
+    text = re.sub(r'_([^_]+?)_', rf'<font name="{MEDIUM}">\1</font>', text)
+    text = re.sub(r'`([^`]+?)`', rf'<font name="{REGULAR}" backColor="#f5f5f5">\1</font>', text)
+    text = re.sub(r'\[([^\]]+?)\]\([^)]*?\)', r'\1', text)
+    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^>\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+    text = re.sub(r'^[，。；：！？、]+', '', text, flags=re.MULTILINE)
+    return text.strip()
+
+
+def corpus_texts():
+    """基准语料解析后交给PDF渲染的全部文本：姓名、标题、内容项和条目字段"""
+    parser = ResumeMarkdownParser()
+    texts = set()
+    for _, markdown_text in build_corpus(2024):
+        data = parser.parse(markdown_text)
+        texts.add(data['personal_info'].get('name', ''))
+        for section in data['sections']:
+            texts.add(section['title'])
+            texts.update(item['content'] for item in section['items'])
+            for entry in section_entries(section):
+                texts.update([entry['title'], entry['organization'], entry['date_range']])
+                texts.update(entry['bullets'] + entry['description'])
+    return texts
+
+
+def long_cjk_bullets(count=200, seed=5):
+    """带少量行内标记的长中文要点（标记之间至少隔一个词）"""
+    rng = random.Random(seed)
+    bullets = []
+    for _ in range(count):
+        words = [rng.choice(CJK_WORDS) for _ in range(rng.randint(60, 160))]
+        for index in rng.sample(range(0, len(words), 2), rng.randint(0, 3)):
+            words[index] = rng.choice(['**{}**', '*{}*', '`{}`', '[{}](https://example.com)']).format(
+                rng.choice(LATIN_WORDS))
+        bullets.append('- ' + '，'.join(''.join(words[i:i + 8]) for i in range(0, len(words), 8)) + '。')
+    return bullets
+
+
+def test_matches_legacy_on_corpus():
+    """渲染用到的文本转换结果与原实现一致"""
+    for text in corpus_texts() | set(long_cjk_bullets(50)):
+        assert converter.convert(text) == legacy_clean_markdown(text), repr(text)
+
+
+def test_rules():
+    cases = {
+        '## 标题': '标题',
+        '- **Python** 熟练': f'<font name="{BOLD}">Python</font> 熟练',
+        '  1. 第一项': '第一项',
+        '> 引用内容': '引用内容',
+        '---': '',
+        'a\n\n\n\nb': 'a\n\nb',
+        '，开头标点': '开头标点',
+        '`code`与[链接](https://example.com)': f'<font name="{REGULAR}" backColor="#f5f5f5">code</font>与链接',
+        '*斜体* 和 _下划线_': f'<font name="{MEDIUM}">斜体</font> 和 <font name="{MEDIUM}">下划线</font>',
+        '**粗 *斜* 体**': f'<font name="{BOLD}">粗 <font name="{MEDIUM}">斜</font> 体</font>',
+        '[**加粗链接**](https://example.com)': f'<font name="{BOLD}">加粗链接</font>',
+        '': '',
+    }
+    for text, expected in cases.items():
+        assert converter.convert(text) == expected, text
+
+
+def test_list_markers_do_not_become_italics():
+    """多行列表的 * 标记直接去除（原实现会把相邻两行的 * 当作斜体）"""
+    assert converter.convert('* 第一项\n* 第二项') == '第一项\n第二项'
+
+
+def test_each_text_converted_once_per_render(monkeypatch):
+    """一次渲染中同一段文本只转换一次，包括智能一页的多轮排版"""
+    generator = ResumePDFGenerator()
+    generator.styles  # 注册字体
+    calls = []
+    original_convert = generator._markup_converter.convert
+    monkeypatch.setattr(generator._markup_converter, 'convert',
+                        lambda text: (calls.append(text), original_convert(text))[1])
+
+    data = ResumeMarkdownParser().parse(build_corpus(7)[2][1])
+    generator.generate_pdf(data, smart_onepage=True)
+    assert calls and len(calls) == len(set(calls))
+
+    # 渲染结束后释放本次的转换结果
+    assert generator._render_state.markup is None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试保存后的后台预渲染
+"""
+
+import time
+import threading
+from pathlib import Path
+
+from services.prerender import PreRenderScheduler, parse_variants
+from services.render_pool import RenderPoolBusy
+
+VARIANTS = [('key-a', 'reportlab', False), ('key-b', 'reportlab', True)]
+
+
+class RecordingRenderer:
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def __call__(self, generator_name, structured_data, smart_onepage, output_path):
+        self.calls.append((generator_name, structured_data['version'], smart_onepage))
+        with open(output_path, 'wb') as f:
+            f.write(b'%PDF-1.4 prerender')
+        if len(self.calls) >= len(VARIANTS):
+            self.done.set()
+
+
+def test_parse_variants():
+    assert parse_variants('reportlab, reportlab+onepage,html') == [
+        ('reportlab', False), ('reportlab', True), ('html', False)]
+    assert parse_variants('') == []
+
+
+def test_burst_of_saves_renders_once(artifact_cache):
+    """去抖时间内的多次保存只渲染最后一次的内容"""
+    scheduler = PreRenderScheduler(enabled=True, debounce_seconds=0.05)
+    render = RecordingRenderer()
+    for version in range(5):
+        scheduler.schedule(1, {'version': version}, VARIANTS, render)
+    assert render.done.wait(5)
+    time.sleep(0.1)
+
+    assert render.calls == [('reportlab', 4, False), ('reportlab', 4, True)]
+    assert Path(artifact_cache.get('key-a')).read_bytes() == b'%PDF-1.4 prerender'
+    assert artifact_cache.get('key-b')
+    stats = scheduler.stats()
+    assert (stats['scheduled'], stats['coalesced'], stats['rendered'], stats['pending']) == (5, 4, 2, 0)
+
+
+def test_skips_cached_and_busy_variants(artifact_cache):
+    """已缓存的版本不重复渲染，进程池繁忙时跳过"""
+    artifact_cache.put('key-a', b'%PDF')
+    calls = []
+
+    def busy(generator_name, structured_data, smart_onepage, output_path):
+        calls.append(smart_onepage)
+        raise RenderPoolBusy('busy')
+
+    scheduler = PreRenderScheduler(enabled=True, debounce_seconds=0)
+    scheduler.schedule(1, {'version': 0}, VARIANTS, busy)
+    deadline = time.monotonic() + 5
+    while scheduler.stats()['skipped'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert calls == [True]
+    assert (scheduler.stats()['skipped'], scheduler.stats()['rendered']) == (2, 0)
+    assert artifact_cache.get('key-b') is None
+
+
+def test_disabled_does_nothing(artifact_cache):
+    scheduler = PreRenderScheduler(enabled=False, debounce_seconds=0)
+    render = RecordingRenderer()
+    scheduler.schedule(1, {'version': 0}, VARIANTS, render)
+    time.sleep(0.05)
+    assert render.calls == [] and scheduler.stats()['scheduled'] == 0
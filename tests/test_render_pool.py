@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+测试PDF渲染进程池
+"""
+
+import io
+import time
+import threading
+import contextlib
+
+import pytest
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator
+from services.render_pool import RenderPool, RenderPoolBusy, RenderTimeout
+from services.render_timing import collect_timings
+from test_markdown_parser import SAMPLE_RESUME
+
+RESUME_DATA = ResumeMarkdownParser().parse(SAMPLE_RESUME)
+
+
+def page_count(pdf_bytes):
+    return pdf_bytes.count(b'/Type /Page\n') or pdf_bytes.count(b'/Type /Page ')
+
+
+def test_render_matches_in_process():
+    """渲染进程输出的PDF与当前进程内生成的页数和大小一致，进程在任务之间复用"""
+    pool = RenderPool(workers=1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            local = ResumePDFGenerator().generate_pdf(RESUME_DATA, smart_onepage=True)
+        for _ in range(2):
+            pdf_bytes = pool.render('reportlab', RESUME_DATA, smart_onepage=True)
+            assert pdf_bytes.startswith(b'%PDF')
+            assert page_count(pdf_bytes) == page_count(local)
+            assert abs(len(pdf_bytes) - len(local)) < 200
+        stats = pool.stats()
+        assert (stats['live'], stats['completed'], stats['recycled']) == (1, 2, 0)
+    finally:
+        pool.shutdown()
+
+
+def test_render_to_output_path(tmp_path):
+    """指定输出路径时由渲染进程直接写文件，不经管道返回PDF内容"""
+    pool = RenderPool(workers=1)
+    try:
+        output_path = tmp_path / 'resume.pdf'
+        assert pool.render('reportlab', RESUME_DATA, output_path=str(output_path)) is None
+        assert output_path.read_bytes().startswith(b'%PDF')
+    finally:
+        pool.shutdown()
+
+
+def test_worker_timings_reach_caller(tmp_path):
+    """渲染进程内记录的阶段耗时并入调用线程的计时，另加等待进程和进程间通信的耗时"""
+    pool = RenderPool(workers=1)
+    try:
+        with collect_timings() as timings:
+            pool.render('reportlab', RESUME_DATA, output_path=str(tmp_path / 'resume.pdf'))
+        assert {'queue', 'styles', 'story', 'build', 'ipc'} <= set(timings.phases)
+        assert sum(timings.phases.values()) <= timings.total
+    finally:
+        pool.shutdown()
+
+
+def test_generator_error_is_reported():
+    """生成器异常以 RuntimeError 返回，进程继续可用"""
+    pool = RenderPool(workers=1)
+    try:
+        with pytest.raises(RuntimeError):
+            pool.render('unknown', RESUME_DATA)
+        assert pool.render('reportlab', RESUME_DATA).startswith(b'%PDF')
+        assert (pool.stats()['failed'], pool.stats()['live']) == (1, 1)
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_replaces_worker():
+    """超时的任务结束对应进程，之后的任务由新进程处理"""
+    pool = RenderPool(workers=1, job_timeout=0.01)
+    try:
+        with pytest.raises(RenderTimeout):
+            pool.render('reportlab', RESUME_DATA)
+        assert (pool.stats()['timeouts'], pool.stats()['live']) == (1, 0)
+        pool.job_timeout = 60
+        assert pool.render('reportlab', RESUME_DATA).startswith(b'%PDF')
+    finally:
+        pool.shutdown()
+
+
+def test_worker_recycled_after_max_jobs():
+    pool = RenderPool(workers=1, max_jobs_per_worker=1)
+    try:
+        for _ in range(2):
+            pool.render('reportlab', RESUME_DATA)
+        stats = pool.stats()
+        assert (stats['recycled'], stats['live'], stats['completed']) == (2, 0, 2)
+    finally:
+        pool.shutdown()
+
+
+def test_job_timeout_excludes_queue_wait():
+    """排队等待的时间不计入任务超时"""
+    pool = RenderPool(workers=1, queue_timeout=10)
+    try:
+        pool.render('reportlab', RESUME_DATA)  # 启动并预热进程
+        pool.job_timeout = 1
+        busy = pool._acquire(time.monotonic() + 1)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(pool.render('reportlab', RESUME_DATA)))
+        waiter.start()
+        time.sleep(1.2)
+        pool._release(busy)
+        waiter.join()
+        assert results[0].startswith(b'%PDF')
+        assert pool.stats()['timeouts'] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_dead_idle_worker_is_replaced():
+    """空闲期间退出的进程在取用时替换，任务不失败"""
+    pool = RenderPool(workers=1)
+    try:
+        pool.render('reportlab', RESUME_DATA)
+        pool._idle[0].process.kill()
+        pool._idle[0].process.join()
+        assert pool.render('reportlab', RESUME_DATA).startswith(b'%PDF')
+        stats = pool.stats()
+        assert (stats['restarted'], stats['failed'], stats['live']) == (1, 0, 1)
+    finally:
+        pool.shutdown()
+
+
+def test_retries_once_when_reused_worker_breaks():
+    """取用后才发现管道断开时换新进程重试一次"""
+    pool = RenderPool(workers=1)
+    try:
+        pool.render('reportlab', RESUME_DATA)
+        worker = pool._idle[0]
+        worker.process.kill()
+        worker.process.join()
+        worker.process.is_alive = lambda: True  # 模拟检查之后才退出
+        assert pool.render('reportlab', RESUME_DATA).startswith(b'%PDF')
+        stats = pool.stats()
+        assert (stats['restarted'], stats['failed'], stats['completed']) == (1, 0, 2)
+    finally:
+        pool.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    """进程都在忙且排队已满时立即拒绝"""
+    pool = RenderPool(workers=1, queue_limit=0)
+    try:
+        worker = threading.Thread(target=pool.render, args=('reportlab', RESUME_DATA))
+        worker.start()
+        while pool.stats()['busy'] == 0:
+            time.sleep(0.001)
+        with pytest.raises(RenderPoolBusy):
+            pool.render('reportlab', RESUME_DATA)
+        worker.join()
+        assert pool.stats()['rejected'] == 1
+    finally:
+        pool.shutdown()
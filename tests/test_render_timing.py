@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+测试PDF渲染分阶段计时
+"""
+
+import io
+import time
+import contextlib
+
+from services.markdown_parser import ResumeMarkdownParser
+from services.pdf_generator import ResumePDFGenerator
+from services.render_timing import RenderHistogram, RenderTimings, collect_timings, current_timings, phase
+from test_markdown_parser import SAMPLE_RESUME
+
+RESUME_DATA = ResumeMarkdownParser().parse(SAMPLE_RESUME)
+
+
+def test_phase_without_collector_is_noop():
+    assert current_timings() is None
+    with phase('build'):
+        pass
+    assert current_timings() is None
+
+
+def test_nested_phases_record_self_time():
+    """嵌套阶段只记自身耗时，各阶段之和不超过总耗时"""
+    with collect_timings() as timings:
+        with phase('analysis'):
+            time.sleep(0.01)
+            with phase('styles'):
+                time.sleep(0.02)
+    assert list(timings.phases) == ['styles', 'analysis']
+    assert 0.02 <= timings.phases['styles'] < 0.03
+    assert 0.01 <= timings.phases['analysis'] < 0.02
+    assert sum(timings.phases.values()) <= timings.total
+
+
+def test_inner_collector_merges_into_outer():
+    """内层收集结束后并入外层，外层正在进行的阶段不重复计入这部分耗时"""
+    with collect_timings() as outer:
+        with phase('cache'):
+            with collect_timings() as inner:
+                with phase('build'):
+                    time.sleep(0.01)
+    assert inner.phases['build'] >= 0.01
+    assert outer.phases['build'] == inner.phases['build']
+    assert outer.phases['cache'] < 0.005
+
+
+def test_reportlab_phases():
+    generator = ResumePDFGenerator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with collect_timings() as plain:
+            generator.generate_pdf(RESUME_DATA)
+        with collect_timings() as onepage:
+            generator.generate_pdf(RESUME_DATA, smart_onepage=True)
+    assert {'styles', 'story', 'build', 'output'} <= set(plain.phases)
+    assert 'analysis' not in plain.phases
+    assert {'styles', 'story', 'analysis', 'build', 'output'} <= set(onepage.phases)
+    header = onepage.server_timing()
+    assert header.startswith('styles;dur=') and header.endswith(f'total;dur={onepage.total * 1000:.1f}')
+
+
+def test_file_output_is_timed(tmp_path):
+    """直接写文件时，序列化和写出PDF同样计为 output"""
+    output_path = tmp_path / 'resume.pdf'
+    with contextlib.redirect_stdout(io.StringIO()):
+        with collect_timings() as timings:
+            ResumePDFGenerator().write_pdf(RESUME_DATA, str(output_path))
+    assert {'build', 'output'} <= set(timings.phases)
+    assert output_path.read_bytes().startswith(b'%PDF')
+
+
+def test_histogram_buckets_and_prometheus():
+    histogram = RenderHistogram(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.5):
+        timings = RenderTimings()
+        timings.add('build', seconds)
+        timings.total = seconds
+        histogram.observe('reportlab', timings)
+    build = histogram.stats()['reportlab']['build']
+    assert build['count'] == 3
+    assert build['buckets'] == {'0.01': 1, '0.1': 2, '+Inf': 3}
+    text = histogram.prometheus()
+    assert 'pdf_render_phase_seconds_bucket{generator="reportlab",phase="build",le="0.1"} 2' in text
+    assert 'pdf_render_phase_seconds_count{generator="reportlab",phase="total"} 3' in text
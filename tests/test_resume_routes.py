@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+测试简历导出接口（同步导出、异步导出任务、草稿质量、批量导出）
+"""
+
+import io
+import time
+import zipfile
+from urllib.parse import quote
+
+import pytest
+from models import db, Resume
+from routes import resume_routes
+from routes.notification_routes import NotificationService, event_queues
+from test_markdown_parser import SAMPLE_RESUME
+
+
+@pytest.fixture
+def make_resume(make_user):
+    """创建简历，不保存结构化数据（与只写入原文的旧数据相同）"""
+    def make(user, title='张三的简历', markdown=SAMPLE_RESUME, is_public=False):
+        resume = Resume(title=title, raw_markdown=markdown, user_id=user.id, is_public=is_public)
+        db.session.add(resume)
+        db.session.commit()
+        return resume.id
+    return make
+
+
+def wait_for_job(client, job_id, headers, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/exports/{job_id}', headers=headers).get_json()['job']
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('导出任务未在限定时间内完成')
+
+
+def test_pdf_etag_computed_after_reparse(client, make_user, make_resume):
+    """首次导出先补存解析结果再计算 ETag，之后的条件请求返回304，再次下载命中磁盘缓存"""
+    user, headers = make_user('alice')
+    resume_id = make_resume(user)
+    url = f'/api/resumes/{resume_id}/pdf'
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200 and first.data.startswith(b'%PDF')
+    assert 'cache;desc="hit"' not in first.headers['Server-Timing']
+    assert db.session.get(Resume, resume_id).structured_data
+    etag = first.headers['ETag']
+
+    not_modified = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['Server-Timing'] == 'cache;desc="not-modified"'
+
+    cached = client.get(url, headers=headers)
+    assert cached.status_code == 200 and cached.headers['ETag'] == etag
+    assert cached.headers['Server-Timing'] == 'cache;desc="hit"'
+    assert cached.data == first.data
+
+
+def test_pdf_requires_access(client, make_user, make_resume):
+    owner, _ = make_user('alice')
+    _, other_headers = make_user('bob')
+    resume_id = make_resume(owner)
+    assert client.get(f'/api/resumes/{resume_id}/pdf', headers=other_headers).status_code == 403
+    assert client.get(f'/api/resumes/{resume_id}/pdf').status_code == 403
+
+
+def test_draft_quality(client, make_user, make_resume):
+    """quality=draft 使用草稿生成器，文件名和 ETag 与正式质量不同，忽略智能一页；不支持的质量返回400"""
+    user, headers = make_user('alice')
+    url = f'/api/resumes/{make_resume(user)}/pdf'
+
+    full = client.get(url, headers=headers)
+    draft = client.get(url + '?quality=draft', headers=headers)
+    assert draft.status_code == 200 and draft.data.startswith(b'%PDF')
+    assert quote('_草稿') in draft.headers['Content-Disposition']
+    assert draft.headers['ETag'] != full.headers['ETag']
+    assert b'/FontFile' not in draft.data
+
+    # 草稿忽略智能一页参数，与普通草稿是同一份导出
+    draft_onepage = client.get(url + '?quality=draft&smart_onepage=true', headers=headers)
+    assert draft_onepage.headers['ETag'] == draft.headers['ETag']
+    assert quote('_智能一页') not in draft_onepage.headers['Content-Disposition']
+
+    assert client.get(url + '?quality=print', headers=headers).status_code == 400
+
+
+def test_export_job_lifecycle(client, make_user, make_resume):
+    """提交导出任务后轮询到完成并下载；内容未变时再次提交直接返回已完成的任务；其他用户不能查询"""
+    user, headers = make_user('alice')
+    _, other_headers = make_user('bob')
+    resume_id = make_resume(user)
+
+    submitted = client.post(f'/api/resumes/{resume_id}/exports', headers=headers,
+                            json={'generator': 'reportlab', 'smart_onepage': 'false'})
+    assert submitted.status_code == 202
+    job = wait_for_job(client, submitted.get_json()['job']['job_id'], headers)
+    assert job['status'] == 'done' and job['smart_onepage'] is False
+
+    download = client.get(job['download_url'], headers=headers)
+    assert download.status_code == 200 and download.data.startswith(b'%PDF')
+    assert download.headers['ETag']
+
+    again = client.post(f'/api/resumes/{resume_id}/exports', headers=headers, json={'generator': 'reportlab'})
+    assert again.status_code == 200 and again.get_json()['job']['status'] == 'done'
+
+    assert client.get(job['status_url'], headers=other_headers).status_code == 403
+    assert client.get('/api/exports/' + '0' * 32, headers=headers).status_code == 404
+    assert client.post(f'/api/resumes/{resume_id}/exports', headers=headers,
+                       json={'generator': 'latex'}).status_code == 400
+
+
+def test_export_notification_goes_to_submitter_only(client, make_user, make_resume):
+    """完成通知只推送给提交者自己的连接，请求体中的 client_id 不能指向其他用户的连接"""
+    owner, owner_headers = make_user('alice')
+    _, other_headers = make_user('bob')
+    resume_id = make_resume(owner, is_public=True)
+    owner_client = NotificationService.add_client('client_alice', owner.public_id)
+    try:
+        submitted = client.post(f'/api/resumes/{resume_id}/exports', headers=other_headers,
+                                json={'generator': 'reportlab', 'client_id': owner_client})
+        wait_for_job(client, submitted.get_json()['job']['job_id'], other_headers)
+        time.sleep(0.1)
+        assert event_queues[owner_client].empty()
+
+        submitted = client.post(f'/api/resumes/{resume_id}/exports', headers=owner_headers,
+                                json={'generator': 'reportlab', 'smart_onepage': True})
+        job = wait_for_job(client, submitted.get_json()['job']['job_id'], owner_headers)
+        event = event_queues[owner_client].get(timeout=5)
+        assert event['type'] == 'export_finished' and event['data']['job_id'] == job['job_id']
+    finally:
+        NotificationService.remove_client(owner_client)
+
+
+def test_bulk_export_lists_deleted_and_failed_resumes(client, make_user, make_resume, monkeypatch):
+    """校验之后被删除的简历和渲染失败的简历不中断ZIP，两者都列在「导出失败.txt」中"""
+    user, headers = make_user('alice')
+    good = make_resume(user, title='正常简历')
+    broken = make_resume(user, title='坏简历', markdown='# 坏简历\n\n## 工作经历\n- 渲染会失败')
+    deleted = make_resume(user, title='已删除简历')
+
+    render_artifact = resume_routes.render_pdf_artifact
+
+    def failing_render(key, generator_name, structured_data, smart_onepage):
+        if structured_data['personal_info'].get('name') == '坏简历':
+            raise RuntimeError('模拟渲染失败')
+        return render_artifact(key, generator_name, structured_data, smart_onepage)
+
+    monkeypatch.setattr(resume_routes, 'render_pdf_artifact', failing_render)
+
+    response = client.post('/api/resumes/export-bulk', headers=headers, json={'ids': [good, broken, deleted]})
+    assert response.status_code == 200 and response.is_streamed
+    # 权限校验已经通过，响应体开始生成之前删除一份简历
+    db.session.delete(db.session.get(Resume, deleted))
+    db.session.commit()
+
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.testzip() is None
+    names = archive.namelist()
+    assert names == [f'{good}_正常简历.pdf', '导出失败.txt']
+    assert archive.read(names[0]).startswith(b'%PDF')
+    manifest = archive.read('导出失败.txt').decode('utf-8').splitlines()
+    assert sorted(manifest) == sorted([f'{broken}_坏简历.pdf: 模拟渲染失败', f'{deleted}: 简历不存在或已被删除'])
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试简历部分类型分类器
+"""
+
+import random
+
+from services.section_classifier import SectionClassifier, section_classifier
+
+LEGACY_TABLE = [
+    ('education', ['教育', '学历', 'education']),
+    ('experience', ['工作', '经历', '职业', 'experience', 'work']),
+    ('skills', ['技能', 'skills', '专业技能']),
+    ('projects', ['项目', 'projects', '项目经验']),
+    ('certificates', ['证书', '认证', 'certificates']),
+]
+
+
+def legacy_classify(title, table=LEGACY_TABLE):
+    """重构前逐类型 any() 扫描的实现"""
+    title_lower = title.lower()
+    for section_type, keywords in table:
+        if any(keyword in title_lower for keyword in keywords):
+            return section_type
+    return 'other'
+
+
+def random_titles(count, seed=7):
+    """由原有关键词和干扰字符随机拼出的标题"""
+    pieces = [k for _, keywords in LEGACY_TABLE for k in keywords]
+    pieces += ['Work', 'SKILLS', 'Education', '与', ' & ', '个人', '总结', 'ab', '', '经', '历']
+    rng = random.Random(seed)
+    return [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 4))) for _ in range(count)]
+
+
+def test_matches_legacy_classification():
+    """原有关键词表下与旧实现结果一致，包括多个类型同时命中时的优先级"""
+    classifier = SectionClassifier(LEGACY_TABLE)
+    for title in random_titles(20000):
+        assert classifier.classify(title) == legacy_classify(title), repr(title)
+    assert classifier.classify('项目工作') == 'experience'
+
+
+def test_prefix_keywords_keep_priority():
+    """互为前缀的关键词属于不同类型时仍按类型优先级取值"""
+    assert SectionClassifier([('a', ['work']), ('b', ['workshop'])]).classify('Workshop') == 'a'
+    assert SectionClassifier([('b', ['workshop']), ('a', ['work'])]).classify('Workshop') == 'b'
+    assert SectionClassifier([('b', ['workshop']), ('a', ['work'])]).classify('Work') == 'a'
+
+
+def test_default_table_covers_new_languages():
+    """默认关键词表识别英文、日文、韩文标题"""
+    cases = {
+        'Education': 'education',
+        'Work Experience': 'experience',
+        'Technical Skills': 'skills',
+        'Projects': 'projects',
+        'Certifications': 'certificates',
+        '学歴': 'education',
+        '職務経歴': 'experience',
+        'スキル': 'skills',
+        'プロジェクト': 'projects',
+        '資格・免許': 'certificates',
+        '학력': 'education',
+        '경력 사항': 'experience',
+        '보유 기술': 'skills',
+        '프로젝트': 'projects',
+        '자격증': 'certificates',
+        '自我评价': 'other',
+    }
+    for title, expected in cases.items():
+        assert section_classifier.classify(title) == expected, title
+
+
+def test_classification_is_cached():
+    """相同标题第二次分类命中缓存"""
+    classifier = SectionClassifier(LEGACY_TABLE, cache_size=2)
+    classifier.classify('工作经历')
+    classifier.classify('工作经历')
+    stats = classifier.cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_keyword_table_from_file(tmp_path, monkeypatch):
+    """SECTION_KEYWORDS_FILE 指定的关键词表覆盖默认表"""
+    config = tmp_path / 'section_keywords.json'
+    config.write_text('[["awards", ["获奖", "awards"]], ["skills", ["技能"]]]', encoding='utf-8')
+    monkeypatch.setenv('SECTION_KEYWORDS_FILE', str(config))
+
+    classifier = SectionClassifier()
+    assert classifier.classify('获奖与技能') == 'awards'
+    assert classifier.classify('工作经历') == 'other'
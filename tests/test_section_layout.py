@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+测试PDF各部分排版结果缓存
+"""
+
+import io
+import copy
+import threading
+import contextlib
+
+import pytest
+from reportlab import rl_config
+from services.markdown_parser import ResumeMarkdownParser, section_hash, strip_parser_version
+from services.pdf_generator import ResumePDFGenerator, LayoutParagraph, section_layout_hash
+from benchmark_parser import generate_resume
+
+RESUME_DATA = ResumeMarkdownParser().parse(generate_resume(2024, 12, 'mixed'))
+
+
+@pytest.fixture(autouse=True)
+def invariant_pdf(monkeypatch):
+    """不写入创建时间和随机文档ID，使相同排版的输出逐字节相同"""
+    monkeypatch.setattr(rl_config, 'invariant', 1)
+
+
+def render(generator, data, smart_onepage):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generator.generate_pdf(data, smart_onepage=smart_onepage)
+
+
+def edit_bullet(data, round_number):
+    """修改其中一个部分的第一条要点"""
+    edited = copy.deepcopy(data)
+    section = next(section for section in edited['sections'] if section.get('entries'))
+    entry = next(entry for entry in section['entries'] if entry['bullets'])
+    entry['bullets'][0] += f' 第{round_number}次修改'
+    section['hash'] = section_hash(section)
+    return edited
+
+
+@pytest.mark.parametrize('smart_onepage', [False, True])
+def test_cached_layout_matches_fresh_render(smart_onepage):
+    """复用缓存的排版与新建生成器的输出逐字节相同"""
+    generator = ResumePDFGenerator()
+    first = render(generator, RESUME_DATA, smart_onepage)
+    assert render(generator, RESUME_DATA, smart_onepage) == first
+    edited = edit_bullet(RESUME_DATA, 1)
+    assert render(generator, edited, smart_onepage) == render(ResumePDFGenerator(), edited, smart_onepage)
+
+
+def test_only_edited_section_is_rebuilt():
+    generator = ResumePDFGenerator()
+    render(generator, RESUME_DATA, False)
+    generator._section_layouts.clear()
+    render(generator, RESUME_DATA, False)
+    sections = len(RESUME_DATA['sections'])
+    assert generator._section_layouts.stats()['misses'] == sections
+    render(generator, edit_bullet(RESUME_DATA, 1), False)
+    stats = generator._section_layouts.stats()
+    assert (stats['hits'], stats['misses']) == (sections - 1, sections + 1)
+
+
+def test_layout_paragraph_rewraps_on_width_change():
+    style = ResumePDFGenerator().styles['ModernBodyText']
+    paragraph = LayoutParagraph('很长的一段文字' * 30, style)
+    _, wide = paragraph.wrap(400, 800)
+    lines = paragraph.blPara
+    assert paragraph.wrap(400, 10) == (400, wide)
+    assert paragraph.blPara is lines
+    _, narrow = paragraph.wrap(200, 800)
+    assert narrow > wide
+
+
+def test_split_copies_shared_layout():
+    """跨页拆分的段落先复制断行结果，缓存中的段落不受影响"""
+    style = ResumePDFGenerator().styles['ModernBodyText']
+    cached = LayoutParagraph('<b>加粗</b>很长的一段文字' * 40, style)
+    cached.wrap(300, 800)
+    lines, frags = cached.blPara, cached.frags
+
+    story_copy = copy.copy(cached)
+    assert story_copy.blPara is lines
+    first, second = story_copy.split(300, 60)
+    assert story_copy.blPara is not lines and story_copy.frags is not frags
+    assert cached.blPara is lines and cached.frags is frags
+    assert cached.wrap(300, 800)[1] > first.wrap(300, 800)[1]
+
+
+def test_section_hash_from_parser_is_trusted_only_with_version():
+    """解析器生成的数据直接使用解析时的哈希；客户端数据中的 hash 字段不可信，重新计算"""
+    section = RESUME_DATA['sections'][0]
+    assert section_layout_hash(section, trusted=True) == section['hash'] == section_hash(section)
+
+    forged = strip_parser_version(edit_bullet(RESUME_DATA, 1))
+    forged['sections'] = [dict(s, hash=original['hash']) for s, original in zip(forged['sections'], RESUME_DATA['sections'])]
+    generator = ResumePDFGenerator()
+    render(generator, RESUME_DATA, False)
+    assert render(generator, forged, False) == render(ResumePDFGenerator(), edit_bullet(RESUME_DATA, 1), False)
+
+
+def test_concurrent_renders_share_layouts():
+    """多个线程同时使用缓存中的排版，输出与单线程一致"""
+    generator = ResumePDFGenerator()
+    expected = render(generator, RESUME_DATA, True)
+    results = []
+
+    def worker():
+        for _ in range(3):
+            results.append(generator.generate_pdf(RESUME_DATA, smart_onepage=True))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(results) == 12 and all(result == expected for result in results)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+测试结构化数据的紧凑存储格式
+"""
+
+import json
+
+from services.markdown_parser import ResumeMarkdownParser
+from services.structured_data import compact_structured_data, expand_structured_data, is_compact
+from test_markdown_parser import SAMPLE_RESUME, build_resume
+from test_font_rendering import test_resume_data
+
+parser = ResumeMarkdownParser()
+
+
+def sample_corpus():
+    """样例语料：示例简历、字体测试简历以及不同长度的生成简历"""
+    corpus = [SAMPLE_RESUME, test_resume_data['resume_markdown']]
+    corpus.extend(build_resume(count) for count in (3, 10, 30))
+    return corpus
+
+
+def test_round_trip_matches_parse():
+    """紧凑格式展开后与解析结果完全一致"""
+    for markdown_text in sample_corpus():
+        raw = '\n  ' + markdown_text + '\n\n'
+        data = parser.parse(raw)
+        compact = compact_structured_data(data, raw)
+
+        assert is_compact(compact)
+        assert 'raw_markdown' not in compact
+        assert expand_structured_data(json.loads(json.dumps(compact)), raw) == data
+
+
+def test_extra_keys_are_preserved():
+    """_metadata 等附加字段原样保留"""
+    data = dict(parser.parse(SAMPLE_RESUME))
+    data['_metadata'] = {'source': 'dify_chatflow', 'conversation_id': 'abc'}
+
+    expanded = expand_structured_data(compact_structured_data(data, SAMPLE_RESUME), SAMPLE_RESUME)
+    assert expanded == data
+    assert list(expanded) == list(data)
+
+
+def test_legacy_rows_read_transparently():
+    """旧格式数据原样返回"""
+    legacy = parser.parse(SAMPLE_RESUME)
+    assert expand_structured_data(legacy, SAMPLE_RESUME) is legacy
+    assert expand_structured_data(None, SAMPLE_RESUME) is None
+
+
+def test_mismatched_data_falls_back():
+    """与原文对不上的数据不压缩；原文被改动后紧凑数据视为缺失"""
+    edited = parser.parse(SAMPLE_RESUME)
+    edited['sections'][0]['items'][0]['content'] = '手动修改过的条目'
+    assert compact_structured_data(edited, SAMPLE_RESUME) is None
+
+    compact = compact_structured_data(parser.parse(SAMPLE_RESUME), SAMPLE_RESUME)
+    assert expand_structured_data(compact, SAMPLE_RESUME + '\n新增一行') is None
+
+
+def test_version_mark_kept_only_in_compact_rows():
+    """v2 格式保留解析器版本标记；按 v1 保存时去掉，之后的增量解析不复用"""
+    from models import Resume
+
+    data = parser.parse(SAMPLE_RESUME)
+    resume = Resume(raw_markdown=SAMPLE_RESUME)
+    resume.set_structured_data(data)
+    assert resume.get_structured_data()['parser_version'] == data['parser_version']
+
+    resume.raw_markdown = SAMPLE_RESUME + '\n正文被单独修改'
+    resume.set_structured_data(data)
+    assert not is_compact(json.loads(resume.structured_data))
+    assert 'parser_version' not in resume.get_structured_data()
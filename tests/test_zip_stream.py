@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+测试流式ZIP打包
+"""
+
+import io
+import os
+import zipfile
+
+from services.zip_stream import stream_zip
+
+
+def read_zip(chunks):
+    return zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+
+def test_round_trip_with_chinese_names(tmp_path):
+    """路径、字节和文件对象三种来源都能写入，中文文件名可被正常读取"""
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF-path')
+    file_obj = io.BytesIO(b'%PDF-file')
+    archive = read_zip(stream_zip([
+        ('1_张三_简历.pdf', str(path)),
+        ('2_李四_简历.pdf', b'%PDF-bytes'),
+        ('导出失败.txt', file_obj),
+    ]))
+    assert archive.testzip() is None
+    assert archive.namelist() == ['1_张三_简历.pdf', '2_李四_简历.pdf', '导出失败.txt']
+    assert archive.read('1_张三_简历.pdf') == b'%PDF-path'
+    assert archive.read('2_李四_简历.pdf') == b'%PDF-bytes'
+    assert archive.read('导出失败.txt') == b'%PDF-file'
+    assert file_obj.closed
+
+
+def test_entries_are_consumed_lazily():
+    """前一个文件的数据产出后才取下一个条目"""
+    consumed = []
+
+    def entries():
+        for i in range(3):
+            consumed.append(i)
+            yield f'{i}.pdf', os.urandom(10000)
+
+    stream = stream_zip(entries(), chunk_size=4096)
+    first = next(stream)
+    assert consumed == [0]
+    assert read_zip([first] + list(stream)).namelist() == ['0.pdf', '1.pdf', '2.pdf']
+
+
+def test_chunks_are_bounded():
+    """单个大文件按块产出，不会一次性返回整个文件"""
+    data = os.urandom(1024 * 1024)
+    chunks = list(stream_zip([('big.pdf', data)], chunk_size=64 * 1024))
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 128 * 1024
+    assert read_zip(chunks).read('big.pdf') == data
+
+
+def test_empty_archive():
+    assert read_zip(stream_zip([])).namelist() == []